@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Offline bulk scoring for whole farmer registries.
+
+Streams the input in chunks, scores the chunks on a process pool (each worker holds
+one loaded FarmerPrioritizationModel) and appends results to the output CSV in input
+order. Progress is checkpointed after every written chunk, so an interrupted run picks
+up from the last finished chunk when started again with the same arguments and model.
+A columnar .npz input is streamed column by column, like a CSV, rather than loaded whole.
+
+Usage:
+    python bulk_score.py registry.csv scores.csv --chunksize 50000 --workers 8
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, Any, Iterator, Tuple
+
+import pandas as pd
+
+from ml_model import FarmerPrioritizationModel, recommendation_labels
+from dataset_store import iter_columns, read_schema
+
+OUTPUT_COLUMNS = ['farmer_id', 'approval_probability', 'predicted_status',
+                  'priority_score', 'confidence', 'recommendation']
+
+# Loaded once per worker process by _init_worker
+_worker_model = None
+
+
+def _init_worker(bundle_path: str, model_hash: str):
+    global _worker_model
+    _worker_model = FarmerPrioritizationModel()
+    if not _worker_model.load_model(bundle_path):
+        raise RuntimeError(f"Could not load model bundle {bundle_path}")
+    # Every chunk must be scored by the model the checkpoint was written for
+    if _worker_model.training_metadata.get('content_hash') != model_hash:
+        raise RuntimeError(f"Model bundle {bundle_path} changed while scoring")
+
+
+def _score_chunk(index: int, chunk: pd.DataFrame) -> Tuple[int, pd.DataFrame]:
+    """Score one chunk in a worker process."""
+    scored = _worker_model.predict_priority_batch(chunk)
+    scored['recommendation'] = recommendation_labels(scored['priority_score'].to_numpy())
+    return index, scored[OUTPUT_COLUMNS]
+
+
+def iter_input_chunks(input_path: str, chunksize: int, usecols: list,
+                      skip_chunks: int = 0) -> Iterator[Tuple[int, pd.DataFrame]]:
+    """Yield (chunk_index, chunk) from a CSV or columnar .npz input, skipping finished chunks."""
+    wanted = set(usecols)
+    if input_path.endswith('.npz'):
+        stored = [column['name'] for column in read_schema(input_path)['columns']]
+        chunks = iter_columns(input_path, [col for col in stored if col in wanted], chunksize,
+                              skip_rows=skip_chunks * chunksize)
+        yield from enumerate(chunks, start=skip_chunks)
+        return
+
+    # Skipped rows are still scanned by the CSV parser but never converted to frames
+    reader = pd.read_csv(
+        input_path, chunksize=chunksize, usecols=lambda col: col in wanted,
+        skiprows=range(1, skip_chunks * chunksize + 1) if skip_chunks else None
+    )
+    for index, chunk in enumerate(reader, start=skip_chunks):
+        yield index, chunk
+
+
+class Checkpoint:
+    """Progress record stored next to the output file."""
+
+    def __init__(self, output_path: str, input_path: str, chunksize: int, model_hash: str):
+        self.path = f'{output_path}.progress.json'
+        self.state = {
+            'input_path': os.path.abspath(input_path),
+            'chunksize': chunksize,
+            'model_hash': model_hash,
+            'chunks_done': 0,
+            'rows_done': 0,
+            'output_bytes': 0
+        }
+
+    def load(self) -> bool:
+        """Load an existing checkpoint; False if there is none."""
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path) as f:
+            saved = json.load(f)
+        for key in ('input_path', 'chunksize', 'model_hash'):
+            if saved.get(key) != self.state[key]:
+                raise ValueError(f"Checkpoint {self.path} was written for {key}={saved.get(key)!r}, "
+                                 f"not {self.state[key]!r}. Use --restart to start over.")
+        self.state = saved
+        return True
+
+    def save(self):
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def bulk_score(input_path: str, output_path: str, bundle_path: str = None, chunksize: int = 50000,
+               workers: int = None, restart: bool = False) -> Dict[str, Any]:
+    """Score input_path into output_path; returns row count, elapsed time and throughput."""
+    probe = FarmerPrioritizationModel()
+    bundle_path = bundle_path or probe.bundle_path
+    if not probe.load_model(bundle_path):
+        raise FileNotFoundError(f"Model bundle not found: {bundle_path}")
+    usecols = ['farmer_id'] + probe.feature_columns + ['monthly_income', 'land_size_bigha', 'previous_grants']
+    model_hash = probe.training_metadata.get('content_hash')
+
+    checkpoint = Checkpoint(output_path, input_path, chunksize, model_hash)
+    if restart:
+        checkpoint.clear()
+    resumed = checkpoint.load()
+    if resumed:
+        print(f"Resuming after chunk {checkpoint.state['chunks_done']} "
+              f"({checkpoint.state['rows_done']} rows already scored)")
+
+    # Drop anything written after the last checkpoint (a partially written chunk)
+    mode = 'r+b' if resumed and os.path.exists(output_path) else 'wb'
+    output = open(output_path, mode)
+    output.truncate(checkpoint.state['output_bytes'])
+    output.seek(checkpoint.state['output_bytes'])
+    if checkpoint.state['output_bytes'] == 0:
+        output.write((','.join(OUTPUT_COLUMNS) + '\n').encode('utf-8'))
+        checkpoint.state['output_bytes'] = output.tell()
+
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = workers * 2
+    chunks = iter_input_chunks(input_path, chunksize, usecols, checkpoint.state['chunks_done'])
+    pending = {}
+    ready = {}
+    next_index = checkpoint.state['chunks_done']
+    rows_this_run = 0
+    start = time.perf_counter()
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(bundle_path, model_hash)) as pool:
+            exhausted = False
+            while True:
+                # Keep a bounded number of chunks in flight so memory stays flat
+                while not exhausted and len(pending) < max_in_flight:
+                    try:
+                        index, chunk = next(chunks)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    pending[pool.submit(_score_chunk, index, chunk)] = index
+
+                if not pending and not ready:
+                    break
+
+                if pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        del pending[future]
+                        index, scored = future.result()
+                        ready[index] = scored
+
+                # Write finished chunks strictly in input order
+                while next_index in ready:
+                    scored = ready.pop(next_index)
+                    output.write(scored.to_csv(index=False, header=False).encode('utf-8'))
+                    output.flush()
+                    os.fsync(output.fileno())
+
+                    rows_this_run += len(scored)
+                    checkpoint.state['chunks_done'] = next_index + 1
+                    checkpoint.state['rows_done'] += len(scored)
+                    checkpoint.state['output_bytes'] = output.tell()
+                    checkpoint.save()
+                    next_index += 1
+
+                    elapsed = time.perf_counter() - start
+                    print(f"Chunk {next_index}: {checkpoint.state['rows_done']} rows total, "
+                          f"{rows_this_run / elapsed:,.0f} rows/s")
+    finally:
+        output.close()
+
+    elapsed = time.perf_counter() - start
+    checkpoint.clear()
+    summary = {
+        'rows': checkpoint.state['rows_done'],
+        'rows_this_run': rows_this_run,
+        'seconds': elapsed,
+        'rows_per_second': rows_this_run / elapsed if elapsed > 0 else 0.0
+    }
+    print(f"Scored {summary['rows_this_run']} rows in {elapsed:.1f}s "
+          f"({summary['rows_per_second']:,.0f} rows/s) -> {output_path}")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-score a farmer registry without the HTTP service")
+    parser.add_argument('input', help="Input CSV or columnar .npz file")
+    parser.add_argument('output', help="Output CSV file")
+    parser.add_argument('--bundle', default=None, help="Model bundle (default: farmer_prioritization_bundle.joblib)")
+    parser.add_argument('--chunksize', type=int, default=50000, help="Rows per chunk")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument('--restart', action='store_true', help="Ignore any checkpoint and start over")
+    args = parser.parse_args()
+
+    try:
+        bulk_score(args.input, args.output, args.bundle, args.chunksize, args.workers, args.restart)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Columnar binary request/response format for batch scoring.
+
+A payload is an uncompressed NumPy .npz archive (content type application/x-npz)
+with one 1-D array per column, all of the same length, plus an optional
+'__meta__' member holding a JSON object (request options, or the response summary).
+Archives are read with allow_pickle=False, so only plain numeric, boolean and
+fixed-width string arrays are accepted. Decoding goes straight to NumPy columns
+with no per-record objects; each column is checked once against the field types of
+the request model (validate_columns), like the JSON body would be.
+
+Example client:
+    buffer = io.BytesIO()
+    np.savez(buffer, farmer_id=ids, monthly_income=incomes, ..., __meta__=json.dumps({'top_k': 100}))
+    response = requests.post(url, data=buffer.getvalue(),
+                             headers={'Content-Type': NPZ_MEDIA_TYPE, 'Accept': NPZ_MEDIA_TYPE})
+    results = np.load(io.BytesIO(response.content))
+"""
+
+import io
+import json
+import typing
+import zipfile
+import numpy as np
+from typing import Dict, Any, Optional, Tuple
+
+from fastapi import Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import Response
+from pydantic import BaseModel, ValidationError
+
+import metrics
+
+NPZ_MEDIA_TYPE = 'application/x-npz'
+META_KEY = '__meta__'
+
+
+def is_columnar_request(request: Request) -> bool:
+    return request.headers.get('content-type', '').split(';')[0].strip() == NPZ_MEDIA_TYPE
+
+
+def wants_columnar_response(request: Request) -> bool:
+    """Columnar responses go to clients that accept them, or that sent a columnar request."""
+    return NPZ_MEDIA_TYPE in request.headers.get('accept', '') or is_columnar_request(request)
+
+
+async def parse_json_body(request: Request, model_class: type) -> BaseModel:
+    """Validate a JSON body as model_class; errors become the usual 422 response."""
+    try:
+        payload = await request.json()
+    except ValueError as e:
+        raise RequestValidationError([{'loc': ('body',), 'msg': f"Invalid JSON: {e}", 'type': 'json_invalid'}])
+    try:
+        return model_class.parse_obj(payload)
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+
+
+def validate_meta(meta: Dict[str, Any], model_class: type, columns_field: str) -> BaseModel:
+    """
+    Validate the '__meta__' options of a columnar request as model_class, the request's
+    JSON model (the columns stand in for its columns_field). Errors become a 422.
+    """
+    try:
+        return model_class.parse_obj({**meta, columns_field: []})
+    except ValidationError as e:
+        raise RequestValidationError([dict(error, loc=('body', META_KEY) + tuple(error['loc']))
+                                      for error in e.errors()])
+
+
+# dtype kinds accepted for each field type: strings, integers, floats and booleans
+_ACCEPTED_KINDS = {str: 'US', int: 'iuf', float: 'iuf', bool: 'biu'}
+
+
+def _column_error(name: str, values: np.ndarray, field_type: type) -> Optional[str]:
+    """Why values cannot be a column of field_type, or None if they can."""
+    if values.dtype.kind not in _ACCEPTED_KINDS[field_type]:
+        return f"expected {field_type.__name__} values, got dtype {values.dtype}"
+    if values.dtype.kind == 'f':
+        if not np.all(np.isfinite(values)):
+            return "contains NaN or infinite values"
+        if field_type is int and not np.all(values == np.round(values)):
+            return "expected int values, got fractional floats"
+    if field_type is bool and values.dtype.kind in 'iu' and not np.all((values == 0) | (values == 1)):
+        return "expected bool values (0 or 1)"
+    return None
+
+
+def validate_columns(columns: Dict[str, np.ndarray], model_class: type):
+    """
+    Check decoded columns against a request model's fields: every required field is
+    present and every field's column has a matching dtype. Raises RequestValidationError
+    (a 422, as for the JSON body) listing every problem.
+    """
+    errors = []
+    for name, field in model_class.model_fields.items():
+        if name not in columns:
+            if field.is_required():
+                errors.append({'loc': ('body', name), 'msg': "Field required", 'type': 'missing'})
+            continue
+        field_type = field.annotation
+        if typing.get_origin(field_type) is typing.Union:
+            # Optional[X]
+            field_type = next(arg for arg in typing.get_args(field_type) if arg is not type(None))
+        if field_type not in _ACCEPTED_KINDS:
+            continue
+        message = _column_error(name, columns[name], field_type)
+        if message:
+            errors.append({'loc': ('body', name), 'msg': message, 'type': 'type_error'})
+    if errors:
+        raise RequestValidationError(errors)
+
+
+def decode_columns(body: bytes, model_class: Optional[type] = None) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+    """
+    Decode an .npz payload into (columns, meta). Raises ValueError on a malformed payload;
+    with model_class, columns are also checked by validate_columns.
+    """
+    try:
+        with np.load(io.BytesIO(body), allow_pickle=False) as archive:
+            arrays = {name: archive[name] for name in archive.files}
+    except (OSError, ValueError, zipfile.BadZipFile) as e:
+        raise ValueError(f"Invalid {NPZ_MEDIA_TYPE} payload: {e}")
+
+    meta = json.loads(str(arrays.pop(META_KEY))) if META_KEY in arrays else {}
+    if not isinstance(meta, dict):
+        raise ValueError(f"'{META_KEY}' must be a JSON object")
+
+    lengths = {name: array.shape for name, array in arrays.items()}
+    if any(len(shape) != 1 for shape in lengths.values()):
+        raise ValueError(f"Every column must be 1-D; got shapes {lengths}")
+    if len({shape[0] for shape in lengths.values()}) > 1:
+        raise ValueError(f"Columns have different lengths: {lengths}")
+    if model_class is not None:
+        validate_columns(arrays, model_class)
+    return arrays, meta
+
+
+def encode_columns(columns: Dict[str, Any], meta: Optional[Dict[str, Any]] = None) -> bytes:
+    """Encode columns (and an optional JSON meta object) as an uncompressed .npz payload."""
+    arrays = {}
+    for name, values in columns.items():
+        values = np.asarray(values)
+        # Object arrays would need pickle; store them as fixed-width strings
+        arrays[name] = values.astype(str) if values.dtype == object else values
+    if meta is not None:
+        arrays[META_KEY] = np.array(json.dumps(meta, ensure_ascii=False))
+
+    buffer = io.BytesIO()
+    np.savez(buffer, **arrays)
+    return buffer.getvalue()
+
+
+def columnar_response(columns: Dict[str, Any], meta: Optional[Dict[str, Any]] = None) -> Response:
+    with metrics.stage('serialization'):
+        content = encode_columns(columns, meta)
+    return Response(content=content, media_type=NPZ_MEDIA_TYPE)
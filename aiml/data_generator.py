@@ -1,8 +1,47 @@
 import pandas as pd
 import numpy as np
+import os
 import random
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 
+from dataset_store import write_dataset, csv_state, ColumnarWriter, DATASET_PATH, CSV_PATH
+
+# Rows per independently seeded chunk of the vectorized generator
+GENERATOR_CHUNK_ROWS = 100000
+
+# Farmer names (Nepali names)
+FIRST_NAMES = [
+    "Ram", "Sita", "Gita", "Hari", "Laxmi", "Krishna", "Radha", "Bishnu", 
+    "Parvati", "Shiva", "Durga", "Ganesh", "Saraswati", "Buddha", "Maya",
+    "Prakash", "Sunita", "Rajesh", "Anita", "Mohan", "Kumari", "Bikash",
+    "Sabina", "Dinesh", "Rekha", "Suresh", "Puja", "Narayan", "Asha", "Ramesh"
+]
+
+LAST_NAMES = [
+    "Shrestha", "Tamang", "Gurung", "Magar", "Rai", "Limbu", "Sherpa", "Thapa",
+    "Karki", "Pandey", "Bhattarai", "Adhikari", "Khadka", "Rana", "Basnet",
+    "Dahal", "Koirala", "Poudel", "Acharya", "Joshi", "Maharjan", "Shakya",
+    "Bajracharya", "Vajracharya", "Tuladhar", "Manandhar", "Dangol", "Malla"
+]
+
+# Municipalities
+MUNICIPALITIES = [
+    "भद्रपुर नगरपालिका", "मेचीनगर नगरपालिका", "इटहरी नगरपालिका", 
+    "धरान नगरपालिका", "बिराटनगर नगरपालिका", "बिरेन्द्रनगर नगरपालिका",
+    "पोखरा नगरपालिका", "ललितपुर नगरपालिका", "भक्तपुर नगरपालिका",
+    "धुलिखेल नगरपालिका", "बनेपा नगरपालिका", "पनौती नगरपालिका"
+]
+
+# Crops
+CROPS = [
+    "धान", "मकै", "गहुँ", "जौ", "आलु", "प्याज", "लसुन", "बन्दाकोबी", 
+    "काउली", "टमाटर", "खुर्सानी", "भन्टा", "करेला", "लौका", "फर्सी"
+]
+
+EDUCATION_LEVELS = ["primary", "secondary", "higher_secondary", "bachelor", "none"]
+SOCIAL_CATEGORIES = ["general", "dalit", "janajati", "madhesi", "other"]
+
 def generate_farmer_dataset(num_farmers=150):
     """
     Generate a comprehensive dataset of farmers with various characteristics
@@ -13,42 +52,13 @@ def generate_farmer_dataset(num_farmers=150):
     np.random.seed(42)
     random.seed(42)
     
-    # Farmer names (Nepali names)
-    first_names = [
-        "Ram", "Sita", "Gita", "Hari", "Laxmi", "Krishna", "Radha", "Bishnu", 
-        "Parvati", "Shiva", "Durga", "Ganesh", "Saraswati", "Buddha", "Maya",
-        "Prakash", "Sunita", "Rajesh", "Anita", "Mohan", "Kumari", "Bikash",
-        "Sabina", "Dinesh", "Rekha", "Suresh", "Puja", "Narayan", "Asha", "Ramesh"
-    ]
-    
-    last_names = [
-        "Shrestha", "Tamang", "Gurung", "Magar", "Rai", "Limbu", "Sherpa", "Thapa",
-        "Karki", "Pandey", "Bhattarai", "Adhikari", "Khadka", "Rana", "Basnet",
-        "Dahal", "Koirala", "Poudel", "Acharya", "Joshi", "Maharjan", "Shakya",
-        "Bajracharya", "Vajracharya", "Tuladhar", "Manandhar", "Dangol", "Malla"
-    ]
-    
-    # Municipalities
-    municipalities = [
-        "भद्रपुर नगरपालिका", "मेचीनगर नगरपालिका", "इटहरी नगरपालिका", 
-        "धरान नगरपालिका", "बिराटनगर नगरपालिका", "बिरेन्द्रनगर नगरपालिका",
-        "पोखरा नगरपालिका", "ललितपुर नगरपालिका", "भक्तपुर नगरपालिका",
-        "धुलिखेल नगरपालिका", "बनेपा नगरपालिका", "पनौती नगरपालिका"
-    ]
-    
-    # Crops
-    crops = [
-        "धान", "मकै", "गहुँ", "जौ", "आलु", "प्याज", "लसुन", "बन्दाकोबी", 
-        "काउली", "टमाटर", "खुर्सानी", "भन्टा", "करेला", "लौका", "फर्सी"
-    ]
-    
     data = []
     
     for i in range(num_farmers):
         # Basic farmer info
         farmer_id = f"FARMER_{i+1:03d}"
-        first_name = random.choice(first_names)
-        last_name = random.choice(last_names)
+        first_name = random.choice(FIRST_NAMES)
+        last_name = random.choice(LAST_NAMES)
         full_name = f"{first_name} {last_name}"
         
         # Contact info
@@ -56,7 +66,7 @@ def generate_farmer_dataset(num_farmers=150):
         email = f"{first_name.lower()}{random.randint(1, 999)}@gmail.com"
         
         # Location
-        municipality = random.choice(municipalities)
+        municipality = random.choice(MUNICIPALITIES)
         ward = random.randint(1, 15)
         address = f"Ward {ward}, {municipality}"
         
@@ -90,7 +100,7 @@ def generate_farmer_dataset(num_farmers=150):
         
         # Current crops (1-3 crops per farmer)
         num_crops = random.randint(1, 3)
-        current_crops = random.sample(crops, num_crops)
+        current_crops = random.sample(CROPS, num_crops)
         
         # Education level (proxy for farming knowledge)
         education_level = random.choice([
@@ -221,15 +231,178 @@ def calculate_priority_score(monthly_income, land_size, previous_grants, crop_yi
     
     return normalized_score
 
+def calculate_priority_scores(monthly_income, land_size, previous_grants, crop_yield):
+    """Vectorized calculate_priority_score over arrays of the four criteria."""
+    score = np.select([monthly_income < 15000, monthly_income < 35000], [10, 5], default=2)
+    score = score + np.select([land_size < 2, land_size <= 4], [10, 7], default=3)
+    score = score + np.select([previous_grants == 0, previous_grants == 1], [10, 5], default=2)
+    score = score + np.select([crop_yield == "high", crop_yield == "average"], [10, 7], default=4)
+    return score / 40 * 10
+
+def _pick(rng, options, n):
+    return np.asarray(options)[rng.integers(0, len(options), n)]
+
+def generate_farmer_chunk(start, num_farmers, seed_sequence):
+    """
+    Generate farmers start+1 .. start+num_farmers with every column drawn as an array.
+    Same columns and distributions as generate_farmer_dataset; the rows depend only on
+    seed_sequence, so chunks can be generated in any order or in parallel.
+    """
+    rng = np.random.default_rng(seed_sequence)
+    n = num_farmers
+    
+    farmer_number = np.arange(start + 1, start + n + 1).astype(str)
+    first_name = _pick(rng, FIRST_NAMES, n)
+    last_name = _pick(rng, LAST_NAMES, n)
+    municipality = _pick(rng, MUNICIPALITIES, n)
+    ward = rng.integers(1, 16, n)
+    
+    # Income and land: pick a band, then a value within it
+    income_band = rng.integers(0, 3, n)
+    monthly_income = rng.integers(np.array([5000, 15001, 35001])[income_band],
+                                  np.array([15000, 35000, 80000])[income_band] + 1)
+    land_band = rng.integers(0, 3, n)
+    land_size = rng.uniform(np.array([0.5, 2.0, 4.1])[land_band], np.array([1.9, 4.0, 10.0])[land_band])
+    
+    grants_band = rng.integers(0, 3, n)
+    previous_grants = np.select([grants_band == 0, grants_band == 1], [0, 1], default=rng.integers(2, 6, n))
+    
+    # Crop yield follows land size and income as in generate_farmer_dataset
+    poor_small = (land_size < 2) & (monthly_income < 15000)
+    rich_large = (land_size > 4) & (monthly_income > 35000)
+    crop_yield = np.select(
+        [poor_small, rich_large],
+        [_pick(rng, ["low", "average"], n), _pick(rng, ["high", "average"], n)],
+        default=_pick(rng, ["high", "average", "low"], n)
+    )
+    
+    # 1-3 distinct crops: draw the second and third among the crops not yet taken
+    crops = np.asarray(CROPS)
+    num_crops = rng.integers(1, 4, n)
+    first_crop = rng.integers(0, len(crops), n)
+    second_crop = (first_crop + rng.integers(1, len(crops), n)) % len(crops)
+    low, high = np.minimum(first_crop, second_crop), np.maximum(first_crop, second_crop)
+    third_crop = rng.integers(0, len(crops) - 2, n)
+    third_crop += third_crop >= low
+    third_crop += third_crop >= high
+    current_crops = np.where(num_crops >= 2, np.char.add(np.char.add(crops[first_crop], ', '), crops[second_crop]),
+                             crops[first_crop])
+    current_crops = np.where(num_crops == 3, np.char.add(np.char.add(current_crops, ', '), crops[third_crop]),
+                             current_crops)
+    
+    priority_score = calculate_priority_scores(monthly_income, land_size, previous_grants, crop_yield)
+    
+    today = np.datetime64(datetime.now().date())
+    registration_date = today - rng.integers(1, 366, n).astype('timedelta64[D]')
+    last_updated = today - rng.integers(1, 31, n).astype('timedelta64[D]')
+    
+    return pd.DataFrame({
+        'farmer_id': np.char.add('FARMER_', np.char.zfill(farmer_number, 3) if n else farmer_number),
+        'full_name': np.char.add(np.char.add(first_name, ' '), last_name),
+        'phone': np.char.add('98', rng.integers(10000000, 100000000, n).astype(str)),
+        'email': np.char.add(np.char.add(np.char.lower(first_name), rng.integers(1, 1000, n).astype(str)),
+                             '@gmail.com'),
+        'address': np.char.add(np.char.add(np.char.add('Ward ', ward.astype(str)), ', '), municipality),
+        'municipality': municipality,
+        'ward': ward,
+        'monthly_income': monthly_income,
+        'land_size_bigha': np.round(land_size, 2),
+        'previous_grants': previous_grants,
+        'crop_yield': crop_yield,
+        'current_crops': current_crops,
+        'education_level': _pick(rng, EDUCATION_LEVELS, n),
+        'family_size': rng.integers(2, 9, n),
+        'age': rng.integers(25, 71, n),
+        'farming_experience_years': rng.integers(1, 31, n),
+        'credit_score': rng.integers(300, 851, n),
+        'market_distance_km': np.round(rng.uniform(0.5, 25.0, n), 2),
+        'has_irrigation': rng.integers(0, 2, n).astype(bool),
+        'uses_modern_technology': rng.integers(0, 2, n).astype(bool),
+        'social_category': _pick(rng, SOCIAL_CATEGORIES, n),
+        'has_disability': rng.integers(0, 2, n).astype(bool),
+        'priority_score': np.round(priority_score, 2),
+        'application_status': np.where(priority_score > 7.0, 'approved', 'pending'),
+        'registration_date': np.datetime_as_string(registration_date),
+        'last_updated': np.datetime_as_string(last_updated)
+    })
+
+def _chunk_plan(num_farmers, chunk_rows, seed):
+    """(start, size, seed) per chunk; each chunk gets its own child of the root SeedSequence."""
+    starts = range(0, num_farmers, chunk_rows)
+    seeds = np.random.SeedSequence(seed).spawn(len(starts))
+    return [(start, min(chunk_rows, num_farmers - start), chunk_seed) for start, chunk_seed in zip(starts, seeds)]
+
+def generate_farmer_dataset_fast(num_farmers=150, seed=42, chunk_rows=GENERATOR_CHUNK_ROWS):
+    """Vectorized generate_farmer_dataset. Rows are reproducible for a given seed and chunk_rows."""
+    chunks = [generate_farmer_chunk(*plan) for plan in _chunk_plan(num_farmers, chunk_rows, seed)]
+    if not chunks:
+        return generate_farmer_chunk(0, 0, np.random.SeedSequence(seed))
+    return pd.concat(chunks, ignore_index=True)
+
+def _farmer_chunk(start, num_farmers, seed_sequence, header, with_frame):
+    """
+    One chunk as CSV text, so pool workers also do the (slower) CSV formatting,
+    plus the DataFrame itself when the columnar file is being built too.
+    """
+    chunk = generate_farmer_chunk(start, num_farmers, seed_sequence)
+    return chunk.to_csv(header=header, index=False), (chunk if with_frame else None)
+
+def write_large_dataset(num_farmers, csv_path=CSV_PATH, path=DATASET_PATH, seed=42,
+                        chunk_rows=GENERATOR_CHUNK_ROWS, n_jobs=1):
+    """
+    Generate num_farmers rows chunk by chunk, appending each to csv_path and to the
+    columnar file at path (skipped when path is None) as it is ready, so memory stays
+    at a few chunks whatever the size. With n_jobs > 1 chunks are generated and
+    formatted in worker processes; the output is identical to n_jobs=1.
+    seed=None draws a fresh seed.
+    Returns the number of rows written.
+    """
+    plan = _chunk_plan(num_farmers, chunk_rows, seed) or [(0, 0, np.random.SeedSequence(seed))]
+    with_frame = path is not None
+    writer = ColumnarWriter(path) if with_frame else None
+    tmp_path = f'{csv_path}.tmp{os.getpid()}'
+    
+    def write_chunk(text, chunk):
+        f.write(text)
+        if writer is not None:
+            writer.append(chunk)
+    
+    try:
+        with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+            if n_jobs > 1 and len(plan) > 1:
+                with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+                    # Keep a bounded window of chunks in flight; write them in order
+                    window = 2 * n_jobs
+                    pending = [pool.submit(_farmer_chunk, *chunk_plan, i == 0, with_frame)
+                               for i, chunk_plan in enumerate(plan[:window])]
+                    for i in range(len(plan)):
+                        text, chunk = pending.pop(0).result()
+                        if i + window < len(plan):
+                            pending.append(pool.submit(_farmer_chunk, *plan[i + window], False, with_frame))
+                        write_chunk(text, chunk)
+            else:
+                for i, chunk_plan in enumerate(plan):
+                    write_chunk(*_farmer_chunk(*chunk_plan, i == 0, with_frame))
+        os.replace(tmp_path, csv_path)
+        
+        # Written after the CSV, recording its state, so the pair is in sync
+        if writer is not None:
+            writer.close(csv_state(csv_path))
+    finally:
+        if writer is not None:
+            writer.discard()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return num_farmers
+
 def save_dataset():
-    """Generate and save the dataset to CSV file."""
+    """Generate and save the dataset in columnar form, with a CSV export."""
     print("Generating farmer dataset...")
     df = generate_farmer_dataset(150)
     
-    # Save to CSV
-    csv_path = "farmer_dataset.csv"
-    df.to_csv(csv_path, index=False)
-    print(f"Dataset saved to {csv_path}")
+    # Save typed columnar file plus CSV export
+    write_dataset(df, DATASET_PATH, CSV_PATH)
+    print(f"Dataset saved to {DATASET_PATH} (CSV export: {CSV_PATH})")
     print(f"Total farmers: {len(df)}")
     print(f"Columns: {list(df.columns)}")
     
@@ -243,6 +416,25 @@ def save_dataset():
     return df
 
 if __name__ == "__main__":
-    df = save_dataset()
-    print("\nFirst 5 rows:")
-    print(df.head())
+    import argparse
+    import time
+    
+    parser = argparse.ArgumentParser(description="Generate the synthetic farmer dataset")
+    parser.add_argument('--rows', type=int, default=None,
+                        help="Generate this many rows with the vectorized chunked generator")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--chunk-rows', type=int, default=GENERATOR_CHUNK_ROWS)
+    parser.add_argument('--jobs', type=int, default=1, help="Worker processes generating chunks")
+    parser.add_argument('--csv', default=CSV_PATH)
+    parser.add_argument('--no-columnar', action='store_true', help="Write only the CSV")
+    args = parser.parse_args()
+    
+    if args.rows is None:
+        df = save_dataset()
+        print("\nFirst 5 rows:")
+        print(df.head())
+    else:
+        started = time.perf_counter()
+        write_large_dataset(args.rows, args.csv, None if args.no_columnar else DATASET_PATH,
+                            seed=args.seed, chunk_rows=args.chunk_rows, n_jobs=args.jobs)
+        print(f"Wrote {args.rows} farmers to {args.csv} in {time.perf_counter() - started:.2f}s")
@@ -0,0 +1,294 @@
+"""
+Cached, incrementally maintained statistics for the farmer dataset.
+
+The summary behind GET /data/stats is kept as mergeable aggregates: row count,
+mean and sum of squared deviations of priority_score (merged with Chan's parallel
+update), min/max, and value counts for priority_score (the median comes from
+these), application_status, municipality and crop_yield.
+
+The aggregates are cached in memory and in a JSON sidecar file (shared by all
+server processes), keyed on the mtime, size and SHA-256 of the dataset files. A
+changed mtime or size triggers a hash check, and only changed content triggers a
+rescan. Rows appended through
+append_farmers are merged into the cached aggregates without a rescan.
+"""
+
+import hashlib
+import json
+import math
+import os
+import threading
+from collections import Counter
+from typing import Dict, List, Any, Optional, Tuple
+
+import pandas as pd
+
+from dataset_store import load_dataset, sync_dataset, append_dataset, read_schema, DATASET_PATH, CSV_PATH
+
+STATS_PATH = os.environ.get('AI_DATASET_STATS_PATH', 'farmer_dataset.stats.json')
+
+STATS_COLUMNS = ['priority_score', 'application_status', 'municipality', 'crop_yield']
+TOP_MUNICIPALITIES = 5
+
+
+def _file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _value_counts(series: pd.Series) -> Counter:
+    counts = series.astype(str).value_counts()
+    return Counter({key: int(count) for key, count in counts.items() if count > 0})
+
+
+def _sorted_counts(counts: Counter, limit: Optional[int] = None) -> Dict[str, int]:
+    """Most common first, ties in key order (as value_counts orders a categorical)."""
+    items = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+    return dict(items[:limit])
+
+
+class DatasetStats:
+    """Mergeable summary of the dataset columns behind /data/stats."""
+
+    def __init__(self, columns: List[str], count: int = 0, mean: float = 0.0, m2: float = 0.0,
+                 minimum: float = math.inf, maximum: float = -math.inf,
+                 score_counts: Counter = None, status_counts: Counter = None,
+                 municipality_counts: Counter = None, crop_yield_counts: Counter = None):
+        self.columns = columns
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+        self.minimum = minimum
+        self.maximum = maximum
+        self.score_counts = score_counts or Counter()
+        self.status_counts = status_counts or Counter()
+        self.municipality_counts = municipality_counts or Counter()
+        self.crop_yield_counts = crop_yield_counts or Counter()
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, columns: List[str]) -> 'DatasetStats':
+        scores = df['priority_score'].to_numpy(dtype=float)
+        count = len(scores)
+        mean = float(scores.mean()) if count else 0.0
+        return cls(
+            columns=columns,
+            count=count,
+            mean=mean,
+            m2=float(((scores - mean) ** 2).sum()),
+            minimum=float(scores.min()) if count else math.inf,
+            maximum=float(scores.max()) if count else -math.inf,
+            score_counts=Counter({float(value): int(n) for value, n in
+                                  df['priority_score'].value_counts().items()}),
+            status_counts=_value_counts(df['application_status']),
+            municipality_counts=_value_counts(df['municipality']),
+            crop_yield_counts=_value_counts(df['crop_yield'])
+        )
+
+    def merge(self, other: 'DatasetStats') -> 'DatasetStats':
+        """Stats of the concatenation of both datasets."""
+        count = self.count + other.count
+        if count == 0:
+            return DatasetStats(self.columns)
+        delta = other.mean - self.mean
+        return DatasetStats(
+            columns=self.columns,
+            count=count,
+            mean=self.mean + delta * other.count / count,
+            m2=self.m2 + other.m2 + delta ** 2 * self.count * other.count / count,
+            minimum=min(self.minimum, other.minimum),
+            maximum=max(self.maximum, other.maximum),
+            score_counts=self.score_counts + other.score_counts,
+            status_counts=self.status_counts + other.status_counts,
+            municipality_counts=self.municipality_counts + other.municipality_counts,
+            crop_yield_counts=self.crop_yield_counts + other.crop_yield_counts
+        )
+
+    def median(self) -> float:
+        if self.count == 0:
+            return math.nan
+        middle = [(self.count - 1) // 2, self.count // 2]
+        values = []
+        seen = 0
+        for value, n in sorted(self.score_counts.items()):
+            seen += n
+            while middle and middle[0] < seen:
+                values.append(value)
+                middle.pop(0)
+        return (values[0] + values[1]) / 2
+
+    def summary(self) -> Dict[str, Any]:
+        """The /data/stats response."""
+        def rounded(value: float) -> Optional[float]:
+            return round(value, 2) if math.isfinite(value) else None
+
+        std = math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else math.nan
+        return {
+            "total_farmers": self.count,
+            "columns": self.columns,
+            "priority_score_stats": {
+                "mean": rounded(self.mean if self.count else math.nan),
+                "median": rounded(self.median()),
+                "min": rounded(self.minimum),
+                "max": rounded(self.maximum),
+                "std": rounded(std)
+            },
+            "application_status_distribution": _sorted_counts(self.status_counts),
+            "municipality_distribution": _sorted_counts(self.municipality_counts, TOP_MUNICIPALITIES),
+            "crop_yield_distribution": _sorted_counts(self.crop_yield_counts)
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'columns': self.columns,
+            'count': self.count,
+            'mean': self.mean,
+            'm2': self.m2,
+            'minimum': self.minimum if self.count else None,
+            'maximum': self.maximum if self.count else None,
+            # JSON keys are strings; repr round-trips floats exactly
+            'score_counts': {repr(value): n for value, n in self.score_counts.items()},
+            'status_counts': dict(self.status_counts),
+            'municipality_counts': dict(self.municipality_counts),
+            'crop_yield_counts': dict(self.crop_yield_counts)
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'DatasetStats':
+        return cls(
+            columns=data['columns'],
+            count=data['count'],
+            mean=data['mean'],
+            m2=data['m2'],
+            minimum=data['minimum'] if data['count'] else math.inf,
+            maximum=data['maximum'] if data['count'] else -math.inf,
+            score_counts=Counter({float(value): n for value, n in data['score_counts'].items()}),
+            status_counts=Counter(data['status_counts']),
+            municipality_counts=Counter(data['municipality_counts']),
+            crop_yield_counts=Counter(data['crop_yield_counts'])
+        )
+
+
+class DatasetStatsCache:
+    """
+    Stats of the current dataset, recomputed only when the dataset files' content changes.
+    get() and append_farmers() return (summary, etag, last_modified) where last_modified
+    is a Unix timestamp.
+    """
+
+    def __init__(self, path: str = DATASET_PATH, csv_path: str = CSV_PATH, stats_path: str = STATS_PATH):
+        self.paths = [path, csv_path]
+        self.path = path
+        self.csv_path = csv_path
+        self.stats_path = stats_path
+        self._record = None
+        self._lock = threading.Lock()
+
+    def _matches(self, record: Optional[Dict[str, Any]]) -> bool:
+        """
+        Whether record describes the dataset files as they are now. Files whose mtime
+        or size changed are hashed; record is updated in place when only metadata changed.
+        """
+        if record is None:
+            return False
+        files = record['files']
+        for path in self.paths:
+            if not os.path.exists(path):
+                if path in files:
+                    return False
+                continue
+            if path not in files:
+                return False
+            stat = os.stat(path)
+            known = files[path]
+            if (stat.st_mtime_ns, stat.st_size) == (known['mtime_ns'], known['size']):
+                continue
+            if stat.st_size != known['size'] or _file_digest(path) != known['sha256']:
+                return False
+            # Touched but unchanged
+            known.update(mtime_ns=stat.st_mtime_ns)
+        return True
+
+    def _fingerprint(self, known: Optional[Dict[str, Any]] = None) -> Dict[str, Dict[str, Any]]:
+        """mtime, size and hash of each dataset file; files unchanged since known are not rehashed."""
+        files = {}
+        for path in self.paths:
+            if not os.path.exists(path):
+                continue
+            stat = os.stat(path)
+            entry = {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+            previous = (known or {}).get(path)
+            if previous is not None and (previous['mtime_ns'], previous['size']) == (stat.st_mtime_ns, stat.st_size):
+                entry['sha256'] = previous['sha256']
+            else:
+                entry['sha256'] = _file_digest(path)
+            files[path] = entry
+        return files
+
+    def _store(self, stats: DatasetStats, files: Dict[str, Dict[str, Any]],
+               previous: Optional[Dict[str, Any]] = None):
+        """
+        Cache stats for the given file fingerprints. The ETag is a hash of the summary itself,
+        so rewriting the files with the same data (e.g. re-importing the CSV) keeps the ETag
+        and Last-Modified that clients already hold.
+        """
+        summary = json.dumps(stats.summary(), sort_keys=True, ensure_ascii=False)
+        etag = f'"{hashlib.sha256(summary.encode()).hexdigest()[:32]}"'
+        if previous is not None and previous.get('etag') == etag:
+            last_modified = previous['last_modified']
+        else:
+            last_modified = max(entry['mtime_ns'] for entry in files.values()) / 1e9
+        self._record = {'files': files, 'stats': stats.to_dict(), 'etag': etag, 'last_modified': last_modified}
+        tmp_path = f'{self.stats_path}.tmp{os.getpid()}'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._record, f, ensure_ascii=False)
+            os.replace(tmp_path, self.stats_path)
+        except OSError as e:
+            print(f"Could not write dataset stats cache {self.stats_path}: {e}")
+
+    def _load_sidecar(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.stats_path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _compute(self, previous: Optional[Dict[str, Any]]):
+        sync_dataset(self.path, self.csv_path)
+        df = load_dataset(columns=STATS_COLUMNS, path=self.path, csv_path=self.csv_path)
+        columns = [column['name'] for column in read_schema(self.path)['columns']]
+        # Fingerprint after loading: sync_dataset may have re-imported the CSV
+        self._store(DatasetStats.from_frame(df, columns), self._fingerprint(), previous)
+
+    def _current(self) -> Dict[str, Any]:
+        if not self._matches(self._record):
+            sidecar = self._load_sidecar()
+            if self._matches(sidecar):
+                self._record = sidecar
+            else:
+                self._compute(self._record or sidecar)
+        return self._record
+
+    def _response(self) -> Tuple[Dict[str, Any], str, float]:
+        stats = DatasetStats.from_dict(self._record['stats'])
+        return stats.summary(), self._record['etag'], self._record['last_modified']
+
+    def get(self) -> Tuple[Dict[str, Any], str, float]:
+        with self._lock:
+            self._current()
+            return self._response()
+
+    def append_farmers(self, df: pd.DataFrame) -> Tuple[Dict[str, Any], str, float]:
+        """Append rows to the dataset and merge their stats into the cached stats."""
+        with self._lock:
+            record = self._current()
+            append_dataset(df, self.path, self.csv_path)
+            stats = DatasetStats.from_dict(record['stats'])
+            stats = stats.merge(DatasetStats.from_frame(df, stats.columns))
+            # Only the CSV changed; the columnar file is re-imported from it on the next sync
+            self._store(stats, self._fingerprint(record['files']), record)
+            return self._response()
+
@@ -0,0 +1,492 @@
+"""
+Typed columnar storage for the farmer dataset.
+
+The dataset is stored as a NumPy .npz archive with an explicit schema: fixed dtypes
+for numeric and boolean columns, dictionary-encoded categoricals (codes + categories)
+for the repeated Devanagari strings, and plain unicode arrays for free text. Each
+column is a separate archive member, so readers only decode the columns they ask for.
+CSV stays available as the import/export format.
+
+The schema records the state (size, mtime and SHA-256) of the CSV the archive was
+written from. Rows are appended to the CSV, so a CSV whose state no longer matches
+is newer than the archive; sync_dataset() imports it (under a lock, so concurrent
+processes import once), and load_dataset() refuses to read an archive that is out
+of date rather than rewriting it.
+"""
+
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import uuid
+import zipfile
+from contextlib import contextmanager, ExitStack
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Any, Iterator, Optional, Tuple
+
+DATASET_PATH = 'farmer_dataset.npz'
+CSV_PATH = 'farmer_dataset.csv'
+
+SCHEMA_VERSION = 1
+
+
+class StaleDatasetError(RuntimeError):
+    """The CSV changed since the columnar file was written; run sync_dataset() first."""
+
+# Column name -> storage kind ('category', 'str', 'bool', 'date' or a NumPy dtype)
+FARMER_SCHEMA = {
+    'farmer_id': 'str',
+    'full_name': 'str',
+    'phone': 'str',
+    'email': 'str',
+    'address': 'str',
+    'municipality': 'category',
+    'ward': 'int16',
+    'monthly_income': 'float64',
+    'land_size_bigha': 'float64',
+    'previous_grants': 'int16',
+    'crop_yield': 'category',
+    'current_crops': 'category',
+    'education_level': 'category',
+    'family_size': 'int16',
+    'age': 'int16',
+    'farming_experience_years': 'int16',
+    'credit_score': 'int16',
+    'market_distance_km': 'float64',
+    'has_irrigation': 'bool',
+    'uses_modern_technology': 'bool',
+    'social_category': 'category',
+    'has_disability': 'bool',
+    'priority_score': 'float64',
+    'application_status': 'category',
+    'registration_date': 'date',
+    'last_updated': 'date'
+}
+
+
+def _tmp_path(path: str) -> str:
+    """A temporary path next to path, unique to this writer (process and call)."""
+    return f'{path}.tmp{os.getpid()}-{uuid.uuid4().hex}.npz'
+
+
+def _file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def csv_state(csv_path: str = CSV_PATH) -> Optional[Dict[str, Any]]:
+    """Size, mtime and SHA-256 of a CSV (None if it does not exist), as recorded in the schema."""
+    if not os.path.exists(csv_path):
+        return None
+    stat = os.stat(csv_path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': _file_digest(csv_path)}
+
+
+@contextmanager
+def dataset_lock(path: str = DATASET_PATH):
+    """Exclusive lock, across processes, for changes to the dataset files."""
+    with open(f'{path}.lock', 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _infer_kind(series: pd.Series) -> str:
+    """Storage kind for a column that is not in FARMER_SCHEMA."""
+    if pd.api.types.is_bool_dtype(series):
+        return 'bool'
+    if pd.api.types.is_numeric_dtype(series):
+        return str(series.dtype)
+    return 'str'
+
+
+def _encode_column(series: pd.Series, kind: str) -> Dict[str, np.ndarray]:
+    """Encode one column into the archive members that store it."""
+    name = series.name
+    if kind == 'category':
+        categorical = pd.Categorical(series.astype('string').astype(object))
+        return {
+            f'{name}.codes': categorical.codes.astype(np.int32),
+            f'{name}.categories': np.asarray(categorical.categories, dtype=str)
+        }
+    if kind == 'str':
+        return {name: series.fillna('').astype(str).to_numpy(dtype=str)}
+    if kind == 'date':
+        return {name: pd.to_datetime(series).to_numpy().astype('datetime64[D]')}
+    if kind == 'bool':
+        if series.isna().any():
+            raise ValueError(f"Column '{name}' has missing values and cannot be stored as bool")
+        if series.dtype == object:
+            series = series.map(lambda v: v if isinstance(v, (bool, np.bool_)) else str(v).strip().lower() == 'true')
+        return {name: series.to_numpy(dtype=bool)}
+
+    dtype = np.dtype(kind)
+    if dtype.kind in 'iu' and series.isna().any():
+        raise ValueError(f"Column '{name}' has missing values and cannot be stored as {kind}")
+    return {name: series.to_numpy(dtype=dtype)}
+
+
+def _decode_column(archive: Any, column: Dict[str, str]) -> Any:
+    name, kind = column['name'], column['kind']
+    if kind == 'category':
+        return pd.Categorical.from_codes(archive[f'{name}.codes'], categories=archive[f'{name}.categories'])
+    return archive[name]
+
+
+def save_columns(df: pd.DataFrame, path: str = DATASET_PATH, compress: bool = True,
+                 source: Optional[Dict[str, Any]] = None):
+    """
+    Write a DataFrame to the typed columnar .npz format.
+    source is the csv_state() of the CSV the rows come from, if any.
+    """
+    arrays = {}
+    columns = []
+    for name in df.columns:
+        kind = FARMER_SCHEMA.get(name) or _infer_kind(df[name])
+        arrays.update(_encode_column(df[name], kind))
+        columns.append({'name': name, 'kind': kind})
+
+    schema = {'version': SCHEMA_VERSION, 'n_rows': int(len(df)), 'columns': columns, 'source': source}
+    arrays['__schema__'] = np.array(json.dumps(schema, ensure_ascii=False))
+
+    # Write to a temporary file first so readers never see a half-written archive
+    tmp_path = _tmp_path(path)
+    try:
+        (np.savez_compressed if compress else np.savez)(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+class ColumnarWriter:
+    """
+    Write a columnar dataset chunk by chunk, in the format of save_columns, keeping
+    only one chunk in memory. Encoded chunks are spilled to a temporary directory;
+    close() streams them into the archive, widening string columns to their final
+    width and renumbering category codes into sorted category order on the way.
+    """
+
+    def __init__(self, path: str = DATASET_PATH, compress: bool = True):
+        self.path = path
+        self.tmp_path = _tmp_path(path)
+        self.compress = compress
+        self.columns = None
+        self.n_rows = 0
+        self.n_chunks = 0
+        self.categories = {}  # column -> {value: code in order of first appearance}
+        self.dtypes = {}      # column -> stored dtype (str columns: as wide as the widest value so far)
+        self.spill_dir = tempfile.mkdtemp(prefix='.columnar-', dir=os.path.dirname(os.path.abspath(path)))
+
+    def _spill(self, name: str, values: np.ndarray):
+        with open(os.path.join(self.spill_dir, f'{name}.spill'), 'ab') as f:
+            np.save(f, values, allow_pickle=False)
+
+    def _chunks(self, name: str):
+        with open(os.path.join(self.spill_dir, f'{name}.spill'), 'rb') as f:
+            for _ in range(self.n_chunks):
+                yield np.load(f, allow_pickle=False)
+
+    def append(self, df: pd.DataFrame):
+        if self.columns is None:
+            self.columns = [{'name': name, 'kind': FARMER_SCHEMA.get(name) or _infer_kind(df[name])}
+                            for name in df.columns]
+        for column in self.columns:
+            name, kind = column['name'], column['kind']
+            series = df[name]
+            if kind == 'category':
+                seen = self.categories.setdefault(name, {})
+                local_codes, uniques = pd.factorize(series.astype('string').astype(object))
+                # Chunk codes -> codes in order of first appearance across chunks (-1 stays missing)
+                lookup = np.array([seen.setdefault(value, len(seen)) for value in uniques] + [-1], dtype=np.int32)
+                self._spill(name, lookup[local_codes])
+            else:
+                values = _encode_column(series, kind)[name]
+                if kind == 'str':
+                    widest = max(values.dtype.itemsize, self.dtypes[name].itemsize if name in self.dtypes else 4)
+                    self.dtypes[name] = np.dtype(f'<U{widest // 4}')
+                else:
+                    self.dtypes[name] = values.dtype
+                self._spill(name, values)
+        self.n_rows += len(df)
+        self.n_chunks += 1
+
+    def _write_member(self, archive: zipfile.ZipFile, member: str, dtype: np.dtype, chunks):
+        with archive.open(f'{member}.npy', 'w', force_zip64=True) as f:
+            np.lib.format.write_array_header_1_0(f, {'descr': np.lib.format.dtype_to_descr(dtype),
+                                                     'fortran_order': False, 'shape': (self.n_rows,)})
+            for values in chunks:
+                f.write(np.ascontiguousarray(values, dtype=dtype).tobytes())
+
+    def close(self, source: Optional[Dict[str, Any]] = None):
+        """
+        Write the archive (atomically, like save_columns) and remove the spilled chunks.
+        source is the csv_state() of the CSV holding the same rows, if any.
+        """
+        try:
+            tmp_path = self.tmp_path
+            compression = zipfile.ZIP_DEFLATED if self.compress else zipfile.ZIP_STORED
+            with zipfile.ZipFile(tmp_path, 'w', compression=compression, allowZip64=True) as archive:
+                for column in self.columns or []:
+                    name, kind = column['name'], column['kind']
+                    if kind == 'category':
+                        seen = self.categories[name]
+                        categories = sorted(seen)
+                        # Appearance-order code -> sorted-order code, as pd.Categorical numbers them
+                        renumber = np.empty(len(seen) + 1, dtype=np.int32)
+                        renumber[[seen[value] for value in categories]] = np.arange(len(categories))
+                        renumber[-1] = -1
+                        self._write_member(archive, f'{name}.codes', np.dtype(np.int32),
+                                           (renumber[codes] for codes in self._chunks(name)))
+                        with archive.open(f'{name}.categories.npy', 'w') as f:
+                            np.lib.format.write_array(f, np.asarray(categories, dtype=str), allow_pickle=False)
+                    else:
+                        self._write_member(archive, name, self.dtypes[name], self._chunks(name))
+                schema = {'version': SCHEMA_VERSION, 'n_rows': self.n_rows, 'columns': self.columns or [],
+                          'source': source}
+                with archive.open('__schema__.npy', 'w') as f:
+                    np.lib.format.write_array(f, np.array(json.dumps(schema, ensure_ascii=False)), allow_pickle=False)
+            os.replace(tmp_path, self.path)
+        finally:
+            self.discard()
+
+    def discard(self):
+        """Remove the spilled chunks and any half-written archive (safe to call after close)."""
+        shutil.rmtree(self.spill_dir, ignore_errors=True)
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+
+def read_schema(path: str = DATASET_PATH) -> Dict[str, Any]:
+    """Read only the schema of a columnar dataset."""
+    with np.load(path, allow_pickle=False) as archive:
+        return json.loads(str(archive['__schema__']))
+
+
+def _requested_columns(schema: Dict[str, Any], path: str, columns: Optional[List[str]]) -> List[Dict[str, str]]:
+    """Schema entries of the requested columns (all of them for None)."""
+    if schema.get('version') != SCHEMA_VERSION:
+        raise ValueError(f"Unsupported dataset schema version {schema.get('version')} in {path}")
+    stored = {column['name']: column for column in schema['columns']}
+    if columns is None:
+        columns = list(stored)
+    missing = [name for name in columns if name not in stored]
+    if missing:
+        raise KeyError(f"Columns not in dataset: {missing}")
+    return [stored[name] for name in columns]
+
+
+def load_columns(path: str = DATASET_PATH, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Load a columnar dataset. Only the requested columns are read and decoded.
+    """
+    with np.load(path, allow_pickle=False) as archive:
+        requested = _requested_columns(json.loads(str(archive['__schema__'])), path, columns)
+        return pd.DataFrame({column['name']: _decode_column(archive, column) for column in requested})
+
+
+def _open_member(archive: zipfile.ZipFile, member: str) -> Tuple[Any, np.dtype]:
+    """Open an array member for sequential reads, positioned after its header; returns (file, dtype)."""
+    f = archive.open(f'{member}.npy')
+    version = np.lib.format.read_magic(f)
+    read_header = np.lib.format.read_array_header_1_0 if version == (1, 0) else np.lib.format.read_array_header_2_0
+    shape, fortran_order, dtype = read_header(f)
+    return f, dtype
+
+
+def iter_columns(path: str = DATASET_PATH, columns: Optional[List[str]] = None, chunksize: int = 50000,
+                 skip_rows: int = 0) -> Iterator[pd.DataFrame]:
+    """
+    Stream a columnar dataset in chunks of at most chunksize rows (after skipping the
+    first skip_rows), decoding only the requested columns. Each column's archive member
+    is read sequentially, so memory holds one chunk per column whatever the dataset size.
+    """
+    schema = read_schema(path)
+    requested = _requested_columns(schema, path, columns)
+    n_rows = schema['n_rows']
+    with zipfile.ZipFile(path) as archive, ExitStack() as stack:
+        readers = []
+        for column in requested:
+            name, kind = column['name'], column['kind']
+            f, dtype = _open_member(archive, f'{name}.codes' if kind == 'category' else name)
+            stack.enter_context(f)
+            f.seek(skip_rows * dtype.itemsize, os.SEEK_CUR)
+            categories = None
+            if kind == 'category':
+                with archive.open(f'{name}.categories.npy') as categories_file:
+                    categories = np.lib.format.read_array(categories_file, allow_pickle=False)
+            readers.append((name, f, dtype, categories))
+
+        for start in range(skip_rows, n_rows, chunksize):
+            stop = min(start + chunksize, n_rows)
+            chunk = {}
+            for name, f, dtype, categories in readers:
+                values = np.frombuffer(f.read((stop - start) * dtype.itemsize), dtype=dtype)
+                if len(values) != stop - start:
+                    raise ValueError(f"Column '{name}' in {path} is shorter than its schema says")
+                chunk[name] = values if categories is None else pd.Categorical.from_codes(values, categories)
+            # Row labels continue across chunks, as with pd.read_csv(chunksize=...)
+            yield pd.DataFrame(chunk, index=pd.RangeIndex(start, stop))
+
+
+def import_csv(csv_path: str = CSV_PATH, path: str = DATASET_PATH) -> pd.DataFrame:
+    """Convert a CSV dataset to the columnar format."""
+    # State before reading: a CSV that changes meanwhile is seen as newer next time
+    source = csv_state(csv_path)
+    df = pd.read_csv(csv_path, dtype={'phone': str})
+    save_columns(df, path, source=source)
+    return df
+
+
+def export_csv(path: str = DATASET_PATH, csv_path: str = CSV_PATH):
+    """Write a columnar dataset back out as CSV."""
+    df = load_columns(path)
+    for name, kind in FARMER_SCHEMA.items():
+        if kind == 'date' and name in df.columns:
+            df[name] = df[name].dt.strftime('%Y-%m-%d')
+    df.to_csv(csv_path, index=False)
+
+
+def write_dataset(df: pd.DataFrame, path: str = DATASET_PATH, csv_path: Optional[str] = CSV_PATH):
+    """Save a dataset in columnar form, plus a CSV export unless csv_path is None."""
+    with dataset_lock(path):
+        source = None
+        if csv_path is not None:
+            df.to_csv(csv_path, index=False)
+            source = csv_state(csv_path)
+        save_columns(df, path, source=source)
+
+
+def append_dataset(df: pd.DataFrame, path: str = DATASET_PATH, csv_path: str = CSV_PATH):
+    """
+    Append rows to the dataset without rewriting it. Rows go onto the end of the CSV
+    (exported first if there is only the columnar file); sync_dataset imports the CSV
+    into the columnar file before the next load_dataset. A CSV is never older than its
+    columnar copy (the schema records which CSV state that copy holds), so an existing
+    CSV is appended to as is.
+    """
+    with dataset_lock(path):
+        if not os.path.exists(csv_path):
+            export_csv(path, csv_path)
+
+        header = list(pd.read_csv(csv_path, nrows=0).columns)
+        missing = [name for name in header if name not in df.columns]
+        if missing:
+            raise ValueError(f"Rows to append are missing columns: {missing}")
+
+        with open(csv_path, 'rb+') as f:
+            # A hand-edited CSV may not end with a newline
+            f.seek(0, os.SEEK_END)
+            if f.tell() > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    f.write(b'\n')
+        df[header].to_csv(csv_path, mode='a', header=False, index=False)
+
+
+def dataset_exists(path: str = DATASET_PATH, csv_path: str = CSV_PATH) -> bool:
+    return os.path.exists(path) or os.path.exists(csv_path)
+
+
+def dataset_is_current(path: str = DATASET_PATH, csv_path: str = CSV_PATH) -> bool:
+    """
+    Whether the columnar file holds the CSV's current rows: there is no CSV, or the CSV
+    is still in the state recorded in the schema (a touched CSV is hashed to tell).
+    """
+    if not os.path.exists(path):
+        return False
+    if not os.path.exists(csv_path):
+        return True
+    source = read_schema(path).get('source')
+    if source is None:
+        return False
+    stat = os.stat(csv_path)
+    if stat.st_size != source['size']:
+        return False
+    return stat.st_mtime_ns == source['mtime_ns'] or _file_digest(csv_path) == source['sha256']
+
+
+def sync_dataset(path: str = DATASET_PATH, csv_path: str = CSV_PATH) -> bool:
+    """
+    Import the CSV into the columnar file if it changed since the columnar file was
+    written (or has no columnar copy yet), so hand-edited, externally produced or
+    appended CSVs are picked up. Returns True if the CSV was imported.
+    """
+    with dataset_lock(path):
+        if not os.path.exists(csv_path) or dataset_is_current(path, csv_path):
+            return False
+        import_csv(csv_path, path)
+        return True
+
+
+def _require_current(path: str, csv_path: str):
+    if not dataset_exists(path, csv_path):
+        raise FileNotFoundError(f"Dataset not found: {path} or {csv_path}")
+    if not dataset_is_current(path, csv_path):
+        raise StaleDatasetError(f"{path} is missing or older than {csv_path}; run sync_dataset() first")
+
+
+def load_dataset(columns: Optional[List[str]] = None, path: str = DATASET_PATH,
+                 csv_path: str = CSV_PATH) -> pd.DataFrame:
+    """
+    Load the farmer dataset from the columnar file. Nothing is written here: raises
+    StaleDatasetError if the CSV changed since the columnar file was written (call
+    sync_dataset first).
+    """
+    _require_current(path, csv_path)
+    return load_columns(path, columns)
+
+
+def iter_dataset_chunks(columns: Optional[List[str]] = None, chunksize: int = 50000, path: str = DATASET_PATH,
+                        csv_path: str = CSV_PATH) -> Iterator[pd.DataFrame]:
+    """Stream the farmer dataset in chunks of at most chunksize rows; see load_dataset and iter_columns."""
+    _require_current(path, csv_path)
+    yield from iter_columns(path, columns, chunksize)
+
+
+def dataset_digest(path: str = DATASET_PATH, csv_path: str = CSV_PATH) -> str:
+    """
+    SHA-256 of the stored columns of the dataset that load_dataset reads. Unlike the
+    archive bytes (which carry write times and the recorded CSV state) it only changes
+    when the data does.
+    """
+    _require_current(path, csv_path)
+    schema = read_schema(path)
+    digest = hashlib.sha256(json.dumps([schema['n_rows'], schema['columns']], ensure_ascii=False).encode('utf-8'))
+    with zipfile.ZipFile(path) as archive:
+        for member in sorted(archive.namelist()):
+            if member == '__schema__.npy':
+                continue
+            digest.update(member.encode('utf-8'))
+            with archive.open(member) as f:
+                for block in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(block)
+    return digest.hexdigest()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Convert the farmer dataset between CSV and columnar .npz")
+    parser.add_argument('command', choices=['import', 'export', 'schema'])
+    parser.add_argument('--csv', default=CSV_PATH, help="CSV file path")
+    parser.add_argument('--npz', default=DATASET_PATH, help="Columnar dataset path")
+    args = parser.parse_args()
+
+    if args.command == 'import':
+        with dataset_lock(args.npz):
+            df = import_csv(args.csv, args.npz)
+        print(f"Imported {len(df)} rows from {args.csv} into {args.npz}")
+    elif args.command == 'export':
+        export_csv(args.npz, args.csv)
+        print(f"Exported {args.npz} to {args.csv}")
+    else:
+        print(json.dumps(read_schema(args.npz), indent=2, ensure_ascii=False))
@@ -0,0 +1,168 @@
+"""
+Executors that keep CPU-bound work off the asyncio event loop.
+
+Light inference (single predictions, small batches, reading stats) runs on a thread
+pool: NumPy and pandas release the GIL for most of the heavy lifting. Training and
+dataset generation run on a process pool, so they neither hold the GIL nor stall
+/health. Large batches run on a ModelPool: a process pool whose workers each load
+the served model once, so a batch only ships its rows.
+
+Configuration (environment variables):
+    AI_INFERENCE_THREADS  threads for light inference (default: min(8, cores + 4))
+    AI_PROCESS_WORKERS    processes for training and large batches (default: cores // 2)
+    AI_LARGE_BATCH_ROWS   batches with at least this many rows go to the process pool (default: 5000)
+"""
+
+import asyncio
+import contextvars
+import functools
+import multiprocessing
+import os
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable
+
+import metrics
+
+CPU_COUNT = os.cpu_count() or 1
+INFERENCE_THREADS = int(os.environ.get('AI_INFERENCE_THREADS', str(min(8, CPU_COUNT + 4))))
+PROCESS_WORKERS = int(os.environ.get('AI_PROCESS_WORKERS', str(max(1, CPU_COUNT // 2))))
+LARGE_BATCH_ROWS = int(os.environ.get('AI_LARGE_BATCH_ROWS', '5000'))
+
+_thread_pool = None
+_process_pool = None
+_model_pools = weakref.WeakSet()
+
+# The model a ModelPool worker scores with, set once by _init_model_worker
+_worker_model = None
+
+
+def get_thread_pool() -> ThreadPoolExecutor:
+    global _thread_pool
+    if _thread_pool is None:
+        _thread_pool = ThreadPoolExecutor(max_workers=INFERENCE_THREADS, thread_name_prefix='inference')
+    return _thread_pool
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    if _process_pool is None:
+        # spawn: the server process has live threads, which fork does not copy safely
+        _process_pool = ProcessPoolExecutor(max_workers=PROCESS_WORKERS,
+                                            mp_context=multiprocessing.get_context('spawn'))
+    return _process_pool
+
+
+async def run_in_thread(func: Callable, *args, **kwargs) -> Any:
+    """Run func on the inference thread pool and await its result (in the caller's context, so stages are timed)."""
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(get_thread_pool(), functools.partial(context.run, func, *args, **kwargs))
+
+
+async def run_in_process(func: Callable, *args, **kwargs) -> Any:
+    """
+    Run func on the process pool and await its result.
+    func, its arguments and its result must be picklable; func must be a module-level function.
+    Stages timed in the worker are merged into the calling request's metrics.
+    """
+    global _process_pool
+    loop = asyncio.get_running_loop()
+    try:
+        result, recorded = await loop.run_in_executor(
+            get_process_pool(), functools.partial(metrics.call_recorded, func, *args, **kwargs)
+        )
+        metrics.add_recorded(recorded)
+        return result
+    except BrokenProcessPool:
+        # A worker died (e.g. killed for memory); start a fresh pool for the next call
+        _process_pool = None
+        raise
+
+
+def _init_model_worker(model: Any):
+    global _worker_model
+    _worker_model = model
+
+
+def _call_with_worker_model(func: Callable, *args, **kwargs) -> Any:
+    return func(_worker_model, *args, **kwargs)
+
+
+class ModelPool:
+    """
+    Process pool whose workers receive the served model once, through the pool initializer.
+    set_model swaps the model and retires the workers; the next large batch starts new ones.
+    """
+
+    def __init__(self, model: Any = None):
+        self.model = model
+        self._pool = None
+        self._lock = threading.Lock()
+        _model_pools.add(self)
+
+    def set_model(self, model: Any):
+        """Serve a new model; batches already submitted finish on the old workers."""
+        with self._lock:
+            self.model = model
+            self._retire(wait=False)
+
+    def _retire(self, wait: bool):
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait)
+            self._pool = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=PROCESS_WORKERS,
+                                             mp_context=multiprocessing.get_context('spawn'),
+                                             initializer=_init_model_worker, initargs=(self.model,))
+        return self._pool
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """Run func(model, *args, **kwargs) in a worker; func must be a module-level function."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            # run_in_executor submits at once, so a concurrent set_model cannot retire the pool first
+            pool = self._get_pool()
+            future = loop.run_in_executor(
+                pool, functools.partial(metrics.call_recorded, _call_with_worker_model, func, *args, **kwargs)
+            )
+        try:
+            result, recorded = await future
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory); start fresh workers for the next batch
+            with self._lock:
+                if self._pool is pool:
+                    self._pool = None
+            raise
+        metrics.add_recorded(recorded)
+        return result
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            self._retire(wait)
+
+
+async def run_batch(model_pool: ModelPool, func: Callable, n_rows: int, *args, **kwargs) -> Any:
+    """
+    Run func(model, *args, **kwargs) with model_pool's model: on the thread pool, or on the
+    pool's workers once the batch has LARGE_BATCH_ROWS rows.
+    """
+    if n_rows >= LARGE_BATCH_ROWS:
+        return await model_pool.run(func, *args, **kwargs)
+    return await run_in_thread(func, model_pool.model, *args, **kwargs)
+
+
+def shutdown_executors(wait: bool = True):
+    global _thread_pool, _process_pool
+    if _thread_pool is not None:
+        _thread_pool.shutdown(wait=wait)
+        _thread_pool = None
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=wait, cancel_futures=True)
+        _process_pool = None
+    for model_pool in list(_model_pools):
+        model_pool.shutdown(wait=wait)
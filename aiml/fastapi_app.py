@@ -1,4 +1,5 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List, Dict, Any, Optional
@@ -7,11 +8,23 @@ import numpy as np
 import joblib
 import os
 from datetime import datetime
+from email.utils import formatdate, parsedate_to_datetime
 import uvicorn
 
 # Import our custom modules
-from ml_model import FarmerPrioritizationModel
-from data_generator import generate_farmer_dataset, save_dataset
+from ml_model import FarmerPrioritizationModel, find_cached_bundle, recommendation_labels
+from reason_codes import priority_reasons
+from micro_batcher import MicroBatcher
+from executors import run_in_thread, run_in_process, run_batch, shutdown_executors, ModelPool
+from training_jobs import TrainingJobManager, load_and_validate
+from ndjson_stream import NDJSONStreamingResponse, stream_scored_chunks
+from columnar_format import (is_columnar_request, wants_columnar_response, decode_columns,
+                             columnar_response, parse_json_body, validate_meta)
+from data_generator import write_large_dataset, save_dataset
+from dataset_store import load_dataset, dataset_exists, DATASET_PATH, CSV_PATH
+from dataset_stats import DatasetStatsCache
+from prefork_server import request_reload
+import metrics
 
 app = FastAPI(
     title="AgriFairConnect AI Service",
@@ -19,6 +32,9 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Per-stage latency histograms for every route, served at /metrics
+app_metrics = metrics.instrument(app, 'prioritization')
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -31,6 +47,47 @@ app.add_middleware(
 # Global model instance
 model = None
 
+# Workers for large batches, each holding a copy of the served model
+batch_pool = ModelPool()
+
+def score_predict_requests(farmer_dicts: List[Dict[str, Any]]) -> List[tuple]:
+    """Score a micro-batch of single /predict requests in one vectorized call."""
+    metrics.observe_batch_size(len(farmer_dicts))
+    farmers = pd.DataFrame(farmer_dicts)
+    batch = model.predict_priority_batch(farmers)  # one read of the global; a swap mid-batch is not seen
+    recommendations, reasoning, reason_codes = generate_recommendations(batch, farmers)
+    return list(zip(batch.to_dict('records'), recommendations, reasoning, reason_codes))
+
+def install_model(candidate: FarmerPrioritizationModel):
+    """Swap the served model; requests already scoring keep the model they started with."""
+    global model
+    model = candidate
+    batch_pool.set_model(candidate)
+    app_metrics.observe_model_load('prioritization', candidate.load_seconds)
+
+def score_predict_micro_batch(farmer_dicts: List[Dict[str, Any]]) -> List[tuple]:
+    """
+    score_predict_requests for the micro-batcher. The batch's stage timings are appended
+    to every result, since each request in the batch waited for all of them.
+    """
+    with metrics.recording() as recorded:
+        results = score_predict_requests(farmer_dicts)
+    return [result + (recorded,) for result in results]
+
+def on_training_job_finished(record: Dict[str, Any]):
+    # Under the pre-fork launcher, roll every worker onto the new model, not just this one
+    if record['status'] == 'succeeded':
+        request_reload()
+
+training_jobs = TrainingJobManager(install_model, on_finished=on_training_job_finished)
+
+# /data/stats is served from cached aggregates until the dataset files change
+data_stats = DatasetStatsCache()
+
+# Concurrent /predict calls are scored together (window/size set by AI_PREDICT_BATCH_WINDOW_MS/AI_PREDICT_MAX_BATCH_SIZE)
+# Scoring runs on the inference threads so the event loop keeps serving while a batch is scored
+predict_batcher = MicroBatcher(lambda farmer_dicts: run_in_thread(score_predict_micro_batch, farmer_dicts))
+
 # Pydantic models for API requests/responses
 class FarmerData(BaseModel):
     farmer_id: str
@@ -59,6 +116,7 @@ class FarmerData(BaseModel):
 class PredictionRequest(BaseModel):
     farmer_data: FarmerData
     grant_id: Optional[str] = None
+    explain: bool = False  # Include the top per-feature model contributions
 
 class PredictionResponse(BaseModel):
     farmer_id: str
@@ -68,10 +126,24 @@ class PredictionResponse(BaseModel):
     confidence: float
     recommendation: str
     reasoning: List[str]
+    reason_codes: List[int]  # Codes from reason_codes.py, one per reasoning message
+    contributions: Optional[List[Dict[str, Any]]] = None
 
 class BatchPredictionRequest(BaseModel):
     farmers: List[FarmerData]
     grant_id: Optional[str] = None
+    top_k: Optional[int] = None  # Return only the N highest-priority farmers
+    min_score: Optional[float] = None  # Return only farmers with priority_score >= min_score
+    explain: bool = False  # Include the top per-feature model contributions
+
+class DatasetRecord(FarmerData):
+    priority_score: float
+    application_status: str
+    registration_date: Optional[str] = None  # YYYY-MM-DD, defaults to today
+    last_updated: Optional[str] = None
+
+class AppendDataRequest(BaseModel):
+    farmers: List[DatasetRecord]
 
 class BatchPredictionResponse(BaseModel):
     predictions: List[PredictionResponse]
@@ -83,17 +155,27 @@ class ModelInfo(BaseModel):
     features_used: Optional[List[str]] = None
     last_trained: Optional[str] = None
 
-@app.on_event("startup")
-async def startup_event():
-    """Initialize the model on startup."""
-    global model
-    model = FarmerPrioritizationModel()
+def preload_model():
+    """Load the saved model; the pre-fork launcher calls this once before forking workers."""
+    candidate = FarmerPrioritizationModel()
     
     # Try to load existing model
-    if not model.load_model():
+    if not candidate.load_model():
         print("No existing model found. Please train the model first.")
     else:
         print("Model loaded successfully!")
+    install_model(candidate)
+
+@app.on_event("startup")
+async def startup_event():
+    """Initialize the model on startup, unless it was preloaded before the workers forked."""
+    if model is None:
+        preload_model()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await predict_batcher.close()
+    shutdown_executors(wait=False)
 
 @app.get("/")
 async def root():
@@ -113,28 +195,25 @@ async def health_check():
         "model_loaded": model is not None and model.model is not None
     }
 
+@app.get("/metrics")
+async def get_metrics():
+    """Request and per-stage latency histograms, batch sizes and model-load time (Prometheus text format)."""
+    return metrics.metrics_response(app_metrics)
+
 @app.get("/model/info", response_model=ModelInfo)
 async def get_model_info():
     """Get information about the current model."""
     if model is None or model.model is None:
         return ModelInfo(model_loaded=False)
     
-    # Try to load model metrics if available
-    accuracy = None
-    features_used = None
-    last_trained = None
-    
-    try:
-        if hasattr(model, 'feature_columns'):
-            features_used = model.feature_columns
-    except:
-        pass
+    # Metrics recorded in the model bundle at training time
+    metadata = model.training_metadata or {}
     
     return ModelInfo(
         model_loaded=True,
-        accuracy=accuracy,
-        features_used=features_used,
-        last_trained=last_trained
+        accuracy=metadata.get('accuracy'),
+        features_used=model.feature_columns or None,
+        last_trained=metadata.get('last_trained')
     )
 
 @app.post("/predict", response_model=PredictionResponse)
@@ -147,14 +226,12 @@ async def predict_farmer_priority(request: PredictionRequest):
         # Convert Pydantic model to dict
         farmer_dict = request.farmer_data.dict()
         
-        # Debug: Print the farmer data to see what's being sent
-        print(f"Debug: Farmer data keys: {list(farmer_dict.keys())}")
-        
-        # Make prediction
-        prediction = model.predict_priority(farmer_dict)
-        
-        # Generate recommendation and reasoning
-        recommendation, reasoning = generate_recommendation(prediction, farmer_dict)
+        # Scored together with other concurrent requests by the micro-batcher
+        prediction, recommendation, reasoning, reason_codes, batch_stages = await predict_batcher.submit(farmer_dict)
+        metrics.add_recorded(batch_stages)
+        contributions = None
+        if request.explain:
+            contributions = (await run_in_thread(model.explain_batch, pd.DataFrame([farmer_dict])))[0]
         
         return PredictionResponse(
             farmer_id=prediction['farmer_id'],
@@ -163,190 +240,344 @@ async def predict_farmer_priority(request: PredictionRequest):
             priority_score=prediction['priority_score'],
             confidence=prediction['confidence'],
             recommendation=recommendation,
-            reasoning=reasoning
+            reasoning=reasoning,
+            reason_codes=reason_codes,
+            contributions=contributions
         )
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
 
+@app.get("/predict/stats")
+async def get_predict_stats():
+    """Micro-batching counters for /predict: batch sizes and queue delay."""
+    return predict_batcher.get_stats()
+
 @app.post("/predict/batch", response_model=BatchPredictionResponse)
-async def predict_batch_priority(request: BatchPredictionRequest):
-    """Predict priority for multiple farmers."""
+async def predict_batch_priority(request: Request):
+    """
+    Predict priority for multiple farmers.
+    The body is a JSON BatchPredictionRequest, or a columnar application/x-npz payload
+    (one array per FarmerData field, options in '__meta__') that skips per-farmer
+    validation. Send Accept: application/x-npz to get the results back as columns.
+    """
     if model is None or model.model is None:
         raise HTTPException(status_code=503, detail="Model not loaded. Please train the model first.")
     
+    with metrics.stage('parse'):
+        if is_columnar_request(request):
+            try:
+                columns, meta = decode_columns(await request.body(), FarmerData)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            options = validate_meta(meta, BatchPredictionRequest, 'farmers')
+            farmers = pd.DataFrame(columns)
+            top_k, min_score, explain = options.top_k, options.min_score, options.explain
+        else:
+            batch_request = await parse_json_body(request, BatchPredictionRequest)
+            farmers = [farmer_data.dict() for farmer_data in batch_request.farmers]
+            top_k, min_score, explain = batch_request.top_k, batch_request.min_score, batch_request.explain
+    
+    if not len(farmers):
+        raise HTTPException(status_code=400, detail="No farmers provided.")
+    
+    if top_k is not None and top_k < 1:
+        raise HTTPException(status_code=400, detail="top_k must be at least 1.")
+    
     try:
-        predictions = []
+        columnar = wants_columnar_response(request)
         
-        for farmer_data in request.farmers:
-            farmer_dict = farmer_data.dict()
-            prediction = model.predict_priority(farmer_dict)
-            
-            recommendation, reasoning = generate_recommendation(prediction, farmer_dict)
-            
-            predictions.append(PredictionResponse(
-                farmer_id=prediction['farmer_id'],
-                approval_probability=prediction['approval_probability'],
-                predicted_status=prediction['predicted_status'],
-                priority_score=prediction['priority_score'],
-                confidence=prediction['confidence'],
-                recommendation=recommendation,
-                reasoning=reasoning
-            ))
+        # Small batches are scored on the inference threads, large ones on the process pool
+        result = await run_batch(batch_pool, score_farmer_batch, len(farmers), farmers,
+                                 top_k, min_score, explain, columnar)
         
-        # Sort by priority score (highest first)
-        predictions.sort(key=lambda x: x.priority_score, reverse=True)
-        
-        # Generate summary
-        summary = {
-            "total_farmers": len(predictions),
-            "high_priority": len([p for p in predictions if p.priority_score >= 8.0]),
-            "medium_priority": len([p for p in predictions if 5.0 <= p.priority_score < 8.0]),
-            "low_priority": len([p for p in predictions if p.priority_score < 5.0]),
-            "avg_priority_score": round(np.mean([p.priority_score for p in predictions]), 2),
-            "avg_approval_probability": round(np.mean([p.approval_probability for p in predictions]), 4)
-        }
-        
-        return BatchPredictionResponse(
-            predictions=predictions,
-            summary=summary
-        )
+        if columnar:
+            return columnar_response(result['columns'], result['meta'])
+        return BatchPredictionResponse(**result)
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Batch prediction failed: {str(e)}")
 
+@app.post("/predict/stream")
+async def predict_stream(request: Request):
+    """
+    Score newline-delimited JSON farmer records (one object per line) and stream
+    one NDJSON prediction per record back, in input order. Records are scored in
+    chunks of AI_STREAM_CHUNK_ROWS, so results start before the upload finishes.
+    """
+    if model is None or model.model is None:
+        raise HTTPException(status_code=503, detail="Model not loaded. Please train the model first.")
+    
+    async def score_chunk(farmer_dicts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        scored = await run_in_thread(score_predict_requests, farmer_dicts)
+        return [dict(prediction, recommendation=recommendation, reasoning=reasoning, reason_codes=reason_codes)
+                for prediction, recommendation, reasoning, reason_codes in scored]
+    
+    return NDJSONStreamingResponse(stream_scored_chunks(request, score_chunk, FarmerData))
+
 @app.post("/model/train")
-async def train_model(background_tasks: BackgroundTasks):
-    """Train the model with the current dataset."""
+async def train_model(force: bool = False, incremental: bool = False, parallel: bool = False):
+    """
+    Train the model with the current dataset as a background job.
+    If this dataset was already trained with the same settings, the cached model is
+    reused immediately; pass force=true to retrain anyway. Poll the returned job_id
+    at /model/train/jobs/{job_id} for progress.
+    """
+    if training_jobs.active_job_id is not None:
+        raise HTTPException(status_code=409, detail=f"Training job {training_jobs.active_job_id} is already running.")
+    
     try:
         # Check if dataset exists
-        if not os.path.exists('farmer_dataset.csv'):
+        if not dataset_exists():
             # Generate dataset if it doesn't exist
-            save_dataset()
+            await run_in_process(save_dataset)
+        
+        if not force:
+            entry = await run_in_thread(find_cached_bundle, incremental, parallel)
+            if entry is not None:
+                cached_metrics = entry['metrics']
+                try:
+                    # Same path as a finished training job: validate, install, then swap
+                    candidate = await run_in_thread(load_and_validate, {**entry, 'cache_key': None})
+                except ValueError as e:
+                    print(f"Cached model failed validation, retraining: {e}")
+                else:
+                    await run_in_thread(candidate.install_bundle, entry['bundle_path'])
+                    install_model(candidate)
+                    # Under the pre-fork launcher, roll every worker onto the cached model
+                    request_reload()
+                    return {
+                        "message": "Dataset and settings unchanged; reusing cached model",
+                        "status": "cached",
+                        "accuracy": cached_metrics.get('accuracy'),
+                        "cv_mean": cached_metrics.get('cv_mean')
+                    }
         
-        # Train model in background
-        background_tasks.add_task(train_model_background)
+        # Train in a worker process; the model is swapped in only after validation
+        job = training_jobs.start(incremental=incremental, parallel=parallel)
         
         return {
             "message": "Model training started in background",
-            "status": "training"
+            "status": "training",
+            "job_id": job['job_id']
         }
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Training failed: {str(e)}")
 
-async def train_model_background():
-    """Background task to train the model."""
-    global model
-    
-    try:
-        from ml_model import train_and_evaluate_model
-        model, results = train_and_evaluate_model()
-        print("Model training completed successfully!")
-    except Exception as e:
-        print(f"Model training failed: {str(e)}")
+@app.get("/model/train/jobs")
+async def list_training_jobs():
+    """Recent training jobs, newest first."""
+    return {"jobs": await run_in_thread(training_jobs.list)}
+
+@app.get("/model/train/jobs/{job_id}")
+async def get_training_job(job_id: str):
+    """Status, progress, stage timings and metrics of a training job."""
+    job = training_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Training job {job_id} not found")
+    return job
 
 @app.post("/data/generate")
-async def generate_data(num_farmers: int = 150):
-    """Generate new dataset."""
+async def generate_data(num_farmers: int = 150, seed: int = 42):
+    """Generate new dataset (reproducible for a given seed)."""
     try:
-        df = generate_farmer_dataset(num_farmers)
-        df.to_csv('farmer_dataset.csv', index=False)
+        total_farmers = await run_in_process(write_large_dataset, num_farmers, seed=seed)
         
         return {
             "message": f"Dataset generated successfully",
-            "total_farmers": len(df),
-            "file_path": "farmer_dataset.csv"
+            "total_farmers": total_farmers,
+            "file_path": DATASET_PATH,
+            "csv_path": CSV_PATH
         }
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Data generation failed: {str(e)}")
 
+@app.post("/data/append")
+async def append_data(request: AppendDataRequest):
+    """Append farmers to the dataset; the cached stats are updated without a rescan."""
+    if not dataset_exists():
+        raise HTTPException(status_code=404, detail="Dataset not found")
+    
+    today = datetime.now().strftime('%Y-%m-%d')
+    df = pd.DataFrame([farmer.dict() for farmer in request.farmers])
+    for column in ['registration_date', 'last_updated']:
+        df[column] = df[column].fillna(today)
+    
+    try:
+        stats, etag, last_modified = await run_in_thread(data_stats.append_farmers, df)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to append data: {str(e)}")
+    
+    return JSONResponse({"appended": len(df), "stats": stats},
+                        headers=stats_cache_headers(etag, last_modified))
+
 @app.get("/data/stats")
-async def get_data_stats():
-    """Get statistics about the current dataset."""
+async def get_data_stats(request: Request):
+    """
+    Get statistics about the current dataset.
+    Supports conditional requests: If-None-Match / If-Modified-Since get a 304 when unchanged.
+    """
+    if not dataset_exists():
+        raise HTTPException(status_code=404, detail="Dataset not found")
+    
     try:
-        if not os.path.exists('farmer_dataset.csv'):
-            raise HTTPException(status_code=404, detail="Dataset not found")
-        
-        df = pd.read_csv('farmer_dataset.csv')
-        
-        stats = {
-            "total_farmers": len(df),
-            "columns": list(df.columns),
-            "priority_score_stats": {
-                "mean": round(df['priority_score'].mean(), 2),
-                "median": round(df['priority_score'].median(), 2),
-                "min": round(df['priority_score'].min(), 2),
-                "max": round(df['priority_score'].max(), 2),
-                "std": round(df['priority_score'].std(), 2)
-            },
-            "application_status_distribution": df['application_status'].value_counts().to_dict(),
-            "municipality_distribution": df['municipality'].value_counts().head(5).to_dict(),
-            "crop_yield_distribution": df['crop_yield'].value_counts().to_dict()
-        }
-        
-        return stats
+        stats, etag, last_modified = await run_in_thread(data_stats.get)
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get data stats: {str(e)}")
-
-def generate_recommendation(prediction: Dict[str, Any], farmer_data: Dict[str, Any]) -> tuple:
-    """Generate recommendation and reasoning based on prediction."""
-    recommendation = ""
-    reasoning = []
     
-    priority_score = prediction['priority_score']
-    approval_probability = prediction['approval_probability']
+    headers = stats_cache_headers(etag, last_modified)
+    if not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(stats, headers=headers)
+
+def stats_cache_headers(etag: str, last_modified: float) -> Dict[str, str]:
+    # no-cache: clients may keep the response but must revalidate it on every poll
+    return {"ETag": etag, "Last-Modified": formatdate(last_modified, usegmt=True), "Cache-Control": "no-cache"}
+
+def not_modified(request: Request, etag: str, last_modified: float) -> bool:
+    """Whether a conditional GET can be answered with 304. If-None-Match takes precedence."""
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(',')]
+        return '*' in tags or etag in [tag[2:] if tag.startswith('W/') else tag for tag in tags]
     
-    # Generate recommendation based on priority score
-    if priority_score >= 8.0:
-        recommendation = "Highly Recommended for Grant Approval"
-        reasoning.append("High priority score indicates strong need and eligibility")
-    elif priority_score >= 6.0:
-        recommendation = "Recommended for Grant Approval"
-        reasoning.append("Good priority score shows eligibility for support")
-    elif priority_score >= 4.0:
-        recommendation = "Consider for Grant Approval"
-        reasoning.append("Moderate priority score - review additional factors")
+    if_modified_since = request.headers.get('if-modified-since')
+    if if_modified_since is not None:
+        try:
+            return int(last_modified) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+def select_top_priority(priority_scores: np.ndarray, top_k: Optional[int] = None,
+                        min_score: Optional[float] = None) -> np.ndarray:
+    """
+    Indices of the farmers to return, highest priority first with input order breaking ties.
+    Uses a linear-time partition to find the top_k cut-off instead of sorting the whole batch;
+    only the selected rows are sorted.
+    """
+    if min_score is None:
+        candidates = np.arange(len(priority_scores))
     else:
-        recommendation = "Not Recommended for Grant Approval"
-        reasoning.append("Low priority score - consider other applicants first")
+        candidates = np.flatnonzero(priority_scores >= min_score)
     
-    # Add reasoning based on individual factors
-    monthly_income = farmer_data.get('monthly_income', 0)
-    if monthly_income < 15000:
-        reasoning.append("Low income level - high need for support")
-    elif monthly_income > 35000:
-        reasoning.append("Higher income level - lower priority")
+    if top_k is not None and top_k < len(candidates):
+        candidate_scores = priority_scores[candidates]
+        cutoff = np.partition(candidate_scores, len(candidates) - top_k)[len(candidates) - top_k]
+        above = candidates[candidate_scores > cutoff]
+        # Fill the remaining places with the earliest farmers tied at the cut-off
+        tied = candidates[candidate_scores == cutoff][:top_k - len(above)]
+        candidates = np.concatenate([above, tied])
     
-    land_size = farmer_data.get('land_size_bigha', 0)
-    if land_size < 2:
-        reasoning.append("Small landholding - high priority for support")
-    elif land_size > 4:
-        reasoning.append("Large landholding - lower priority")
+    return candidates[np.lexsort((candidates, -priority_scores[candidates]))]
+
+def score_farmer_batch(batch_model: FarmerPrioritizationModel, farmers: Any,
+                       top_k: Optional[int] = None, min_score: Optional[float] = None,
+                       explain: bool = False, columnar: bool = False) -> Dict[str, Any]:
+    """
+    Score a batch (list of farmer dicts or a DataFrame) and build the /predict/batch
+    payload for the selected farmers. With columnar=True the results are returned as
+    arrays ({'columns', 'meta'}) instead of per-farmer dicts.
+    Module-level so it can run in a worker process.
+    """
+    farmers = farmers if isinstance(farmers, pd.DataFrame) else pd.DataFrame(farmers)
+    metrics.observe_batch_size(len(farmers))
+    
+    # Score the whole batch in one vectorized pass
+    batch = batch_model.predict_priority_batch(farmers)
+    priority_scores = batch['priority_score'].to_numpy()
     
-    previous_grants = farmer_data.get('previous_grants', 0)
-    if previous_grants == 0:
-        reasoning.append("No previous grants - first-time applicant priority")
-    elif previous_grants > 1:
-        reasoning.append("Multiple previous grants - lower priority")
+    # Only the selected farmers, highest priority first, get full responses and reasoning
+    selected = select_top_priority(priority_scores, top_k, min_score)
+    selected_batch = batch.iloc[selected]
+    selected_farmers = farmers.iloc[selected]
+    
+    # Summary always covers the whole batch
+    summary = {
+        "total_farmers": len(batch),
+        "returned": len(selected),
+        "high_priority": int(np.sum(priority_scores >= 8.0)),
+        "medium_priority": int(np.sum((priority_scores >= 5.0) & (priority_scores < 8.0))),
+        "low_priority": int(np.sum(priority_scores < 5.0)),
+        "avg_priority_score": round(float(priority_scores.mean()), 2),
+        "avg_approval_probability": round(float(batch['approval_probability'].mean()), 4)
+    }
     
-    social_category = farmer_data.get('social_category', 'general')
-    if social_category in ['dalit', 'janajati', 'madhesi']:
-        reasoning.append("Marginalized social category - inclusive development priority")
+    if columnar:
+        columns = {col: selected_batch[col].to_numpy() for col in selected_batch.columns}
+        columns['recommendation'] = recommendation_labels(columns['priority_score'])
+        # Bit j of reason_mask is set when reason code meta['reason_codes'][j] (meta['reason_messages'][j]) applies
+        with metrics.stage('reasoning'):
+            reason_mask = priority_reasons.evaluate(_reason_inputs(selected_batch, selected_farmers), len(selected))
+            columns['reason_mask'] = priority_reasons.pack(reason_mask)
+        meta = {"summary": summary, "reason_codes": priority_reasons.code_table(),
+                "reason_messages": priority_reasons.message_table()}
+        if explain:
+            contributions = batch_model.feature_contributions(selected_farmers)
+            for j, feature in enumerate(batch_model.feature_columns):
+                columns[f'contribution.{feature}'] = contributions[:, j]
+        return {"columns": columns, "meta": meta}
     
-    if farmer_data.get('has_disability', False):
-        reasoning.append("Disability status - special consideration")
+    recommendations, reasoning, reason_codes = generate_recommendations(selected_batch, selected_farmers)
+    if explain:
+        contributions = batch_model.explain_batch(selected_farmers)
+    else:
+        contributions = [None] * len(selected)
     
-    # Add confidence level reasoning
-    confidence = prediction['confidence']
-    if confidence > 0.8:
-        reasoning.append("High confidence prediction")
-    elif confidence < 0.5:
-        reasoning.append("Low confidence - manual review recommended")
+    predictions = [
+        {
+            "farmer_id": farmer_id,
+            "approval_probability": approval_probability,
+            "predicted_status": predicted_status,
+            "priority_score": priority_score,
+            "confidence": confidence,
+            "recommendation": recommendation,
+            "reasoning": reasons,
+            "reason_codes": codes,
+            "contributions": explanation
+        }
+        for farmer_id, approval_probability, predicted_status, priority_score, confidence,
+            recommendation, reasons, codes, explanation in zip(
+            selected_batch['farmer_id'].tolist(),
+            selected_batch['approval_probability'].tolist(),
+            selected_batch['predicted_status'].tolist(),
+            selected_batch['priority_score'].tolist(),
+            selected_batch['confidence'].tolist(),
+            recommendations, reasoning, reason_codes, contributions
+        )
+    ]
     
-    return recommendation, reasoning
+    return {"predictions": predictions, "summary": summary}
+
+def _reason_inputs(batch: pd.DataFrame, farmers: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """Columns the priority reason rules read: farmer fields plus the scored outputs."""
+    columns = {col: farmers[col].to_numpy() for col in farmers.columns}
+    columns['priority_score'] = batch['priority_score'].to_numpy()
+    columns['confidence'] = batch['confidence'].to_numpy()
+    return columns
+
+def generate_recommendations(batch: pd.DataFrame, farmers: pd.DataFrame) -> tuple:
+    """
+    Recommendation, reasoning and reason codes for every row of a scored batch.
+    The reason rules are evaluated as boolean masks over the batch columns.
+    """
+    with metrics.stage('reasoning'):
+        columns = _reason_inputs(batch, farmers)
+        recommendations = recommendation_labels(columns['priority_score']).tolist()
+        reason_codes, reasoning = priority_reasons.explain(columns, len(batch))
+    return recommendations, reasoning, reason_codes
+
+def generate_recommendation(prediction: Dict[str, Any], farmer_data: Dict[str, Any]) -> tuple:
+    """Generate recommendation and reasoning based on prediction."""
+    recommendations, reasoning, _ = generate_recommendations(
+        pd.DataFrame([prediction]), pd.DataFrame([farmer_data])
+    )
+    return recommendations[0], reasoning[0]
 
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8001)
@@ -0,0 +1,146 @@
+import numpy as np
+from typing import Dict, List, Any, Mapping
+
+
+def _is_missing(values: np.ndarray) -> np.ndarray:
+    """Boolean mask of None/NaN entries in an object array."""
+    return np.fromiter((v is None or v != v for v in values), dtype=bool, count=len(values))
+
+
+class FrozenFeatureTransformer:
+    """
+    Fit-free feature transformer for serving.
+    Built once from the encoders and fill values saved at training time, it turns
+    farmer records straight into NumPy feature vectors without refitting anything.
+    """
+
+    def __init__(self, feature_columns: List[str], category_maps: Dict[str, Dict[str, int]],
+                 unseen_codes: Dict[str, int], fill_values: Dict[str, Any]):
+        self.feature_columns = list(feature_columns)
+        self.category_maps = category_maps
+        self.unseen_codes = unseen_codes
+        self.fill_values = fill_values
+        self.n_features = len(self.feature_columns)
+
+    @classmethod
+    def from_training_state(cls, feature_columns: List[str], label_encoders: Dict[str, Any],
+                            fill_values: Dict[str, Any]) -> 'FrozenFeatureTransformer':
+        """
+        Build lookup tables from fitted LabelEncoders.
+        Unseen categories map to the code of the training-time fill value (the mode).
+        """
+        category_maps = {}
+        unseen_codes = {}
+        for col in feature_columns:
+            if col not in label_encoders:
+                continue
+            classes = [str(c) for c in label_encoders[col].classes_]
+            category_maps[col] = {c: i for i, c in enumerate(classes)}
+            unseen_codes[col] = category_maps[col].get(str(fill_values.get(col)), 0)
+
+        return cls(feature_columns, category_maps, unseen_codes, fill_values)
+
+    def get_state(self) -> Dict[str, Any]:
+        """Plain-Python state, safe to serialize as JSON."""
+        return {
+            'feature_columns': self.feature_columns,
+            'category_maps': self.category_maps,
+            'unseen_codes': self.unseen_codes,
+            'fill_values': self.fill_values
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> 'FrozenFeatureTransformer':
+        return cls(state['feature_columns'], state['category_maps'],
+                   state['unseen_codes'], state['fill_values'])
+
+    def _fill_value(self, col: str) -> Any:
+        if col not in self.fill_values:
+            raise ValueError(f"No fill value stored for '{col}'. Please retrain the model.")
+        return self.fill_values[col]
+
+    def _encode_value(self, col: str, value: Any) -> float:
+        """Encode one raw value of a feature column."""
+        if value is None or value != value:
+            value = self._fill_value(col)
+
+        if col in self.category_maps:
+            return float(self.category_maps[col].get(str(value), self.unseen_codes[col]))
+
+        return float(value)
+
+    def filled_value(self, col: str, value: Any) -> float:
+        """A raw numeric value, or the column's training fill value when it is missing."""
+        if value is None or value != value:
+            value = self._fill_value(col)
+        return float(value)
+
+    def filled_column(self, columns: Mapping[str, Any], col: str, n_rows: int) -> np.ndarray:
+        """
+        A raw numeric column as floats, with missing entries (or the whole column,
+        when absent) set to the column's training fill value.
+        """
+        if col not in columns:
+            return np.full(n_rows, float(self._fill_value(col)))
+
+        values = np.asarray(columns[col])
+        if values.dtype.kind not in 'biuf':
+            values = values.astype(object)
+            values = np.where(_is_missing(values), np.nan, values)
+        numeric = values.astype(float)
+        missing = np.isnan(numeric)
+        if missing.any():
+            numeric[missing] = float(self._fill_value(col))
+        return numeric
+
+    def transform_one(self, farmer_data: Dict[str, Any]) -> np.ndarray:
+        """
+        Transform a single farmer dict into a feature vector of shape (n_features,).
+        """
+        vector = np.empty(self.n_features)
+        for i, col in enumerate(self.feature_columns):
+            vector[i] = self._encode_value(col, farmer_data.get(col))
+        return vector
+
+    def transform_batch(self, columns: Mapping[str, Any]) -> np.ndarray:
+        """
+        Transform a batch given as a column mapping (dict of lists, or a DataFrame)
+        into a feature matrix of shape (n_farmers, n_features).
+        """
+        try:
+            n_rows = len(columns[next(iter(columns))])
+        except StopIteration:
+            n_rows = 0
+
+        matrix = np.empty((n_rows, self.n_features))
+        for i, col in enumerate(self.feature_columns):
+            if col in columns:
+                values = np.asarray(columns[col])
+            else:
+                values = np.full(n_rows, None, dtype=object)
+
+            if values.dtype.kind in 'biuf' and col not in self.category_maps:
+                # Numeric/boolean fast path: no per-element Python work
+                numeric = values.astype(float)
+                missing = np.isnan(numeric)
+                if missing.any():
+                    numeric[missing] = float(self._fill_value(col))
+                matrix[:, i] = numeric
+                continue
+
+            values = values.astype(object)
+            missing = _is_missing(values)
+            if missing.any():
+                values = values.copy()
+                values[missing] = self._fill_value(col)
+
+            if col in self.category_maps:
+                # Look up each distinct category once, then broadcast the codes back
+                uniques, inverse = np.unique(values.astype(str), return_inverse=True)
+                lookup = self.category_maps[col]
+                codes = np.array([lookup.get(u, self.unseen_codes[col]) for u in uniques], dtype=float)
+                matrix[:, i] = codes[inverse]
+            else:
+                matrix[:, i] = values.astype(float)
+
+        return matrix
@@ -1,7 +1,7 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 import pandas as pd
 import numpy as np
 import joblib
@@ -10,7 +10,14 @@ from datetime import datetime
 import uvicorn
 
 # Import the fraud detection model
-from fraud_detection_model import FraudDetectionModel
+from fraud_detection_model import FraudDetectionModel, cached_fraud_dataset, RISK_LEVELS
+from reason_codes import fraud_risk_factors
+from executors import run_in_thread, run_in_process, run_batch, shutdown_executors, ModelPool
+from ndjson_stream import NDJSONStreamingResponse, stream_scored_chunks
+from columnar_format import (is_columnar_request, wants_columnar_response, decode_columns,
+                             columnar_response, parse_json_body)
+from prefork_server import request_reload
+import metrics
 
 app = FastAPI(
     title="Fraud Detection API",
@@ -18,6 +25,9 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Per-stage latency histograms for every route, served at /metrics
+app_metrics = metrics.instrument(app, 'fraud_detection')
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -30,6 +40,15 @@ app.add_middleware(
 # Initialize the fraud detection model
 fraud_model = FraudDetectionModel()
 
+# Workers for large batches, each holding a copy of the served model
+batch_pool = ModelPool(fraud_model)
+
+def install_model(detector: FraudDetectionModel):
+    """Swap the served model; requests already scoring keep the model they started with"""
+    global fraud_model
+    fraud_model = detector
+    batch_pool.set_model(detector)
+
 # Pydantic models for API requests/responses
 class ApplicationData(BaseModel):
     farmer_id: str
@@ -62,19 +81,31 @@ class ModelStatusResponse(BaseModel):
     last_trained: Optional[str] = None
     accuracy: Optional[float] = None
 
-@app.on_event("startup")
-async def startup_event():
-    """Initialize the model on startup"""
+def preload_model():
+    """Load the saved model; the pre-fork launcher calls this once before forking workers"""
     try:
         # Try to load existing model
         if os.path.exists('fraud_detection_model.pkl'):
-            fraud_model.load_model()
+            loaded = FraudDetectionModel()
+            loaded.load_model()
+            install_model(loaded)
+            app_metrics.observe_model_load('fraud_detection', loaded.load_seconds)
             print(" Fraud detection model loaded successfully")
         else:
             print(" No existing model found. Please train the model first.")
     except Exception as e:
         print(f" Error loading model: {e}")
 
+@app.on_event("startup")
+async def startup_event():
+    """Initialize the model on startup, unless it was preloaded before the workers forked"""
+    if fraud_model.model is None:
+        preload_model()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    shutdown_executors(wait=False)
+
 @app.get("/", response_model=Dict[str, str])
 async def root():
     """Root endpoint"""
@@ -83,9 +114,12 @@ async def root():
         "version": "1.0.0",
         "endpoints": {
             "train_model": "/train",
+            "update_model": "/train/update",
             "detect_fraud": "/detect",
+            "detect_fraud_stream": "/detect/stream",
             "model_status": "/status",
-            "health": "/health"
+            "health": "/health",
+            "metrics": "/metrics"
         }
     }
 
@@ -94,6 +128,11 @@ async def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "timestamp": datetime.now().isoformat()}
 
+@app.get("/metrics")
+async def get_metrics():
+    """Request and per-stage latency histograms, batch sizes and model-load time (Prometheus text format)"""
+    return metrics.metrics_response(app_metrics)
+
 @app.get("/status", response_model=ModelStatusResponse)
 async def get_model_status():
     """Get the current status of the fraud detection model"""
@@ -111,45 +150,79 @@ async def get_model_status():
         raise HTTPException(status_code=500, detail=f"Error checking model status: {str(e)}")
 
 @app.post("/train")
-async def train_model():
-    """Train the fraud detection model with synthetic data"""
+async def train_model(n_samples: int = 100, fraud_rate: float = 0.15, seed: int = 42,
+                      n_jobs: Optional[int] = None):
+    """Train the fraud detection model with synthetic data. n_jobs=-1 builds the trees on all cores."""
+    if n_samples < 1 or not 0 <= fraud_rate <= 1:
+        raise HTTPException(status_code=400, detail="n_samples must be positive and fraud_rate between 0 and 1")
     try:
-        print("Training fraud detection model...")
-        
-        # Generate synthetic data
-        data = fraud_model.generate_fraud_data(n_samples=100)
-        
-        # Train the model
-        results = fraud_model.train_model(data)
-        
-        # Generate visualizations
-        viz_results = fraud_model.generate_visualizations(
-            data, results['predictions'], results['scores']
-        )
-        
-        # Save the model
-        fraud_model.save_model()
-        
-        # Save the training data
-        data.to_csv('fraud_detection_data.csv', index=False)
+        # Training and plotting run in a worker process; the trained model replaces the served one
+        trained_model, summary = await run_in_process(train_fraud_model, n_samples, fraud_rate, seed, n_jobs)
+        install_model(trained_model)
+        # Under the pre-fork launcher, the other workers pick up the saved model too
+        request_reload()
         
         return {
             "success": True,
             "message": "Model trained successfully",
-            "total_applications": len(data),
-            "actual_fraud": results.get('actual_fraud', 0),
-            "detected_fraud": results['detected_fraud'],
-            "accuracy": results.get('accuracy', None),
-            "risk_distribution": viz_results,
+            **summary,
             "timestamp": datetime.now().isoformat()
         }
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error training model: {str(e)}")
 
+@app.post("/train/update")
+async def update_model(request: FraudDetectionRequest, n_new_trees: int = 20, max_trees: int = 100,
+                       n_jobs: Optional[int] = None):
+    """
+    Add n_new_trees trees fit on recent applications and retire the oldest trees beyond
+    max_trees, instead of retraining the whole forest.
+    """
+    if fraud_model.model is None:
+        raise HTTPException(
+            status_code=400,
+            detail="Model not trained. Please train the model first using /train endpoint"
+        )
+    
+    applications_data = [app.dict() for app in request.applications]
+    try:
+        # The served model is copied to the worker process and swapped in when the update is saved
+        updated_model, summary = await run_in_process(update_fraud_model, fraud_model, applications_data,
+                                                      n_new_trees, max_trees, n_jobs)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error updating model: {str(e)}")
+    
+    install_model(updated_model)
+    request_reload()
+    return {
+        "success": True,
+        "message": "Model updated successfully",
+        **summary,
+        "timestamp": datetime.now().isoformat()
+    }
+
 @app.post("/detect", response_model=FraudDetectionResponse)
-async def detect_fraud(request: FraudDetectionRequest):
-    """Detect fraud in grant applications"""
+async def detect_fraud(request: Request):
+    """
+    Detect fraud in grant applications.
+    The body is a JSON FraudDetectionRequest, or a columnar application/x-npz payload
+    (one array per ApplicationData field) that skips per-application validation.
+    Send Accept: application/x-npz to get the results back as columns.
+    """
+    with metrics.stage('parse'):
+        if is_columnar_request(request):
+            try:
+                columns, _ = decode_columns(await request.body(), ApplicationData)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            applications_data = pd.DataFrame(columns)
+        else:
+            detection_request = await parse_json_body(request, FraudDetectionRequest)
+            applications_data = None
+    
     try:
         if fraud_model.model is None:
             raise HTTPException(
@@ -157,92 +230,155 @@ async def detect_fraud(request: FraudDetectionRequest):
                 detail="Model not trained. Please train the model first using /train endpoint"
             )
         
-        # Convert request data to DataFrame
-        applications_data = []
-        for app in request.applications:
-            app_dict = app.dict()
-            applications_data.append(app_dict)
-        
-        data = pd.DataFrame(applications_data)
-        
-        # Make predictions
-        predictions = fraud_model.predict_fraud(data)
+        if applications_data is None:
+            # Convert request data to DataFrame
+            applications_data = []
+            for app in detection_request.applications:
+                app_dict = app.dict()
+                applications_data.append(app_dict)
         
-        # Prepare results
-        results = []
-        for i, (_, row) in enumerate(data.iterrows()):
-            result = {
-                "farmer_id": row['farmer_id'],
-                "farmer_name": row['farmer_name'],
-                "monthly_income": row['monthly_income'],
-                "land_size_bigha": row['land_size_bigha'],
-                "previous_grants": row['previous_grants'],
-                "is_fraudulent": bool(predictions['predictions'][i]),
-                "anomaly_score": float(predictions['scores'][i]),
-                "risk_level": predictions['risk_level'][i],
-                "risk_factors": _identify_risk_factors(row, predictions['scores'][i])
-            }
-            results.append(result)
+        columnar = wants_columnar_response(request)
         
-        # Calculate summary statistics
-        fraud_detected = sum(predictions['predictions'])
-        risk_levels = predictions['risk_level']
-        risk_distribution = {
-            "High Risk": risk_levels.count('High Risk'),
-            "Medium Risk": risk_levels.count('Medium Risk'),
-            "Low Risk": risk_levels.count('Low Risk')
-        }
+        # Small batches are scored on the inference threads, large ones on the process pool
+        detection = await run_batch(batch_pool, detect_applications, len(applications_data),
+                                    applications_data, columnar)
         
-        return FraudDetectionResponse(
-            success=True,
-            message=f"Fraud detection completed. Found {fraud_detected} suspicious applications.",
-            total_applications=len(data),
-            fraud_detected=fraud_detected,
-            risk_distribution=risk_distribution,
-            average_anomaly_score=float(np.mean(predictions['scores'])),
-            results=results,
-            timestamp=datetime.now().isoformat()
-        )
+        if columnar:
+            return columnar_response(detection['columns'], detection['meta'])
+        return FraudDetectionResponse(**detection, timestamp=datetime.now().isoformat())
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error detecting fraud: {str(e)}")
 
-def _identify_risk_factors(row: pd.Series, anomaly_score: float) -> List[str]:
-    """Identify specific risk factors for an application"""
-    risk_factors = []
+@app.post("/detect/stream")
+async def detect_fraud_stream(request: Request):
+    """
+    Score newline-delimited JSON applications (one object per line) and stream one
+    NDJSON result per application back, in input order, chunk by chunk.
+    """
+    if fraud_model.model is None:
+        raise HTTPException(
+            status_code=400,
+            detail="Model not trained. Please train the model first using /train endpoint"
+        )
+    
+    async def score_chunk(applications_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        detection = await run_in_thread(detect_applications, fraud_model, applications_data)
+        return detection['results']
+    
+    return NDJSONStreamingResponse(stream_scored_chunks(request, score_chunk, ApplicationData))
+
+def train_fraud_model(n_samples: int = 100, fraud_rate: float = 0.15, seed: int = 42,
+                      n_jobs: Optional[int] = None):
+    """Train, plot and save a fresh fraud model on synthetic data (runs in a worker process)."""
+    print("Training fraud detection model...")
+    detector = FraudDetectionModel()
+    
+    # Synthetic data, generated once per worker process for each set of arguments
+    data = cached_fraud_dataset(n_samples, fraud_rate, seed=seed)
+    
+    # Train the model
+    results = detector.train_model(data, n_jobs=n_jobs)
+    
+    # Generate visualizations
+    viz_results = detector.generate_visualizations(
+        data, results['predictions'], results['scores']
+    )
+    
+    # Save the model
+    detector.save_model()
+    
+    # Save the training data
+    data.to_csv('fraud_detection_data.csv', index=False)
+    
+    return detector, {
+        "total_applications": len(data),
+        "actual_fraud": results.get('actual_fraud', 0),
+        "detected_fraud": results['detected_fraud'],
+        "accuracy": results.get('accuracy', None),
+        "risk_distribution": viz_results
+    }
+
+def update_fraud_model(detector: FraudDetectionModel, applications_data: List[Dict[str, Any]],
+                       n_new_trees: int, max_trees: int, n_jobs: Optional[int] = None):
+    """Add trees fit on the given applications and save the model (runs in a worker process)."""
+    summary = detector.update_model(pd.DataFrame(applications_data), n_new_trees, max_trees, n_jobs)
+    detector.save_model()
+    return detector, summary
+
+def detect_applications(detector: FraudDetectionModel, applications_data: Any,
+                        columnar: bool = False) -> Dict[str, Any]:
+    """
+    Score applications (list of dicts or a DataFrame) and build the /detect payload.
+    With columnar=True the results are returned as arrays ({'columns', 'meta'}).
+    Module-level so it can run in a worker process.
+    """
+    data = applications_data if isinstance(applications_data, pd.DataFrame) else pd.DataFrame(applications_data)
+    metrics.observe_batch_size(len(data))
     
-    # Income-based risks
-    if row['monthly_income'] > 30000:
-        risk_factors.append("High income - may not need grant")
-    elif row['monthly_income'] < 8000:
-        risk_factors.append("Very low income - needs verification")
+    # Make predictions
+    predictions = detector.predict_fraud(data)
+    scores = np.asarray(predictions['scores'], dtype=float)
+    is_fraudulent = np.asarray(predictions['predictions'], dtype=bool)
+    risk_codes = predictions['risk_code']
     
-    # Land size risks
-    if row['land_size_bigha'] > 10:
-        risk_factors.append("Large land holding - may not need support")
-    elif row['land_size_bigha'] < 1:
-        risk_factors.append("Very small land - needs assessment")
+    # Summary statistics from the score columns
+    fraud_detected = int(is_fraudulent.sum())
+    risk_distribution = dict(zip(RISK_LEVELS, np.bincount(risk_codes, minlength=len(RISK_LEVELS)).tolist()))
+    summary = {
+        "message": f"Fraud detection completed. Found {fraud_detected} suspicious applications.",
+        "total_applications": len(data),
+        "fraud_detected": fraud_detected,
+        "risk_distribution": risk_distribution,
+        "average_anomaly_score": float(np.mean(scores))
+    }
     
-    # Previous grants risks
-    if row['previous_grants'] > 3:
-        risk_factors.append("Multiple previous grants - potential abuse")
-    elif row['previous_grants'] == 0:
-        risk_factors.append("No previous grants - first-time applicant")
+    if columnar:
+        columns = {col: data[col].to_numpy() for col in
+                   ['farmer_id', 'farmer_name', 'monthly_income', 'land_size_bigha', 'previous_grants']}
+        columns['is_fraudulent'] = is_fraudulent
+        columns['anomaly_score'] = scores
+        columns['risk_level'] = np.asarray(RISK_LEVELS)[risk_codes]
+        # Bit j of risk_mask is set when reason code meta['risk_codes'][j] (meta['risk_messages'][j]) applies
+        with metrics.stage('reasoning'):
+            columns['risk_mask'] = fraud_risk_factors.pack(
+                fraud_risk_factors.evaluate(_risk_inputs(data, scores), len(data))
+            )
+        meta = {**summary, "risk_codes": fraud_risk_factors.code_table(),
+                "risk_messages": fraud_risk_factors.message_table()}
+        return {"columns": columns, "meta": meta}
     
-    # Anomaly score based risks
-    if anomaly_score < -0.3:
-        risk_factors.append("High anomaly score - suspicious pattern")
-    elif anomaly_score < -0.1:
-        risk_factors.append("Medium anomaly score - needs review")
+    # Prepare results
+    with metrics.stage('reasoning'):
+        risk_factor_codes, risk_factors = _identify_risk_factors(data, scores)
+    with metrics.stage('serialization'):
+        # One pass over plain Python column lists, zipped into the result rows
+        keys = ["farmer_id", "farmer_name", "monthly_income", "land_size_bigha", "previous_grants",
+                "is_fraudulent", "anomaly_score", "risk_level", "risk_factors", "risk_factor_codes"]
+        values = [data[col].tolist() for col in keys[:5]]
+        values += [is_fraudulent.tolist(), scores.tolist(), predictions['risk_level'], risk_factors,
+                   risk_factor_codes]
+        results = [dict(zip(keys, row)) for row in zip(*values)]
     
-    return risk_factors
+    return {"success": True, **summary, "results": results}
+
+def _risk_inputs(data: pd.DataFrame, anomaly_scores: np.ndarray) -> Dict[str, np.ndarray]:
+    """Columns the fraud risk rules read"""
+    columns = {col: data[col].to_numpy() for col in ['monthly_income', 'land_size_bigha', 'previous_grants']
+               if col in data.columns}
+    columns['anomaly_score'] = np.asarray(anomaly_scores, dtype=float)
+    return columns
+
+def _identify_risk_factors(data: pd.DataFrame, anomaly_scores: np.ndarray) -> Tuple[List[List[int]], List[List[str]]]:
+    """Identify specific risk factors (reason codes and messages) for every application in one pass over the columns"""
+    return fraud_risk_factors.explain(_risk_inputs(data, anomaly_scores), len(data))
 
 @app.get("/sample-data")
 async def get_sample_data():
     """Get sample data for testing"""
     try:
-        # Generate sample data
-        data = fraud_model.generate_fraud_data(n_samples=10)
+        # Generated on the first request only
+        data = await run_in_thread(cached_fraud_dataset, n_samples=10)
         
         # Convert to list of dictionaries
         sample_applications = []
@@ -277,7 +413,10 @@ if __name__ == "__main__":
     print("   - GET  /health : Health check")
     print("   - GET  /status : Model status")
     print("   - POST /train : Train model")
+    print("   - POST /train/update : Add trees fit on recent applications")
     print("   - POST /detect : Detect fraud")
+    print("   - POST /detect/stream : Detect fraud (NDJSON in, NDJSON out)")
     print("   - GET  /sample-data : Get sample data")
+    print("   - GET  /metrics : Prometheus metrics")
     
     uvicorn.run(app, host="0.0.0.0", port=8002)
@@ -2,19 +2,177 @@ import pandas as pd
 import numpy as np
 from sklearn.ensemble import IsolationForest
 from sklearn.preprocessing import StandardScaler
-from sklearn.model_selection import train_test_split
 import joblib
 import matplotlib.pyplot as plt
-import seaborn as sns
-from datetime import datetime
+from functools import lru_cache
+import copy
+import os
+import time
 import warnings
 warnings.filterwarnings('ignore')
 
+import metrics
+from isolation_forest_scorer import FlatIsolationForestScorer
+
+FRAUD_CHUNK_ROWS = 100000
+# Batches up to this size are scored with the flattened forest; sklearn's compiled
+# per-tree traversal is as fast beyond it
+FLAT_SCORER_MAX_ROWS = 4096
+
+# Training fits the forest on at most this many rows (a uniform sample); each tree
+# only sees max_samples of them anyway
+TRAIN_MAX_ROWS = 200000
+FOREST_TREES = 100
+TREE_MAX_SAMPLES = 256
+CONTAMINATION = 0.15
+
+# Forest attributes holding one entry per tree (the private ones exist in some sklearn versions only)
+_PER_TREE_ATTRIBUTES = ['estimators_', 'estimators_features_', '_seeds',
+                        '_average_path_length_per_tree', '_decision_path_lengths']
+
+# Risk levels by risk code; scores below -0.3 are high risk, below -0.1 medium risk
+RISK_LEVELS = ['High Risk', 'Medium Risk', 'Low Risk']
+RISK_THRESHOLDS = [-0.3, -0.1]
+
+
+def risk_level_codes(scores):
+    """Index into RISK_LEVELS for each anomaly score"""
+    return np.digitize(scores, RISK_THRESHOLDS)
+
+# Fraud patterns: column -> (distribution, low, high) redrawn for the affected rows.
+# 'integers' excludes high, as np.random.randint does.
+FRAUD_PATTERNS = {
+    # Suspiciously low income but large land
+    'income_fraud': {'monthly_income': ('uniform', 5000, 8000), 'land_size_bigha': ('uniform', 8, 15)},
+    # Suspiciously large land but low income
+    'land_fraud': {'land_size_bigha': ('uniform', 10, 20), 'monthly_income': ('uniform', 8000, 12000)},
+    # Many previous grants but still applying
+    'grant_fraud': {'previous_grants': ('integers', 5, 10), 'monthly_income': ('uniform', 25000, 40000)},
+    # Multiple suspicious factors
+    'combination_fraud': {'monthly_income': ('uniform', 30000, 50000), 'land_size_bigha': ('uniform', 12, 25),
+                          'previous_grants': ('integers', 3, 8)},
+}
+FRAUD_CROPS = ['धान', 'मकै', 'गहुँ', 'सरसों', 'आलु']
+
+
+def _fraud_mix_probabilities(fraud_mix=None):
+    """Normalized per-type probabilities, in FRAUD_PATTERNS order (equal weights by default)."""
+    fraud_mix = dict(fraud_mix) if fraud_mix else {fraud_type: 1.0 for fraud_type in FRAUD_PATTERNS}
+    unknown = set(fraud_mix) - set(FRAUD_PATTERNS)
+    if unknown:
+        raise ValueError(f"Unknown fraud types {sorted(unknown)}; expected some of {list(FRAUD_PATTERNS)}")
+    weights = np.array([float(fraud_mix.get(fraud_type, 0.0)) for fraud_type in FRAUD_PATTERNS])
+    if (weights < 0).any() or weights.sum() <= 0:
+        raise ValueError("Fraud mix weights must be non-negative with a positive total")
+    return weights / weights.sum()
+
+
+def generate_fraud_chunk(start, n_samples, seed_sequence, fraud_rate=0.15, fraud_mix=None):
+    """
+    Applications start .. start+n_samples-1 with the columns and distributions of
+    FraudDetectionModel.generate_fraud_data. int(n_samples * fraud_rate) rows get a fraud
+    pattern, the type drawn with the fraud_mix weights; each type is applied to all its
+    rows at once. A 'fraud_type' column names the pattern ('none' for legitimate rows).
+    """
+    if not 0 <= fraud_rate <= 1:
+        raise ValueError(f"fraud_rate must be between 0 and 1, got {fraud_rate}")
+    probabilities = _fraud_mix_probabilities(fraud_mix)
+    rng = np.random.default_rng(seed_sequence)
+    n = n_samples
+    
+    numbers = np.arange(start, start + n)
+    ids = numbers.astype(str)
+    labels = (numbers + 1).astype(str)
+    columns = {
+        'monthly_income': rng.normal(15000, 5000, n),
+        'land_size_bigha': rng.normal(3.0, 1.5, n),
+        'previous_grants': rng.poisson(0.5, n),
+    }
+    
+    fraud_types = np.full(n, 'none', dtype=object)
+    fraud_indices = rng.choice(n, size=int(n * fraud_rate), replace=False)
+    fraud_type_codes = rng.choice(len(FRAUD_PATTERNS), size=len(fraud_indices), p=probabilities)
+    for code, (fraud_type, pattern) in enumerate(FRAUD_PATTERNS.items()):
+        rows = fraud_indices[fraud_type_codes == code]
+        fraud_types[rows] = fraud_type
+        for column, (distribution, low, high) in pattern.items():
+            draw = rng.uniform if distribution == 'uniform' else rng.integers
+            columns[column][rows] = draw(low, high, len(rows))
+    
+    return pd.DataFrame({
+        'farmer_id': np.char.add('FARMER_', np.char.zfill(ids, 3) if n else ids),
+        'farmer_name': np.char.add('Farmer ', labels),
+        # Ensure data is within reasonable bounds
+        'monthly_income': np.clip(columns['monthly_income'], 5000, 50000),
+        'land_size_bigha': np.clip(columns['land_size_bigha'], 0.5, 25),
+        'previous_grants': np.clip(columns['previous_grants'], 0, 10),
+        'phone': np.char.add('98', rng.integers(10000000, 99999999, n).astype(str)),
+        'email': np.char.add(np.char.add('farmer', labels), '@gmail.com'),
+        'municipality': np.full(n, 'भद्रपुर नगरपालिका'),
+        'ward': rng.integers(1, 11, n),
+        'crop_details': np.asarray(FRAUD_CROPS)[rng.integers(0, len(FRAUD_CROPS), n)],
+        'is_fraudulent': fraud_types != 'none',
+        'fraud_type': fraud_types.astype(str)
+    })
+
+
+def iter_fraud_data(n_samples, fraud_rate=0.15, fraud_mix=None, seed=42, chunk_rows=FRAUD_CHUNK_ROWS):
+    """
+    Yield the synthetic applications as DataFrames of at most chunk_rows rows. Each chunk
+    has its own child of SeedSequence(seed), so the data depends only on the arguments.
+    """
+    starts = range(0, n_samples, chunk_rows)
+    seeds = np.random.SeedSequence(seed).spawn(len(starts))
+    for start, chunk_seed in zip(starts, seeds):
+        yield generate_fraud_chunk(start, min(chunk_rows, n_samples - start), chunk_seed, fraud_rate, fraud_mix)
+
+
+def generate_fraud_dataset(n_samples=100, fraud_rate=0.15, fraud_mix=None, seed=42, chunk_rows=FRAUD_CHUNK_ROWS):
+    """All chunks of iter_fraud_data in one DataFrame."""
+    chunks = list(iter_fraud_data(n_samples, fraud_rate, fraud_mix, seed, chunk_rows))
+    if not chunks:
+        return generate_fraud_chunk(0, 0, np.random.SeedSequence(seed), fraud_rate, fraud_mix)
+    return pd.concat(chunks, ignore_index=True)
+
+
+@lru_cache(maxsize=8)
+def _cached_fraud_dataset(n_samples, fraud_rate, fraud_mix_items, seed):
+    return generate_fraud_dataset(n_samples, fraud_rate, dict(fraud_mix_items) or None, seed)
+
+
+def cached_fraud_dataset(n_samples=100, fraud_rate=0.15, fraud_mix=None, seed=42):
+    """generate_fraud_dataset, memoized per process. The frame is shared: do not modify it."""
+    return _cached_fraud_dataset(n_samples, fraud_rate, tuple(sorted((fraud_mix or {}).items())), seed)
+
+
+def write_fraud_dataset(n_samples, csv_path, fraud_rate=0.15, fraud_mix=None, seed=42,
+                        chunk_rows=FRAUD_CHUNK_ROWS):
+    """Stream the synthetic applications to csv_path chunk by chunk; returns the fraud count."""
+    tmp_path = f'{csv_path}.tmp{os.getpid()}'
+    fraud_count = 0
+    with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+        for i, chunk in enumerate(iter_fraud_data(n_samples, fraud_rate, fraud_mix, seed, chunk_rows)):
+            f.write(chunk.to_csv(header=i == 0, index=False))
+            fraud_count += int(chunk['is_fraudulent'].sum())
+    os.replace(tmp_path, csv_path)
+    return fraud_count
+
+
 class FraudDetectionModel:
     def __init__(self):
         self.model = None
         self.scaler = StandardScaler()
         self.feature_names = ['monthly_income', 'land_size_bigha', 'previous_grants']
+        # Training-set medians used to fill missing feature values at inference
+        self.fill_values = None
+        # Flattened copy of the forest used for scoring
+        self.scorer = None
+        # Update round that added each tree (0 = initial training); the oldest trees retire first
+        self.generation = 0
+        self.tree_generations = np.zeros(0, dtype=int)
+        self.scorer_path = 'fraud_detection_scorer.npz'
+        # Seconds the last load_model took (None for a model trained in memory)
+        self.load_seconds = None
         
     def generate_fraud_data(self, n_samples=100):
         """Generate synthetic data with some fraudulent patterns"""
@@ -73,41 +231,109 @@ class FraudDetectionModel:
         
 
     
-    def prepare_features(self, data):
-        """Prepare features for the model"""
-        features = data[self.feature_names].copy()
-        
-        # Handle missing values
-        features = features.fillna(features.median())
+    def _feature_matrix(self, data):
+        """Float feature matrix from a DataFrame, a list of application dicts or one application dict"""
+        if isinstance(data, pd.DataFrame):
+            return data[self.feature_names].to_numpy(dtype=float)
+        if isinstance(data, dict):
+            data = [data]
+        return np.array([[row.get(name) for name in self.feature_names] for row in data], dtype=float)
+    
+    def prepare_features(self, data, fit=False):
+        """
+        Prepare features for the model. With fit=True (training) the missing-value fill
+        values and the scaler are learned from data; otherwise the saved ones are only
+        applied, so a row's features do not depend on the rest of the batch.
+        """
+        with metrics.stage('preprocessing'):
+            features = self._feature_matrix(data)
+            
+            # Handle missing values
+            if fit:
+                self.fill_values = np.nanmedian(features, axis=0)
+            missing = np.isnan(features)
+            if missing.any():
+                features = np.where(missing, self.fill_values, features)
         
         # Scale features
-        features_scaled = self.scaler.fit_transform(features)
+        with metrics.stage('scaling'):
+            if fit:
+                self.scaler.fit(features)
+            # StandardScaler.transform without the input validation overhead
+            features_scaled = (features - self.scaler.mean_) / self.scaler.scale_
         
         return features_scaled, features
     
-    def train_model(self, data):
-        """Train the Isolation Forest model"""
+    def build_scorer(self, X_check=None, tolerance=1e-9):
+        """
+        Flatten the trained forest into a FlatIsolationForestScorer and check it reproduces
+        sklearn's decision_function before it is used for serving.
+        """
+        scorer = FlatIsolationForestScorer.from_fitted(self.model)
+        
+        if X_check is None:
+            # Probe points spread around the (scaled) training distribution
+            rng = np.random.default_rng(0)
+            X_check = rng.normal(0.0, 2.0, (256, len(self.feature_names)))
+        
+        max_error = float(np.max(np.abs(scorer.decision_function(X_check) - self.model.decision_function(X_check))))
+        if max_error > tolerance:
+            raise ValueError(f"Flattened forest deviates from sklearn by {max_error:.2e}")
+        
+        self.scorer = scorer
+        return scorer
+    
+    def export_scorer(self, path=None):
+        """Export the flattened forest as a standalone .npz artifact."""
+        if self.model is None:
+            raise ValueError("No model to export. Please train the model first.")
+        
+        scorer = self.build_scorer()
+        scorer.save(path or self.scorer_path)
+        print(f" Scorer exported to {path or self.scorer_path}")
+        return scorer
+    
+    @staticmethod
+    def _training_sample(X, max_rows, seed=42):
+        """At most max_rows rows of X, sampled uniformly without replacement"""
+        if max_rows is None or len(X) <= max_rows:
+            return X
+        rows = np.random.default_rng(seed).choice(len(X), size=max_rows, replace=False)
+        return X[np.sort(rows)]
+    
+    def train_model(self, data, n_jobs=None, max_rows=TRAIN_MAX_ROWS):
+        """
+        Train the Isolation Forest model. n_jobs builds the trees in parallel (-1 = all cores);
+        datasets larger than max_rows are fit on a uniform sample of max_rows rows.
+        """
         print(" Training Fraud Detection Model...")
         
         # Prepare features
-        X_scaled, X_original = self.prepare_features(data)
+        X_scaled, X_original = self.prepare_features(data, fit=True)
+        X_fit = self._training_sample(X_scaled, max_rows)
         
         # Train Isolation Forest
         self.model = IsolationForest(
-            contamination=0.15,  # Expected proportion of anomalies
+            contamination=CONTAMINATION,  # Expected proportion of anomalies
             random_state=42,
-            n_estimators=100,
-            max_samples='auto'
+            n_estimators=FOREST_TREES,
+            # 'auto' would resolve to the same size; an explicit one stays fixed across updates
+            max_samples=min(TREE_MAX_SAMPLES, len(X_fit)),
+            n_jobs=n_jobs
         )
         
-        self.model.fit(X_scaled)
+        self.model.fit(X_fit)
+        # Scoring runs one request per thread; keep the saved model single-threaded
+        self.model.set_params(n_jobs=None)
+        self.generation = 0
+        self.tree_generations = np.zeros(len(self.model.estimators_), dtype=int)
+        self.build_scorer(X_scaled[:2048])
         
         # Make predictions
-        predictions = self.model.predict(X_scaled)
         scores = self.model.decision_function(X_scaled)
         
-        # Convert predictions: -1 (anomaly) -> True (fraud), 1 (normal) -> False (fraud)
-        fraud_predictions = (predictions == -1)
+        # Negative scores are anomalies (IsolationForest.predict == -1), i.e. fraud
+        fraud_predictions = scores < 0
         
         # Calculate accuracy against actual labels (if available)
         if 'is_fraudulent' in data.columns:
@@ -133,8 +359,72 @@ class FraudDetectionModel:
         
         return result
     
+    def update_model(self, data, n_new_trees=20, max_trees=FOREST_TREES, n_jobs=None, max_rows=TRAIN_MAX_ROWS):
+        """
+        Add n_new_trees trees fit on new applications (warm start) and retire the oldest
+        trees beyond max_trees, so the forest follows recent data without a full retrain.
+        The scaler and fill values stay frozen: the existing trees split on scaled features.
+        The contamination threshold (offset_) is recomputed on the new data for the final forest.
+        The updated forest replaces the current one only once it is complete.
+        """
+        if self.model is None:
+            raise ValueError("Model not trained. Please train the model first.")
+        if n_new_trees < 1 or max_trees < 1:
+            raise ValueError("n_new_trees and max_trees must be positive")
+        
+        X_scaled, _ = self.prepare_features(data)
+        X_fit = self._training_sample(X_scaled, max_rows, seed=42 + self.generation + 1)
+        # Every tree must share the subsample size the score is normalized by
+        max_samples = self.model.max_samples_
+        if len(X_fit) < max_samples:
+            raise ValueError(f"Need at least {max_samples} applications to add trees, got {len(X_fit)}")
+        
+        generation = self.generation + 1
+        model = copy.deepcopy(self.model)
+        n_trees = len(model.estimators_)
+        model.set_params(warm_start=True, n_estimators=n_trees + n_new_trees, max_samples=max_samples,
+                         n_jobs=n_jobs, random_state=42 + generation)
+        model.fit(X_fit)
+        # A warm start records the seeds of the new trees only; keep one seed per tree
+        if hasattr(self.model, '_seeds'):
+            model._seeds = np.concatenate([self.model._seeds, model._seeds])
+        
+        # Retire the oldest trees
+        tree_generations = np.concatenate([self.tree_generations, np.full(n_new_trees, generation)])
+        retired = max(0, len(model.estimators_) - max_trees)
+        if retired:
+            for attribute in _PER_TREE_ATTRIBUTES:
+                if hasattr(model, attribute):
+                    setattr(model, attribute, getattr(model, attribute)[retired:])
+            tree_generations = tree_generations[retired:]
+        model.set_params(warm_start=False, n_estimators=len(model.estimators_), n_jobs=None)
+        if model.contamination != 'auto':
+            model.offset_ = float(np.percentile(model.score_samples(X_fit), 100.0 * model.contamination))
+        
+        previous = self.model, self.scorer
+        self.model = model
+        try:
+            self.build_scorer(X_fit[:2048])
+        except ValueError:
+            self.model, self.scorer = previous
+            raise
+        self.generation = generation
+        self.tree_generations = tree_generations
+        
+        detected_fraud = int(np.sum(self.predict_fraud(data)['predictions']))
+        print(f" Added {n_new_trees} trees, retired {retired} (generation {generation}, {len(tree_generations)} trees)")
+        return {
+            'generation': generation,
+            'trees_added': n_new_trees,
+            'trees_retired': retired,
+            'total_trees': len(tree_generations),
+            'oldest_generation': int(tree_generations.min()),
+            'detected_fraud': detected_fraud,
+            'update_applications': len(X_scaled)
+        }
+    
     def predict_fraud(self, data):
-        """Predict fraud for new data"""
+        """Predict fraud for new data (a DataFrame, a list of application dicts or one application dict)"""
         if self.model is None:
             raise ValueError("Model not trained. Please train the model first.")
         
@@ -142,46 +432,57 @@ class FraudDetectionModel:
         X_scaled, X_original = self.prepare_features(data)
         
         # Make predictions
-        predictions = self.model.predict(X_scaled)
-        scores = self.model.decision_function(X_scaled)
+        with metrics.stage('inference'):
+            use_flat = self.scorer is not None and len(X_scaled) <= FLAT_SCORER_MAX_ROWS
+            scores = (self.scorer if use_flat else self.model).decision_function(X_scaled)
+        
+        # IsolationForest.predict flags exactly the negative decision scores
+        fraud_predictions = scores < 0
         
-        # Convert predictions
-        fraud_predictions = (predictions == -1)
+        risk_codes = risk_level_codes(scores)
         
         return {
             'predictions': fraud_predictions,
             'scores': scores,
-            'risk_level': self._calculate_risk_level(scores)
+            'risk_code': risk_codes,
+            'risk_level': [RISK_LEVELS[code] for code in risk_codes.tolist()]
         }
     
     def _calculate_risk_level(self, scores):
         """Calculate risk level based on anomaly scores"""
-        risk_levels = []
-        for score in scores:
-            if score < -0.3:
-                risk_levels.append('High Risk')
-            elif score < -0.1:
-                risk_levels.append('Medium Risk')
-            else:
-                risk_levels.append('Low Risk')
-        return risk_levels
+        return [RISK_LEVELS[code] for code in risk_level_codes(scores).tolist()]
     
     def save_model(self, filepath='fraud_detection_model.pkl'):
         """Save the trained model"""
         model_data = {
             'model': self.model,
             'scaler': self.scaler,
-            'feature_names': self.feature_names
+            'fill_values': self.fill_values,
+            'feature_names': self.feature_names,
+            'generation': self.generation,
+            'tree_generations': self.tree_generations
         }
         joblib.dump(model_data, filepath)
+        self.export_scorer()
         print(f" Model saved to {filepath}")
     
     def load_model(self, filepath='fraud_detection_model.pkl'):
         """Load a trained model"""
+        started = time.perf_counter()
         model_data = joblib.load(filepath)
         self.model = model_data['model']
         self.scaler = model_data['scaler']
         self.feature_names = model_data['feature_names']
+        # Models saved before the fill values were stored fall back to the training means
+        self.fill_values = model_data.get('fill_values')
+        if self.fill_values is None:
+            self.fill_values = self.scaler.mean_.copy()
+        self.generation = model_data.get('generation', 0)
+        self.tree_generations = model_data.get('tree_generations')
+        if self.tree_generations is None:
+            self.tree_generations = np.zeros(len(self.model.estimators_), dtype=int)
+        self.build_scorer()
+        self.load_seconds = time.perf_counter() - started
         print(f" Model loaded from {filepath}")
     
     def generate_visualizations(self, data, predictions, scores):
@@ -235,11 +536,30 @@ class FraudDetectionModel:
         print(" Visualizations saved as 'fraud_detection_analysis.png'")
         
         return {
-            'risk_distribution': risk_counts.to_dict(),
-            'avg_anomaly_score': np.mean(scores),
-            'high_risk_count': np.sum(np.array(risk_levels) == 'High Risk'),
-            'medium_risk_count': np.sum(np.array(risk_levels) == 'Medium Risk'),
-            'low_risk_count': np.sum(np.array(risk_levels) == 'Low Risk')
+            'risk_distribution': {level: int(count) for level, count in risk_counts.items()},
+            'avg_anomaly_score': float(np.mean(scores)),
+            'high_risk_count': int(np.sum(np.array(risk_levels) == 'High Risk')),
+            'medium_risk_count': int(np.sum(np.array(risk_levels) == 'Medium Risk')),
+            'low_risk_count': int(np.sum(np.array(risk_levels) == 'Low Risk'))
         }
 
 
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Write a synthetic fraud benchmark dataset")
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--fraud-rate', type=float, default=0.15)
+    parser.add_argument('--mix', nargs='*', default=[], metavar='TYPE=WEIGHT',
+                        help=f"Fraud type weights, e.g. income_fraud=2 grant_fraud=1 (types: {', '.join(FRAUD_PATTERNS)})")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--chunk-rows', type=int, default=FRAUD_CHUNK_ROWS)
+    parser.add_argument('--csv', default='fraud_benchmark_data.csv')
+    args = parser.parse_args()
+    
+    fraud_mix = {fraud_type: float(weight) for fraud_type, weight in (item.split('=', 1) for item in args.mix)}
+    started = time.perf_counter()
+    fraud_count = write_fraud_dataset(args.rows, args.csv, args.fraud_rate, fraud_mix or None,
+                                      args.seed, args.chunk_rows)
+    print(f"Wrote {args.rows} applications ({fraud_count} fraudulent) to {args.csv} "
+          f"in {time.perf_counter() - started:.2f}s")
@@ -61,6 +61,14 @@ class AIServiceClient:
         except requests.RequestException as e:
             return {"error": str(e)}
     
+    def get_training_job(self, job_id: str) -> Dict[str, Any]:
+        """Get status and progress of a training job started by train_model."""
+        try:
+            response = requests.get(f"{self.base_url}/model/train/jobs/{job_id}")
+            return response.json()
+        except requests.RequestException as e:
+            return {"error": str(e)}
+    
     def get_data_stats(self) -> Dict[str, Any]:
         """Get dataset statistics."""
         try:
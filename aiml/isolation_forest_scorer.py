@@ -0,0 +1,177 @@
+import numpy as np
+from typing import Any
+
+# Rows scored per traversal block; the (rows x trees) node index arrays stay small
+SCORE_BLOCK_ROWS = 1024
+
+
+def average_path_length(n_samples: np.ndarray) -> np.ndarray:
+    """
+    Average path length of an unsuccessful BST search over n samples: c(n) in the
+    Isolation Forest paper (0 for n <= 1, 1 for n == 2), as sklearn computes it.
+    """
+    n = np.asarray(n_samples, dtype=np.float64)
+    safe = np.maximum(n, 3.0)
+    c = 2.0 * (np.log(safe - 1.0) + np.euler_gamma) - 2.0 * (safe - 1.0) / safe
+    return np.select([n <= 1, n == 2], [0.0, 1.0], default=c)
+
+
+class FlatIsolationForestScorer:
+    """
+    A fitted IsolationForest flattened into contiguous node arrays (feature, threshold,
+    left/right child, leaf path length) shared by all trees. Scoring walks every tree
+    for a whole batch at once: one gather and compare per level, max_depth levels in
+    total, with none of sklearn's per-call validation and per-tree dispatch.
+
+    Leaves are self-loops with an infinite threshold, so rows that reach a leaf early
+    stay there while the other rows keep descending.
+    """
+
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray, left: np.ndarray, right: np.ndarray,
+                 leaf_value: np.ndarray, roots: np.ndarray, max_depth: int, normalizer: float,
+                 offset: float, n_features: int):
+        self.feature = np.ascontiguousarray(feature, dtype=np.intp)
+        self.threshold = np.ascontiguousarray(threshold, dtype=np.float64)
+        self.left = np.ascontiguousarray(left, dtype=np.intp)
+        self.right = np.ascontiguousarray(right, dtype=np.intp)
+        self.children = np.stack([self.left, self.right], axis=1).ravel()
+        # Depth of the leaf plus c(samples in the leaf); 0 for internal nodes
+        self.leaf_value = np.ascontiguousarray(leaf_value, dtype=np.float64)
+        self.roots = np.ascontiguousarray(roots, dtype=np.intp)
+        self.max_depth = int(max_depth)
+        # n_trees * c(max_samples): the mean path length that gives an anomaly score of 0.5
+        self.normalizer = float(normalizer)
+        self.offset = float(offset)
+        self.n_features = int(n_features)
+
+    @classmethod
+    def from_fitted(cls, forest: Any) -> 'FlatIsolationForestScorer':
+        """Flatten a fitted sklearn IsolationForest."""
+        # sklearn only re-indexes columns per tree when the trees saw a feature subset
+        subsample_features = forest._max_features != forest.n_features_in_
+        features, thresholds, lefts, rights, leaf_values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for estimator, estimator_features in zip(forest.estimators_, forest.estimators_features_):
+            tree = estimator.tree_
+            n_nodes = tree.node_count
+            is_leaf = tree.children_left < 0
+
+            # Parents come before their children, so one forward pass gives every depth
+            depth = np.zeros(n_nodes, dtype=np.intp)
+            for node in np.flatnonzero(~is_leaf):
+                depth[tree.children_left[node]] = depth[tree.children_right[node]] = depth[node] + 1
+
+            nodes = np.arange(offset, offset + n_nodes)
+            tree_features = np.where(is_leaf, 0, tree.feature)
+            if subsample_features:
+                tree_features = np.asarray(estimator_features)[tree_features]
+            features.append(tree_features)
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+            lefts.append(np.where(is_leaf, nodes, tree.children_left + offset))
+            rights.append(np.where(is_leaf, nodes, tree.children_right + offset))
+            leaf_values.append(np.where(is_leaf, depth + average_path_length(tree.n_node_samples), 0.0))
+            roots.append(offset)
+            max_depth = max(max_depth, int(depth.max()))
+            offset += n_nodes
+
+        return cls(
+            np.concatenate(features), np.concatenate(thresholds), np.concatenate(lefts),
+            np.concatenate(rights), np.concatenate(leaf_values), np.array(roots), max_depth,
+            len(forest.estimators_) * float(average_path_length(forest.max_samples_)),
+            forest.offset_, forest.n_features_in_
+        )
+
+    def path_lengths(self, X: np.ndarray) -> np.ndarray:
+        """Summed isolation path length over all trees for each row."""
+        # The trees compare float32 features against float64 thresholds
+        X = np.ascontiguousarray(X, dtype=np.float32).reshape(-1, self.n_features)
+        total = np.empty(len(X), dtype=np.float64)
+        for start in range(0, len(X), SCORE_BLOCK_ROWS):
+            block = X[start:start + SCORE_BLOCK_ROWS]
+            values = block.ravel()
+            row_offsets = (np.arange(len(block)) * self.n_features)[:, None]
+            node = np.broadcast_to(self.roots, (len(block), len(self.roots)))
+            for _ in range(self.max_depth):
+                # children[2 * node] is the left child, children[2 * node + 1] the right one
+                go_right = values[row_offsets + self.feature[node]] > self.threshold[node]
+                node = self.children[2 * node + go_right]
+            total[start:start + len(block)] = self.leaf_value[node].sum(axis=1)
+        return total
+
+    def score_samples(self, X: np.ndarray) -> np.ndarray:
+        """IsolationForest.score_samples: the negated anomaly score, -2^(-mean path / c(max_samples))."""
+        if self.normalizer == 0:
+            # A forest fit on a single sample: sklearn scores every point 0.5
+            return np.full(len(np.asarray(X).reshape(-1, self.n_features)), -0.5)
+        return -np.exp2(-self.path_lengths(X) / self.normalizer)
+
+    def decision_function(self, X: np.ndarray) -> np.ndarray:
+        """IsolationForest.decision_function: negative for outliers."""
+        return self.score_samples(X) - self.offset
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """IsolationForest.predict: -1 for outliers, 1 for inliers."""
+        return np.where(self.decision_function(X) < 0, -1, 1)
+
+    def save(self, path: str):
+        """Save as a .npz file (no pickled objects)."""
+        np.savez(
+            path,
+            feature=self.feature,
+            threshold=self.threshold,
+            left=self.left,
+            right=self.right,
+            leaf_value=self.leaf_value,
+            roots=self.roots,
+            max_depth=np.array(self.max_depth),
+            normalizer=np.array(self.normalizer),
+            offset=np.array(self.offset),
+            n_features=np.array(self.n_features)
+        )
+
+    @classmethod
+    def load(cls, path: str) -> 'FlatIsolationForestScorer':
+        with np.load(path, allow_pickle=False) as data:
+            return cls(data['feature'], data['threshold'], data['left'], data['right'], data['leaf_value'],
+                       data['roots'], int(data['max_depth']), float(data['normalizer']),
+                       float(data['offset']), int(data['n_features']))
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    from fraud_detection_model import FraudDetectionModel
+
+    parser = argparse.ArgumentParser(
+        description="Flatten the saved fraud model's IsolationForest, check it against sklearn and time it")
+    parser.add_argument('--model', default='fraud_detection_model.pkl')
+    parser.add_argument('--output', default='fraud_detection_scorer.npz')
+    parser.add_argument('--repeat', type=int, default=200, help="Single-application calls to time")
+    args = parser.parse_args()
+
+    detector = FraudDetectionModel()
+    detector.load_model(args.model)
+    # build_scorer checks the flattened scores against sklearn's decision_function
+    scorer = detector.build_scorer()
+    scorer.save(args.output)
+    print(f"Flattened {len(scorer.roots)} trees ({len(scorer.feature)} nodes, depth {scorer.max_depth}) "
+          f"to {args.output}")
+
+    rng = np.random.default_rng(0)
+    X = detector.scaler.mean_ + detector.scaler.scale_ * rng.normal(0.0, 2.0, (10000, scorer.n_features))
+    X_scaled, _ = detector.prepare_features(dict(zip(detector.feature_names, X[0])))
+
+    def per_call_ms(func, *func_args, repeat=args.repeat):
+        func(*func_args)
+        started = time.perf_counter()
+        for _ in range(repeat):
+            func(*func_args)
+        return (time.perf_counter() - started) / repeat * 1000
+
+    print(f"Single application: sklearn {per_call_ms(detector.model.decision_function, X_scaled):.3f} ms, "
+          f"flattened {per_call_ms(scorer.decision_function, X_scaled):.3f} ms")
+    X_batch = (X - detector.scaler.mean_) / detector.scaler.scale_
+    print(f"Batch of {len(X_batch)}: sklearn {per_call_ms(detector.model.decision_function, X_batch, repeat=5):.1f} ms, "
+          f"flattened {per_call_ms(scorer.decision_function, X_batch, repeat=5):.1f} ms")
@@ -0,0 +1,97 @@
+import json
+import math
+import numpy as np
+from typing import Dict, List, Any, Optional
+
+from feature_pipeline import FrozenFeatureTransformer
+
+
+class FoldedLogisticScorer:
+    """
+    Closed-form logistic scorer with the StandardScaler folded into the weights.
+    sigmoid(((x - mean) / scale) . coef + b) == sigmoid(x . (coef / scale) + b'),
+    so serving needs only a dot product and never imports sklearn.
+    The scaler mean is kept as `center` so per-feature contributions stay exact.
+    """
+
+    def __init__(self, coef: np.ndarray, intercept: float, feature_columns: List[str],
+                 transformer: Optional[FrozenFeatureTransformer] = None,
+                 center: Optional[np.ndarray] = None):
+        self.coef = np.ascontiguousarray(coef, dtype=np.float64)
+        self.intercept = float(intercept)
+        self.feature_columns = list(feature_columns)
+        self.transformer = transformer
+        self.center = (np.zeros_like(self.coef) if center is None
+                       else np.ascontiguousarray(center, dtype=np.float64))
+
+    @classmethod
+    def from_fitted(cls, model: Any, scaler: Any, feature_columns: List[str],
+                    transformer: Optional[FrozenFeatureTransformer] = None) -> 'FoldedLogisticScorer':
+        """
+        Fold a fitted StandardScaler into a fitted binary linear classifier
+        (LogisticRegression, or SGDClassifier with log loss).
+        """
+        coef = np.asarray(model.coef_, dtype=np.float64).ravel()
+        intercept = float(np.asarray(model.intercept_).ravel()[0])
+
+        scale = getattr(scaler, 'scale_', None)
+        mean = getattr(scaler, 'mean_', None)
+        if scale is not None:
+            coef = coef / scale
+        if mean is not None:
+            intercept -= float(np.dot(coef, mean))
+
+        return cls(coef, intercept, feature_columns, transformer, center=mean)
+
+    def decision_function(self, X: np.ndarray) -> np.ndarray:
+        return np.asarray(X, dtype=np.float64) @ self.coef + self.intercept
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """Approval probability for each row of a raw (unscaled) feature matrix."""
+        z = self.decision_function(X)
+        # exp of a non-positive argument only, so neither branch can overflow
+        e = np.exp(-np.abs(z))
+        return np.where(z >= 0, 1.0 / (1.0 + e), e / (1.0 + e))
+
+    def contributions(self, X: np.ndarray) -> np.ndarray:
+        """
+        Per-feature logistic contributions, coef * (x - mean) / scale, for each row.
+        Each row sums to the decision function minus the score of an average farmer.
+        """
+        return (np.asarray(X, dtype=np.float64) - self.center) * self.coef
+
+    def predict_proba_one(self, x: np.ndarray) -> float:
+        """Approval probability for a single raw feature vector."""
+        z = float(np.dot(x, self.coef)) + self.intercept
+        if z >= 0:
+            return 1.0 / (1.0 + math.exp(-z))
+        e = math.exp(z)
+        return e / (1.0 + e)
+
+    def score_farmer(self, farmer_data: Dict[str, Any]) -> float:
+        """Approval probability straight from a farmer dict (needs the bundled transformer)."""
+        if self.transformer is None:
+            raise ValueError("Scorer has no feature transformer attached.")
+        return self.predict_proba_one(self.transformer.transform_one(farmer_data))
+
+    def save(self, path: str):
+        """Save as a small .npz file (no pickled objects)."""
+        transformer_state = self.transformer.get_state() if self.transformer is not None else None
+        np.savez(
+            path,
+            coef=self.coef,
+            intercept=np.array(self.intercept),
+            feature_columns=np.array(self.feature_columns, dtype=str),
+            center=self.center,
+            transformer=np.array(json.dumps(transformer_state, ensure_ascii=False))
+        )
+
+    @classmethod
+    def load(cls, path: str) -> 'FoldedLogisticScorer':
+        with np.load(path, allow_pickle=False) as data:
+            transformer_state = json.loads(str(data['transformer']))
+            transformer = None
+            if transformer_state is not None:
+                transformer = FrozenFeatureTransformer.from_state(transformer_state)
+            return cls(data['coef'], float(data['intercept']),
+                       [str(c) for c in data['feature_columns']], transformer, data['center'])
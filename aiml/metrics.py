@@ -0,0 +1,314 @@
+"""
+Request and stage latency metrics in the Prometheus text format.
+
+Each HTTP request gets a RequestTimer (held in a context variable) that sums the
+time spent in each named stage of that request:
+
+    parse           request body parsing and validation
+    preprocessing   feature encoding and missing-value filling
+    scaling         feature scaling (the prioritization scorer folds it into its weights)
+    inference       model scoring
+    reasoning       recommendations, reason codes and risk factors
+    serialization   response encoding
+
+When the request finishes its stage totals, batch sizes and overall latency are
+added to the app's MetricsRegistry, which its /metrics route serves (each app
+instrumented in a process has its own registry). Work run on the inference threads
+sees the request's timer; work run on the process pool is timed in the worker
+and merged back (see executors.run_in_process). Code outside a request records
+nothing, so training and the CLI tools are unaffected.
+
+Metrics live in process memory, so each server process reports its own.
+"""
+
+import bisect
+import contextvars
+import functools
+import inspect
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import List, Any, Callable, Optional, Tuple
+
+from fastapi.responses import Response
+from fastapi.routing import APIRoute
+
+METRICS_MEDIA_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+BATCH_SIZE_BUCKETS = tuple(float(2 ** i) for i in range(17))
+
+
+def _label_string(labelnames: Tuple[str, ...], labelvalues: Tuple[Any, ...], extra: str = '') -> str:
+    def escape(value: Any) -> str:
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    pairs = [f'{name}="{escape(value)}"' for name, value in zip(labelnames, labelvalues)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def _header(self) -> List[str]:
+        return [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, *labelvalues: Any, amount: float = 1.0):
+        with self._lock:
+            self._series[labelvalues] = self._series.get(labelvalues, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = sorted(self._series.items())
+        return self._header() + [f'{self.name}{_label_string(self.labelnames, labels)} {_format_value(value)}'
+                                 for labels, value in series]
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def set(self, *labelvalues: Any, value: float):
+        with self._lock:
+            self._series[labelvalues] = value
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labelvalues: Any):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                # Per-bucket (non-cumulative) counts, then sum and count
+                series = self._series[labelvalues] = [[0] * len(self.buckets), 0.0, 0]
+            if index < len(self.buckets):
+                series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = sorted((labels, [list(counts), total, count])
+                            for labels, (counts, total, count) in self._series.items())
+        lines = self._header()
+        for labels, (counts, total, count) in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = _label_string(self.labelnames, labels, f'le="{_format_value(bound)}"')
+                lines.append(f'{self.name}_bucket{le} {cumulative}')
+            inf = _label_string(self.labelnames, labels, 'le="+Inf"')
+            lines.append(f'{self.name}_bucket{inf} {count}')
+            lines.append(f'{self.name}_sum{_label_string(self.labelnames, labels)} {_format_value(total)}')
+            lines.append(f'{self.name}_count{_label_string(self.labelnames, labels)} {count}')
+        return lines
+
+
+class MetricsRegistry:
+    """The metrics one app records and serves at /metrics."""
+
+    def __init__(self):
+        self.request_latency = Histogram('ai_request_duration_seconds', 'End-to-end HTTP request latency.',
+                                         ('service', 'endpoint', 'method', 'status'))
+        self.stage_latency = Histogram('ai_stage_duration_seconds',
+                                       'Time spent in each request stage, summed per request.',
+                                       ('service', 'endpoint', 'stage'))
+        self.batch_size = Histogram('ai_batch_size_rows',
+                                    'Rows per scored batch (micro-batches, batch requests, stream chunks).',
+                                    ('service', 'endpoint'), buckets=BATCH_SIZE_BUCKETS)
+        self.model_load_seconds = Gauge('ai_model_load_seconds', 'Duration of the most recent model load.',
+                                        ('model',))
+        self.model_loads = Counter('ai_model_loads_total', 'Model loads.', ('model',))
+        self.metrics = [self.request_latency, self.stage_latency, self.batch_size,
+                        self.model_load_seconds, self.model_loads]
+
+    def observe_model_load(self, model_name: str, seconds: Optional[float]):
+        """Record a model load; models that were trained in memory (seconds is None) are skipped."""
+        if seconds is not None:
+            self.model_load_seconds.set(model_name, value=seconds)
+            self.model_loads.inc(model_name)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+class RequestTimer:
+    """Stage time totals and batch sizes recorded for one request (or one unit of pooled work)."""
+
+    def __init__(self, service: str = '', endpoint: str = 'unmatched'):
+        self.service = service
+        self.endpoint = endpoint
+        self.started = time.perf_counter()
+        self.handled = None
+        self.stages = defaultdict(float)
+        self.batch_sizes = []
+
+    def merge(self, other: 'RequestTimer'):
+        for name, seconds in other.stages.items():
+            self.stages[name] += seconds
+        self.batch_sizes.extend(other.batch_sizes)
+
+    def finish(self, registry: MetricsRegistry, method: str, status: int):
+        for name, seconds in self.stages.items():
+            registry.stage_latency.observe(seconds, self.service, self.endpoint, name)
+        for rows in self.batch_sizes:
+            registry.batch_size.observe(rows, self.service, self.endpoint)
+        registry.request_latency.observe(time.perf_counter() - self.started, self.service, self.endpoint,
+                                         method, status)
+
+
+_request_timer = contextvars.ContextVar('request_timer', default=None)
+
+
+@contextmanager
+def stage(name: str):
+    """Add the time spent in the block to the current request's stage total."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer = _request_timer.get()
+        if timer is not None:
+            timer.stages[name] += time.perf_counter() - started
+
+
+def observe_batch_size(rows: int):
+    timer = _request_timer.get()
+    if timer is not None:
+        timer.batch_sizes.append(rows)
+
+
+def add_recorded(recorded: RequestTimer):
+    """Merge stage times recorded elsewhere (a worker process, a shared micro-batch) into the current request."""
+    timer = _request_timer.get()
+    if timer is not None and recorded is not None:
+        timer.merge(recorded)
+
+
+@contextmanager
+def recording():
+    """Record stages into a fresh timer for the duration of the block and yield it."""
+    timer = RequestTimer()
+    token = _request_timer.set(timer)
+    try:
+        yield timer
+    finally:
+        _request_timer.reset(token)
+
+
+def call_recorded(func: Callable, *args, **kwargs) -> Tuple[Any, RequestTimer]:
+    """Call func, returning its result and the stages it recorded (used in pool workers)."""
+    with recording() as recorded:
+        return func(*args, **kwargs), recorded
+
+
+class TimedRoute(APIRoute):
+    """
+    Route class that labels the request timer with the route path and times the
+    'parse' stage (arrival until the endpoint starts, i.e. body parsing and
+    validation) and the 'serialization' stage (endpoint return until the response starts).
+    """
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        super().__init__(path, self._timed(path, endpoint), **kwargs)
+
+    @staticmethod
+    def _timed(path: str, endpoint: Callable) -> Callable:
+        def on_enter() -> Optional[RequestTimer]:
+            timer = _request_timer.get()
+            if timer is not None:
+                timer.endpoint = path
+                timer.stages['parse'] += time.perf_counter() - timer.started
+            return timer
+
+        if inspect.iscoroutinefunction(endpoint):
+            @functools.wraps(endpoint)
+            async def timed_endpoint(*args, **kwargs):
+                timer = on_enter()
+                try:
+                    return await endpoint(*args, **kwargs)
+                finally:
+                    if timer is not None:
+                        timer.handled = time.perf_counter()
+        else:
+            @functools.wraps(endpoint)
+            def timed_endpoint(*args, **kwargs):
+                timer = on_enter()
+                try:
+                    return endpoint(*args, **kwargs)
+                finally:
+                    if timer is not None:
+                        timer.handled = time.perf_counter()
+        return timed_endpoint
+
+
+class MetricsMiddleware:
+    """ASGI middleware that gives each HTTP request a RequestTimer and records it when the request ends."""
+
+    def __init__(self, app: Any, service: str, registry: MetricsRegistry):
+        self.app = app
+        self.service = service
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        timer = RequestTimer(self.service)
+        token = _request_timer.set(timer)
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+                if timer.handled is not None:
+                    timer.stages['serialization'] += time.perf_counter() - timer.handled
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_timer.reset(token)
+            timer.finish(self.registry, scope['method'], status)
+
+
+def instrument(app: Any, service: str) -> MetricsRegistry:
+    """
+    Time every route added to app from now on and record its requests under service,
+    in a registry of its own (returned, for the app's /metrics route).
+    """
+    registry = MetricsRegistry()
+    app.router.route_class = TimedRoute
+    app.add_middleware(MetricsMiddleware, service=service, registry=registry)
+    return registry
+
+
+def metrics_response(registry: MetricsRegistry) -> Response:
+    return Response(content=registry.render(), media_type=METRICS_MEDIA_TYPE)
@@ -0,0 +1,135 @@
+import asyncio
+import contextvars
+import inspect
+import os
+import time
+from collections import Counter
+from typing import Dict, List, Any, Callable
+
+BATCH_WINDOW_MS = float(os.environ.get('AI_PREDICT_BATCH_WINDOW_MS', '2'))
+MAX_BATCH_SIZE = int(os.environ.get('AI_PREDICT_MAX_BATCH_SIZE', '64'))
+
+
+class MicroBatcher:
+    """
+    Collects concurrent single-item requests for up to max_wait_ms (or max_batch_size
+    items, whichever comes first) and scores them with one call to score_batch.
+
+    score_batch takes a list of items and returns one result per item, in order. It may
+    be a plain function or a coroutine function. If it raises, every caller in that
+    batch gets the exception.
+    """
+
+    def __init__(self, score_batch: Callable[[List[Any]], Any], max_batch_size: int = MAX_BATCH_SIZE,
+                 max_wait_ms: float = BATCH_WINDOW_MS):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.score_batch = score_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = None
+        self._worker = None
+        self._loop = None
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.stats = {
+            'requests': 0,
+            'batches': 0,
+            'failed_batches': 0,
+            'batch_sizes': Counter(),
+            'queue_delay_total': 0.0,
+            'queue_delay_max': 0.0
+        }
+
+    def _ensure_worker(self):
+        # The queue and worker belong to the running event loop, so create them lazily
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            # Run the worker in an empty context rather than the first caller's (request-scoped state)
+            self._worker = contextvars.Context().run(loop.create_task, self._run())
+
+    async def submit(self, item: Any) -> Any:
+        """Queue one item and wait for its result."""
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future, time.perf_counter()))
+        return await future
+
+    async def _collect(self) -> List[tuple]:
+        """Wait for one request, then gather more until the window closes or the batch is full."""
+        batch = [await self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            started = time.perf_counter()
+            items = [item for item, _, _ in batch]
+
+            self.stats['requests'] += len(batch)
+            self.stats['batches'] += 1
+            self.stats['batch_sizes'][len(batch)] += 1
+            for _, _, queued_at in batch:
+                delay = started - queued_at
+                self.stats['queue_delay_total'] += delay
+                self.stats['queue_delay_max'] = max(self.stats['queue_delay_max'], delay)
+
+            try:
+                results = self.score_batch(items)
+                if inspect.isawaitable(results):
+                    results = await results
+                if len(results) != len(items):
+                    raise RuntimeError(f"score_batch returned {len(results)} results for {len(items)} items")
+            except Exception as e:
+                self.stats['failed_batches'] += 1
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (_, future, _), result in zip(batch, results):
+                # A caller that timed out or disconnected has a cancelled future
+                if not future.done():
+                    future.set_result(result)
+
+    async def close(self):
+        """Stop the worker; requests still queued are cancelled."""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        while self._queue is not None and not self._queue.empty():
+            _, future, _ = self._queue.get_nowait()
+            future.cancel()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Counters for batch sizes and queue delay."""
+        requests = self.stats['requests']
+        batches = self.stats['batches']
+        return {
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000.0,
+            'requests': requests,
+            'batches': batches,
+            'failed_batches': self.stats['failed_batches'],
+            'avg_batch_size': round(requests / batches, 2) if batches else 0.0,
+            'batch_size_counts': {str(size): count for size, count in sorted(self.stats['batch_sizes'].items())},
+            'avg_queue_delay_ms': round(self.stats['queue_delay_total'] / requests * 1000.0, 3) if requests else 0.0,
+            'max_queue_delay_ms': round(self.stats['queue_delay_max'] * 1000.0, 3),
+            'queued': self._queue.qsize() if self._queue is not None else 0
+        }
@@ -1,15 +1,69 @@
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split, cross_val_score
-from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import train_test_split, cross_val_score, StratifiedKFold
+from sklearn.linear_model import LogisticRegression, SGDClassifier
 from sklearn.preprocessing import StandardScaler, LabelEncoder
 from sklearn.metrics import classification_report, confusion_matrix, accuracy_score
 from sklearn.feature_selection import SelectKBest, f_classif
 import joblib
-from typing import Dict, List, Tuple, Any
+import os
+import pickle
+import shutil
+import inspect
+import sklearn
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Tuple, Any, Optional
 import warnings
 warnings.filterwarnings('ignore')
 
+from feature_pipeline import FrozenFeatureTransformer
+from logistic_scorer import FoldedLogisticScorer
+from reason_codes import rank_contributions
+from dataset_store import (load_dataset, sync_dataset, iter_dataset_chunks, dataset_exists, dataset_digest,
+                           read_schema, DATASET_PATH, CSV_PATH)
+from training_cache import TrainingCache
+import metrics
+
+# Bump when the layout of the saved model bundle changes
+BUNDLE_FORMAT_VERSION = 1
+
+# Hyperparameter grid searched by train_model_parallel
+DEFAULT_PARAM_GRID = {
+    'C': [0.1, 1.0, 10.0],
+    'solver': ['lbfgs', 'liblinear'],
+    'k': [6, 8, 10]
+}
+
+# Recommendation bands on priority_score, highest first
+RECOMMENDATION_BANDS = [
+    (8.0, "Highly Recommended for Grant Approval"),
+    (6.0, "Recommended for Grant Approval"),
+    (4.0, "Consider for Grant Approval")
+]
+NOT_RECOMMENDED = "Not Recommended for Grant Approval"
+
+def recommendation_labels(priority_scores: np.ndarray) -> np.ndarray:
+    """Vectorized recommendation text for an array of priority scores."""
+    priority_scores = np.asarray(priority_scores, dtype=float)
+    return np.select(
+        [priority_scores >= threshold for threshold, _ in RECOMMENDATION_BANDS],
+        [label for _, label in RECOMMENDATION_BANDS],
+        default=NOT_RECOMMENDED
+    )
+
+def _score_cv_fold(X: np.ndarray, y: np.ndarray, train_idx: np.ndarray, test_idx: np.ndarray,
+                   feature_idx: np.ndarray, C: float, solver: str) -> float:
+    """Fit and score one CV fold for one grid point (runs in a worker process)."""
+    X_fold_train = X[np.ix_(train_idx, feature_idx)]
+    X_fold_test = X[np.ix_(test_idx, feature_idx)]
+    
+    scaler = StandardScaler()
+    model = LogisticRegression(random_state=42, max_iter=1000, C=C, solver=solver)
+    model.fit(scaler.fit_transform(X_fold_train), y[train_idx])
+    return accuracy_score(y[test_idx], model.predict(scaler.transform(X_fold_test)))
+
 class FarmerPrioritizationModel:
     """
     Machine Learning model for farmer prioritization using Logistic Regression.
@@ -20,11 +74,35 @@ class FarmerPrioritizationModel:
         self.model = None
         self.scaler = StandardScaler()
         self.label_encoders = {}
+        # Define feature columns (excluding target and metadata)
+        self.feature_candidates = [
+            'monthly_income', 'land_size_bigha', 'previous_grants', 'crop_yield',
+            'family_size', 'age', 'farming_experience_years', 'credit_score',
+            'market_distance_km', 'has_irrigation', 'uses_modern_technology',
+            'has_disability'
+        ]
+        self.categorical_columns = ['crop_yield', 'education_level']
+        self.boolean_columns = ['has_irrigation', 'uses_modern_technology', 'has_disability']
         self.feature_columns = []
+        self.fill_values = {}
+        self.transformer = None
+        self.scorer = None
+        self.training_metadata = {}
+        # Seconds the last load_model took (None for a model trained in memory)
+        self.load_seconds = None
         self.target_column = 'application_status'
+        self.model_params = {
+            'random_state': 42,
+            'max_iter': 1000,
+            'C': 1.0,
+            'solver': 'lbfgs'
+        }
         self.model_path = 'farmer_prioritization_model.joblib'
         self.scaler_path = 'farmer_prioritization_scaler.joblib'
         self.encoders_path = 'farmer_prioritization_encoders.joblib'
+        self.preprocessing_path = 'farmer_prioritization_preprocessing.joblib'
+        self.scorer_path = 'farmer_prioritization_scorer.npz'
+        self.bundle_path = 'farmer_prioritization_bundle.joblib'
         
     def preprocess_data(self, df: pd.DataFrame) -> pd.DataFrame:
         """
@@ -36,17 +114,14 @@ class FarmerPrioritizationModel:
         df_processed = df_processed.fillna(df_processed.mode().iloc[0])
         
         # Encode categorical variables
-        categorical_columns = ['crop_yield', 'education_level']
-        
-        for col in categorical_columns:
+        for col in self.categorical_columns:
             if col in df_processed.columns:
                 le = LabelEncoder()
                 df_processed[col] = le.fit_transform(df_processed[col].astype(str))
                 self.label_encoders[col] = le
         
         # Convert boolean columns to integers
-        boolean_columns = ['has_irrigation', 'uses_modern_technology', 'has_disability']
-        for col in boolean_columns:
+        for col in self.boolean_columns:
             if col in df_processed.columns:
                 df_processed[col] = df_processed[col].astype(int)
         
@@ -60,20 +135,79 @@ class FarmerPrioritizationModel:
         
         return df_processed
     
+    def compute_fill_values(self, df: pd.DataFrame) -> Dict[str, Any]:
+        """
+        Record the training-set mode of every candidate feature, used to fill missing values at serve time.
+        """
+        return self.fill_values_from_counts({
+            col: Counter(df[col].dropna().value_counts().to_dict())
+            for col in self.feature_candidates if col in df.columns
+        })
+    
+    @staticmethod
+    def fill_values_from_counts(value_counts: Dict[str, Counter]) -> Dict[str, Any]:
+        """
+        The mode of each column from its value counts; ties go to the smallest value, as
+        DataFrame.mode sorts them. Columns without values get no fill value.
+        """
+        fill_values = {}
+        for col, counts in value_counts.items():
+            counts = {value: count for value, count in counts.items() if count > 0}
+            if counts:
+                top = max(counts.values())
+                value = min(value for value, count in counts.items() if count == top)
+                fill_values[col] = value.item() if hasattr(value, 'item') else value
+        return fill_values
+    
+    def build_transformer(self):
+        """Freeze the fitted encoders and fill values into a fit-free inference transformer."""
+        self.transformer = FrozenFeatureTransformer.from_training_state(
+            self.feature_columns, self.label_encoders, self.fill_values
+        )
+    
+    def build_scorer(self, X_check: np.ndarray = None, tolerance: float = 1e-9) -> FoldedLogisticScorer:
+        """
+        Fold the scaler into the classifier weights and check the folded scorer
+        reproduces the sklearn probabilities before it is used for serving.
+        """
+        scorer = FoldedLogisticScorer.from_fitted(
+            self.model, self.scaler, self.feature_columns, self.transformer
+        )
+        
+        if X_check is None:
+            # Probe points spread around the training distribution
+            rng = np.random.default_rng(0)
+            X_check = self.scaler.mean_ + self.scaler.scale_ * rng.normal(0.0, 2.0, (256, len(self.feature_columns)))
+        
+        expected = self.model.predict_proba(self.scaler.transform(X_check))[:, 1]
+        max_error = float(np.max(np.abs(scorer.predict_proba(X_check) - expected)))
+        if max_error > tolerance:
+            raise ValueError(f"Folded scorer deviates from sklearn by {max_error:.2e}")
+
+        expected_contributions = self.scaler.transform(X_check) * np.ravel(self.model.coef_)
+        max_error = float(np.max(np.abs(scorer.contributions(X_check) - expected_contributions)))
+        if max_error > tolerance:
+            raise ValueError(f"Folded scorer contributions deviate from sklearn by {max_error:.2e}")
+
+        self.scorer = scorer
+        return scorer
+    
+    def export_scorer(self, path: str = None) -> FoldedLogisticScorer:
+        """Export the scaler-folded scorer as a standalone .npz artifact."""
+        if self.model is None:
+            raise ValueError("No model to export. Please train the model first.")
+        
+        scorer = self.build_scorer()
+        scorer.save(path or self.scorer_path)
+        print(f"Scorer exported to {path or self.scorer_path}")
+        return scorer
+    
     def select_features(self, df: pd.DataFrame) -> List[str]:
         """
         Select the most important features for the model.
         """
-        # Define feature columns (excluding target and metadata)
-        feature_candidates = [
-            'monthly_income', 'land_size_bigha', 'previous_grants', 'crop_yield',
-            'family_size', 'age', 'farming_experience_years', 'credit_score',
-            'market_distance_km', 'has_irrigation', 'uses_modern_technology',
-            'has_disability'
-        ]
-        
         # Filter columns that exist in the dataset
-        available_features = [col for col in feature_candidates if col in df.columns]
+        available_features = [col for col in self.feature_candidates if col in df.columns]
         
         # Use SelectKBest to select top features
         X = df[available_features]
@@ -94,10 +228,12 @@ class FarmerPrioritizationModel:
         Train the Logistic Regression model.
         """
         print("Preprocessing data...")
+        self.fill_values = self.compute_fill_values(df)
         df_processed = self.preprocess_data(df)
         
         print("Selecting features...")
         self.feature_columns = self.select_features(df_processed)
+        self.build_transformer()
         
         # Prepare features and target
         X = df_processed[self.feature_columns]
@@ -114,14 +250,10 @@ class FarmerPrioritizationModel:
         
         # Train the model
         print("Training Logistic Regression model...")
-        self.model = LogisticRegression(
-            random_state=42,
-            max_iter=1000,
-            C=1.0,
-            solver='lbfgs'
-        )
+        self.model = LogisticRegression(**self.model_params)
         
         self.model.fit(X_train_scaled, y_train)
+        self.build_scorer()
         
         # Make predictions
         y_pred = self.model.predict(X_test_scaled)
@@ -144,11 +276,250 @@ class FarmerPrioritizationModel:
             'test_actual': y_test.values
         }
         
+        self.training_metadata = {
+            'last_trained': datetime.now().isoformat(),
+            'n_samples': int(len(df)),
+            'accuracy': float(accuracy),
+            'cv_mean': float(cv_scores.mean()),
+            'cv_std': float(cv_scores.std()),
+            'model_type': type(self.model).__name__,
+            'model_params': self.model.get_params(),
+            'sklearn_version': sklearn.__version__
+        }
+        
         print(f"Model Accuracy: {accuracy:.4f}")
         print(f"Cross-validation Score: {cv_scores.mean():.4f} (+/- {cv_scores.std() * 2:.4f})")
         
         return results
     
+    def train_model_parallel(self, df: pd.DataFrame, param_grid: Dict[str, List[Any]] = None,
+                             cv: int = 5, n_jobs: int = -1) -> Dict[str, Any]:
+        """
+        Train with a cross-validated hyperparameter search (C, solver, number of features k)
+        spread across a process pool. Preprocessing, feature scores and CV splits are computed
+        once and shared with every fold; the result includes a per-stage timing breakdown.
+        """
+        from joblib import Parallel, delayed
+        
+        param_grid = param_grid or DEFAULT_PARAM_GRID
+        timings = {}
+        start = time.perf_counter()
+        
+        # Preprocess once; every fold reuses these arrays
+        stage = time.perf_counter()
+        self.fill_values = self.compute_fill_values(df)
+        df_processed = self.preprocess_data(df)
+        candidates = [col for col in self.feature_candidates if col in df_processed.columns]
+        X = df_processed[candidates].to_numpy(dtype=np.float64)
+        y = df_processed['target'].to_numpy()
+        train_idx, test_idx = train_test_split(
+            np.arange(len(y)), test_size=0.2, random_state=42, stratify=y
+        )
+        X_train, y_train = X[train_idx], y[train_idx]
+        timings['preprocess'] = time.perf_counter() - stage
+        
+        # Score features once on the training split; each k takes the top-k of this ranking
+        stage = time.perf_counter()
+        f_scores, _ = f_classif(X_train, y_train)
+        ranking = np.argsort(-np.nan_to_num(f_scores, nan=-np.inf), kind='stable')
+        folds = list(StratifiedKFold(n_splits=cv, shuffle=True, random_state=42).split(X_train, y_train))
+        timings['feature_scoring'] = time.perf_counter() - stage
+        
+        # Grid search: one task per (grid point, fold)
+        stage = time.perf_counter()
+        grid = [
+            {'C': C, 'solver': solver, 'k': min(k, len(candidates))}
+            for C in param_grid['C'] for solver in param_grid['solver'] for k in param_grid['k']
+        ]
+        grid = [dict(p) for p in {tuple(sorted(p.items())) for p in grid}]
+        grid.sort(key=lambda p: (p['C'], p['solver'], p['k']))
+        
+        print(f"Cross-validating {len(grid)} parameter sets x {cv} folds...")
+        fold_scores = Parallel(n_jobs=n_jobs)(
+            delayed(_score_cv_fold)(X_train, y_train, fold_train, fold_test,
+                                    np.sort(ranking[:params['k']]), params['C'], params['solver'])
+            for params in grid for fold_train, fold_test in folds
+        )
+        fold_scores = np.asarray(fold_scores).reshape(len(grid), cv)
+        grid_results = [
+            dict(params, cv_mean=float(scores.mean()), cv_std=float(scores.std()))
+            for params, scores in zip(grid, fold_scores)
+        ]
+        grid_results.sort(key=lambda r: r['cv_mean'], reverse=True)
+        best = grid_results[0]
+        timings['grid_search'] = time.perf_counter() - stage
+        
+        # Refit the best configuration on the full training split
+        stage = time.perf_counter()
+        feature_idx = np.sort(ranking[:best['k']])
+        self.feature_columns = [candidates[i] for i in feature_idx]
+        self.build_transformer()
+        self.scaler = StandardScaler()
+        X_train_scaled = self.scaler.fit_transform(X_train[:, feature_idx])
+        self.model = LogisticRegression(random_state=42, max_iter=1000, C=best['C'], solver=best['solver'])
+        self.model.fit(X_train_scaled, y_train)
+        self.build_scorer()
+        timings['final_fit'] = time.perf_counter() - stage
+        
+        stage = time.perf_counter()
+        X_test_scaled = self.scaler.transform(X[np.ix_(test_idx, feature_idx)])
+        y_test = y[test_idx]
+        y_pred = self.model.predict(X_test_scaled)
+        y_pred_proba = self.model.predict_proba(X_test_scaled)[:, 1]
+        accuracy = accuracy_score(y_test, y_pred)
+        timings['evaluation'] = time.perf_counter() - stage
+        timings['total'] = time.perf_counter() - start
+        
+        results = {
+            'accuracy': accuracy,
+            'cv_mean': best['cv_mean'],
+            'cv_std': best['cv_std'],
+            'best_params': {key: best[key] for key in ('C', 'solver', 'k')},
+            'grid_results': grid_results,
+            'classification_report': classification_report(y_test, y_pred),
+            'confusion_matrix': confusion_matrix(y_test, y_pred),
+            'feature_importance': dict(zip(self.feature_columns, self.model.coef_[0])),
+            'test_predictions': y_pred,
+            'test_probabilities': y_pred_proba,
+            'test_actual': y_test,
+            'timings': timings
+        }
+        
+        self.training_metadata = {
+            'last_trained': datetime.now().isoformat(),
+            'n_samples': int(len(df)),
+            'accuracy': float(accuracy),
+            'cv_mean': best['cv_mean'],
+            'cv_std': best['cv_std'],
+            'model_type': type(self.model).__name__,
+            'model_params': self.model.get_params(),
+            'sklearn_version': sklearn.__version__,
+            'best_params': results['best_params'],
+            'timings': timings
+        }
+        
+        print(f"Best parameters: {results['best_params']}")
+        print(f"Model Accuracy: {accuracy:.4f}")
+        print(f"Cross-validation Score: {best['cv_mean']:.4f} (+/- {best['cv_std'] * 2:.4f})")
+        
+        return results
+    
+    def train_incremental(self, path: str = DATASET_PATH, chunksize: int = 50000,
+                          epochs: int = 3, holdout_fraction: float = 0.2, alpha: float = 1e-3,
+                          random_state: int = 42, csv_path: str = CSV_PATH) -> Dict[str, Any]:
+        """
+        Out-of-core training with SGD logistic regression for datasets too large for memory.
+        The columnar dataset is streamed in chunks: one pass for value counts (categories and
+        fill values), one for streaming scaler statistics, one per epoch of partial_fit and one
+        over the held-out rows. Peak memory depends on chunksize (and the number of distinct
+        feature values), not on the number of rows.
+        """
+        stored = {column['name'] for column in read_schema(path)['columns']}
+        usecols = [col for col in self.feature_candidates + [self.target_column] if col in stored]
+        
+        def stream():
+            """Yield (train_rows, holdout_rows) per chunk with a reproducible split."""
+            for i, chunk in enumerate(iter_dataset_chunks(usecols, chunksize, path, csv_path)):
+                holdout = np.random.default_rng([random_state, i]).random(len(chunk)) < holdout_fraction
+                yield chunk[~holdout], chunk[holdout]
+        
+        def target(rows: pd.DataFrame) -> np.ndarray:
+            return (rows[self.target_column] == 'approved').to_numpy(dtype=int)
+        
+        # Pass 1: value counts of the training rows (categories and modes)
+        print("Collecting feature statistics...")
+        self.feature_columns = [col for col in self.feature_candidates if col in stored]
+        value_counts = {col: Counter() for col in self.feature_columns}
+        for train_rows, _ in stream():
+            for col in self.feature_columns:
+                values = train_rows[col].dropna()
+                if col in self.categorical_columns:
+                    values = values.astype(str)
+                elif col in self.boolean_columns:
+                    values = values.astype(bool)
+                value_counts[col].update(values.value_counts().to_dict())
+        
+        # A feature missing in every training row carries nothing to learn (and has no categories or mode)
+        empty = [col for col in self.feature_columns if not any(value_counts[col].values())]
+        if empty:
+            print(f"Skipping features with no values in the training rows: {empty}")
+            self.feature_columns = [col for col in self.feature_columns if col not in empty]
+        if not self.feature_columns:
+            raise ValueError(f"No usable feature columns found in {path}.")
+        
+        self.label_encoders = {
+            col: LabelEncoder().fit(sorted(value for value, count in value_counts[col].items() if count > 0))
+            for col in self.feature_columns if col in self.categorical_columns
+        }
+        # Same fill values (training-set modes) as compute_fill_values gives the batch trainers
+        self.fill_values = self.fill_values_from_counts(value_counts)
+        self.build_transformer()
+        
+        # Pass 2: streaming scaler statistics
+        print("Fitting scaler incrementally...")
+        self.scaler = StandardScaler()
+        for train_rows, _ in stream():
+            if len(train_rows):
+                self.scaler.partial_fit(self.transformer.transform_batch(train_rows))
+        
+        # Pass 3: SGD epochs over shuffled chunks
+        self.model = SGDClassifier(loss='log_loss', alpha=alpha, random_state=random_state)
+        rng = np.random.default_rng(random_state)
+        n_train = 0
+        for epoch in range(epochs):
+            print(f"Training epoch {epoch + 1}/{epochs}...")
+            for train_rows, _ in stream():
+                if not len(train_rows):
+                    continue
+                order = rng.permutation(len(train_rows))
+                X = self.scaler.transform(self.transformer.transform_batch(train_rows))[order]
+                self.model.partial_fit(X, target(train_rows)[order], classes=[0, 1])
+                if epoch == 0:
+                    n_train += len(train_rows)
+        
+        self.build_scorer()
+        
+        # Pass 4: evaluate on the held-out stream
+        print("Evaluating on held-out rows...")
+        confusion = np.zeros((2, 2), dtype=np.int64)
+        log_loss_sum = 0.0
+        for _, holdout_rows in stream():
+            if not len(holdout_rows):
+                continue
+            y_true = target(holdout_rows)
+            y_proba = self.scorer.predict_proba(self.transformer.transform_batch(holdout_rows))
+            y_pred = (y_proba > 0.5).astype(int)
+            confusion += np.bincount(y_true * 2 + y_pred, minlength=4).reshape(2, 2)
+            y_proba = np.clip(y_proba, 1e-15, 1 - 1e-15)
+            log_loss_sum -= float(np.sum(y_true * np.log(y_proba) + (1 - y_true) * np.log(1 - y_proba)))
+        
+        n_holdout = int(confusion.sum())
+        accuracy = float(np.trace(confusion) / n_holdout) if n_holdout else None
+        
+        results = {
+            'accuracy': accuracy,
+            'log_loss': log_loss_sum / n_holdout if n_holdout else None,
+            'confusion_matrix': confusion,
+            'feature_importance': dict(zip(self.feature_columns, self.model.coef_[0])),
+            'n_train': n_train,
+            'n_holdout': n_holdout
+        }
+        
+        self.training_metadata = {
+            'last_trained': datetime.now().isoformat(),
+            'n_samples': n_train + n_holdout,
+            'accuracy': accuracy,
+            'model_type': type(self.model).__name__,
+            'model_params': self.model.get_params(),
+            'sklearn_version': sklearn.__version__,
+            'incremental': {'chunksize': chunksize, 'epochs': epochs, 'holdout_fraction': holdout_fraction}
+        }
+        
+        if accuracy is not None:
+            print(f"Held-out Accuracy: {accuracy:.4f} on {n_holdout} farmers")
+        
+        return results
+    
     def predict_priority(self, farmer_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Predict priority score for a single farmer.
@@ -156,28 +527,21 @@ class FarmerPrioritizationModel:
         if self.model is None:
             raise ValueError("Model not trained. Please train the model first.")
         
-        # Create a DataFrame with the farmer data
-        df_farmer = pd.DataFrame([farmer_data])
-        
-        # Preprocess the data
-        df_processed = self.preprocess_data(df_farmer)
-        
         # Check if feature columns are available
-        if not hasattr(self, 'feature_columns') or not self.feature_columns:
+        if self.transformer is None or self.scorer is None:
             raise ValueError("Model feature columns not available. Please retrain the model.")
         
-        # Select features
-        X = df_processed[self.feature_columns]
-        
-        # Scale features
-        X_scaled = self.scaler.transform(X)
+        # Encode with the frozen training-time encoders and fill values
+        with metrics.stage('preprocessing'):
+            x = self.transformer.transform_one(farmer_data)
         
-        # Make prediction
-        approval_probability = self.model.predict_proba(X_scaled)[0, 1]
-        prediction = self.model.predict(X_scaled)[0]
-        
-        # Calculate priority score based on probability and other factors
-        priority_score = self.calculate_priority_score(farmer_data, approval_probability)
+        # Scaler-folded logistic scoring
+        with metrics.stage('inference'):
+            approval_probability = self.scorer.predict_proba_one(x)
+            prediction = 1 if approval_probability > 0.5 else 0
+            
+            # Calculate priority score based on probability and other factors
+            priority_score = self.calculate_priority_score(farmer_data, approval_probability)
         
         return {
             'farmer_id': farmer_data.get('farmer_id', 'Unknown'),
@@ -187,17 +551,73 @@ class FarmerPrioritizationModel:
             'confidence': round(abs(approval_probability - 0.5) * 2, 4)  # Distance from 0.5
         }
     
+    def predict_priority_batch(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Predict priority scores for many farmers in one vectorized pass.
+        Returns one row per farmer, in input order, with the same fields as predict_priority.
+        """
+        if self.model is None:
+            raise ValueError("Model not trained. Please train the model first.")
+        
+        if self.transformer is None or self.scorer is None:
+            raise ValueError("Model feature columns not available. Please retrain the model.")
+        
+        df = df.reset_index(drop=True)
+        
+        # Encode and score the whole batch at once (scaling is folded into the scorer's weights)
+        with metrics.stage('preprocessing'):
+            X = self.transformer.transform_batch(df)
+        with metrics.stage('inference'):
+            approval_probability = self.scorer.predict_proba(X)
+            prediction = (approval_probability > 0.5).astype(int)
+            
+            priority_score = self.calculate_priority_scores(df, approval_probability)
+        
+        if 'farmer_id' in df.columns:
+            farmer_id = df['farmer_id'].fillna('Unknown').astype(str)
+        else:
+            farmer_id = 'Unknown'
+        
+        return pd.DataFrame({
+            'farmer_id': farmer_id,
+            'approval_probability': np.round(approval_probability, 4),
+            'predicted_status': np.where(prediction == 1, 'approved', 'pending'),
+            'priority_score': np.round(priority_score, 2),
+            'confidence': np.round(np.abs(approval_probability - 0.5) * 2, 4)
+        }, index=df.index)
+
+    def feature_contributions(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Per-feature logistic contributions (coefficient x scaled value), one row per farmer
+        and one column per entry of feature_columns. Positive contributions push towards approval.
+        """
+        if self.transformer is None or self.scorer is None:
+            raise ValueError("Model feature columns not available. Please retrain the model.")
+
+        with metrics.stage('preprocessing'):
+            X = self.transformer.transform_batch(df.reset_index(drop=True))
+        with metrics.stage('reasoning'):
+            return self.scorer.contributions(X)
+
+    def explain_batch(self, df: pd.DataFrame, top_n: int = 3) -> List[List[Dict[str, Any]]]:
+        """Top-N feature contributions for each farmer, ranked by absolute size."""
+        contributions = self.feature_contributions(df)
+        with metrics.stage('reasoning'):
+            return rank_contributions(contributions, self.feature_columns, top_n)
+
     def calculate_priority_score(self, farmer_data: Dict[str, Any], approval_probability: float) -> float:
         """
         Calculate priority score based on farmer data and ML prediction.
+        Missing values are filled with the training fill values, as the model's features are.
         """
+        fill = self.transformer.filled_value
         score = 0.0
         
         # Base score from ML model (40% weight)
         score += approval_probability * 4.0
         
         # Economic factors (30% weight)
-        monthly_income = farmer_data.get('monthly_income', 0)
+        monthly_income = fill('monthly_income', farmer_data.get('monthly_income'))
         if monthly_income < 15000:
             score += 3.0  # Low income - highest priority
         elif monthly_income < 35000:
@@ -206,7 +626,7 @@ class FarmerPrioritizationModel:
             score += 0.6  # High income
         
         # Land size factor (15% weight)
-        land_size = farmer_data.get('land_size_bigha', 0)
+        land_size = fill('land_size_bigha', farmer_data.get('land_size_bigha'))
         if land_size < 2:
             score += 1.5  # Small land - highest priority
         elif land_size <= 4:
@@ -215,7 +635,7 @@ class FarmerPrioritizationModel:
             score += 0.45  # Large land
         
         # Previous grants factor (10% weight)
-        previous_grants = farmer_data.get('previous_grants', 0)
+        previous_grants = fill('previous_grants', farmer_data.get('previous_grants'))
         if previous_grants == 0:
             score += 1.0  # No previous grants - highest priority
         elif previous_grants == 1:
@@ -228,49 +648,233 @@ class FarmerPrioritizationModel:
         # Normalize to 0-10 scale
         return min(score, 10.0)
     
-    def save_model(self):
-        """Save the trained model and preprocessing objects."""
+    def calculate_priority_scores(self, df: pd.DataFrame, approval_probability: np.ndarray) -> np.ndarray:
+        """
+        Vectorized calculate_priority_score over a batch of farmers.
+        """
+        fill = self.transformer.filled_column
+        monthly_income = fill(df, 'monthly_income', len(df))
+        land_size = fill(df, 'land_size_bigha', len(df))
+        previous_grants = fill(df, 'previous_grants', len(df))
+        
+        score = np.asarray(approval_probability, dtype=float) * 4.0
+        score += np.select([monthly_income < 15000, monthly_income < 35000], [3.0, 1.5], default=0.6)
+        score += np.select([land_size < 2, land_size <= 4], [1.5, 1.05], default=0.45)
+        score += np.select([previous_grants == 0, previous_grants == 1], [1.0, 0.5], default=0.2)
+        
+        return np.minimum(score, 10.0)
+    
+    def save_model(self, path: str = None, with_scorer: bool = True):
+        """
+        Save the model, scaler, encoders, feature columns, fill values and training
+        metadata as a single versioned bundle with a content hash.
+        with_scorer=False skips re-exporting the standalone serving scorer (for candidate bundles).
+        """
         if self.model is None:
             raise ValueError("No model to save. Please train the model first.")
         
-        joblib.dump(self.model, self.model_path)
-        joblib.dump(self.scaler, self.scaler_path)
-        joblib.dump(self.label_encoders, self.encoders_path)
+        path = path or self.bundle_path
+        bundle = {
+            'format_version': BUNDLE_FORMAT_VERSION,
+            'model': self.model,
+            'scaler': self.scaler,
+            'label_encoders': self.label_encoders,
+            'feature_columns': self.feature_columns,
+            'fill_values': self.fill_values,
+            'metadata': self.training_metadata
+        }
+        # Hash the pickle round-tripped bundle so array memory layouts match what load_model sees
+        bundle['content_hash'] = joblib.hash(pickle.loads(pickle.dumps(bundle)))
+        
+        # Written uncompressed so the arrays can be memory-mapped on load
+        joblib.dump(bundle, path)
+        if with_scorer:
+            self.export_scorer()
         
-        print(f"Model saved to {self.model_path}")
-        print(f"Scaler saved to {self.scaler_path}")
-        print(f"Encoders saved to {self.encoders_path}")
+        print(f"Model bundle saved to {path} (hash {bundle['content_hash'][:12]})")
     
-    def load_model(self):
-        """Load the trained model and preprocessing objects."""
+    def load_model(self, path: str = None, mmap_mode: str = 'r', verify: bool = True):
+        """
+        Load the model bundle. NumPy arrays are memory-mapped read-only, so worker
+        processes loading the same bundle share its pages.
+        Falls back to the older separate model/scaler/encoder files.
+        """
+        path = path or self.bundle_path
+        if not os.path.exists(path):
+            return self._load_legacy_model()
+        
+        started = time.perf_counter()
+        bundle = joblib.load(path, mmap_mode=mmap_mode)
+        
+        format_version = bundle.get('format_version')
+        if format_version != BUNDLE_FORMAT_VERSION:
+            raise ValueError(f"Unsupported model bundle version {format_version} "
+                             f"(expected {BUNDLE_FORMAT_VERSION}). Please retrain the model.")
+        
+        content_hash = bundle.pop('content_hash', None)
+        if verify and joblib.hash(bundle, coerce_mmap=True) != content_hash:
+            raise ValueError(f"Model bundle {path} failed its content hash check.")
+        
+        self.model = bundle['model']
+        self.scaler = bundle['scaler']
+        self.label_encoders = bundle['label_encoders']
+        self.feature_columns = list(bundle['feature_columns'])
+        self.fill_values = bundle['fill_values']
+        self.training_metadata = dict(bundle['metadata'], content_hash=content_hash)
+        self.build_transformer()
+        self.build_scorer()
+        self.load_seconds = time.perf_counter() - started
+        
+        print(f"Model loaded successfully from {path}!")
+        return True
+    
+    def install_bundle(self, source_path: str):
+        """Make a stored bundle (e.g. from the training cache) the active one and load it."""
+        tmp_path = f'{self.bundle_path}.tmp{os.getpid()}'
+        shutil.copyfile(source_path, tmp_path)
+        os.replace(tmp_path, self.bundle_path)
+        self.load_model()
+        self.export_scorer()
+    
+    def _load_legacy_model(self):
+        """Load the pre-bundle model, scaler and encoder files."""
         try:
             self.model = joblib.load(self.model_path)
             self.scaler = joblib.load(self.scaler_path)
             self.label_encoders = joblib.load(self.encoders_path)
+            
+            # Older model files predate the persisted preprocessing state
+            if os.path.exists(self.preprocessing_path):
+                preprocessing = joblib.load(self.preprocessing_path)
+                self.feature_columns = preprocessing['feature_columns']
+                self.fill_values = preprocessing['fill_values']
+                self.build_transformer()
+                self.build_scorer()
             print("Model loaded successfully!")
             return True
         except FileNotFoundError:
             print("Model files not found. Please train the model first.")
             return False
+
+
+def _training_params(method: Any, **passed) -> Dict[str, Any]:
+    """The parameters a training method runs with: its defaults, updated with the ones passed."""
+    params = {name: parameter.default for name, parameter in inspect.signature(method).parameters.items()
+              if parameter.default is not inspect.Parameter.empty}
+    params.update(passed)
+    return params
+
+def _training_cache_key(cache: TrainingCache, model: FarmerPrioritizationModel, incremental: bool,
+                        parallel: bool, chunksize: int) -> Optional[str]:
+    """
+    Cache key for training the current dataset with the given options, or None without a
+    dataset. The dataset is hashed as training reads it (the synced columnar file).
+    """
+    if not dataset_exists():
+        return None
+    
+    if incremental:
+        mode = 'incremental'
+        params = _training_params(FarmerPrioritizationModel.train_incremental, chunksize=chunksize)
+    elif parallel:
+        mode = 'parallel'
+        params = _training_params(FarmerPrioritizationModel.train_model_parallel, param_grid=DEFAULT_PARAM_GRID)
+    else:
+        mode = 'standard'
+        params = _training_params(FarmerPrioritizationModel.train_model)
+    # Paths are covered by the dataset hash; worker counts do not change the model
+    for name in ('path', 'csv_path', 'n_jobs'):
+        params.pop(name, None)
     
+    hyperparameters = {
+        'mode': mode,
+        'training_params': params,
+        'model_params': model.model_params,
+        'bundle_format': BUNDLE_FORMAT_VERSION,
+        'sklearn_version': sklearn.__version__
+    }
+    return cache.make_key(dataset_digest(), model.feature_candidates, hyperparameters)
 
+def find_cached_bundle(incremental: bool = False, parallel: bool = False, chunksize: int = 50000):
+    """
+    Return the training cache entry ({'key', 'bundle_path', 'metrics'}) if this dataset was
+    already trained with these options, or None on a cache miss. Nothing is installed.
+    """
+    cache = TrainingCache()
+    sync_dataset()
+    cache_key = _training_cache_key(cache, FarmerPrioritizationModel(), incremental, parallel, chunksize)
+    entry = cache.get(cache_key) if cache_key else None
+    if entry is not None:
+        print(f"Training cache hit ({cache_key[:12]}); reusing stored model bundle.")
+    return entry
 
-def train_and_evaluate_model():
-    """Train and evaluate the farmer prioritization model."""
-    # Load the dataset
-    try:
-        df = pd.read_csv('farmer_dataset.csv')
-        print(f"Dataset loaded: {len(df)} farmers")
-    except FileNotFoundError:
+def load_cached_model(incremental: bool = False, parallel: bool = False, chunksize: int = 50000):
+    """
+    Return (model, metrics) if this dataset was already trained with these options,
+    installing the cached bundle as the active model. Returns None on a cache miss.
+    """
+    entry = find_cached_bundle(incremental, parallel, chunksize)
+    if entry is None:
+        return None
+    
+    model = FarmerPrioritizationModel()
+    model.install_bundle(entry['bundle_path'])
+    return model, entry['metrics']
+
+def train_and_evaluate_model(incremental: bool = False, chunksize: int = 50000,
+                             parallel: bool = False, n_jobs: int = -1,
+                             force: bool = False, use_cache: bool = True):
+    """
+    Train and evaluate the farmer prioritization model.
+    Unless force is set, an unchanged dataset with unchanged options reuses the cached model.
+    """
+    if use_cache and not force:
+        cached = load_cached_model(incremental, parallel, chunksize)
+        if cached is not None:
+            return cached
+    
+    cache = TrainingCache() if use_cache else None
+    
+    if not dataset_exists():
         print("Dataset not found. Please run data_generator.py first.")
         return None
+    sync_dataset()
+    
+    if incremental:
+        model = FarmerPrioritizationModel()
+        cache_key = _training_cache_key(cache, model, incremental, parallel, chunksize) if cache else None
+        results = model.train_incremental(chunksize=chunksize)
+        model.save_model()
+        if cache_key:
+            cache.put(cache_key, model.bundle_path, results)
+        
+        print("\n" + "="*50)
+        print("INCREMENTAL MODEL EVALUATION RESULTS")
+        print("="*50)
+        print(f"Training rows: {results['n_train']}, held-out rows: {results['n_holdout']}")
+        if results['accuracy'] is not None:
+            print(f"Accuracy: {results['accuracy']:.4f}")
+            print(f"Log loss: {results['log_loss']:.4f}")
+        print("\nConfusion Matrix:")
+        print(results['confusion_matrix'])
+        return model, results
+    
+    # Load the dataset
+    df = load_dataset()
+    print(f"Dataset loaded: {len(df)} farmers")
     
     # Initialize and train the model
     model = FarmerPrioritizationModel()
-    results = model.train_model(df)
+    cache_key = _training_cache_key(cache, model, incremental, parallel, chunksize) if cache else None
+    if parallel:
+        results = model.train_model_parallel(df, n_jobs=n_jobs)
+    else:
+        results = model.train_model(df)
     
     # Save the model
     model.save_model()
+    if cache_key:
+        cache.put(cache_key, model.bundle_path, results)
     
     # Print detailed results
     print("\n" + "="*50)
@@ -286,7 +890,27 @@ def train_and_evaluate_model():
                                     key=lambda x: abs(x[1]), reverse=True):
         print(f"{feature}: {importance:.4f}")
     
+    if 'timings' in results:
+        print("\nTiming Breakdown:")
+        for stage, seconds in results['timings'].items():
+            print(f"{stage}: {seconds:.3f}s")
+    
     return model, results
 
 if __name__ == "__main__":
-    model, results = train_and_evaluate_model()
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Train the farmer prioritization model")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Stream the dataset in chunks and train with SGD (bounded memory)")
+    parser.add_argument('--chunksize', type=int, default=50000, help="Rows per chunk in incremental mode")
+    parser.add_argument('--parallel', action='store_true',
+                        help="Cross-validated hyperparameter search across a process pool")
+    parser.add_argument('--n-jobs', type=int, default=-1, help="Worker processes for --parallel (-1 = all cores)")
+    parser.add_argument('--force', action='store_true', help="Retrain even if the training cache has this model")
+    parser.add_argument('--no-cache', action='store_true', help="Neither read nor write the training cache")
+    args = parser.parse_args()
+    
+    model, results = train_and_evaluate_model(incremental=args.incremental, chunksize=args.chunksize,
+                                              parallel=args.parallel, n_jobs=args.n_jobs,
+                                              force=args.force, use_cache=not args.no_cache)
@@ -0,0 +1,152 @@
+"""
+Newline-delimited JSON streaming for scoring endpoints.
+
+The request body is read incrementally and parsed into fixed-size chunks of
+records; each chunk is scored and written to the response before the next one is
+read, so memory stays flat and the first results go out while the client is
+still uploading. Records are validated line by line, so an invalid record gets an
+error line of its own and the rest of its chunk is still scored.
+"""
+
+import json
+import os
+from typing import Dict, List, Any, AsyncIterator, Callable, Awaitable, Optional
+
+import anyio
+import numpy as np
+from fastapi import Request
+from pydantic import ValidationError
+from starlette.responses import StreamingResponse
+
+import metrics
+
+STREAM_CHUNK_ROWS = int(os.environ.get('AI_STREAM_CHUNK_ROWS', '1000'))
+MAX_LINE_BYTES = int(os.environ.get('AI_STREAM_MAX_LINE_BYTES', str(1 << 20)))
+
+NDJSON_MEDIA_TYPE = 'application/x-ndjson'
+
+
+class NDJSONStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse whose body iterator reads the request body itself.
+    Starlette watches receive() for disconnects while streaming (for servers before
+    ASGI spec 2.4), which would swallow request body messages; here a disconnect
+    surfaces as ClientDisconnect from request.stream() instead.
+    """
+
+    def __init__(self, content: AsyncIterator[bytes], **kwargs):
+        super().__init__(content, media_type=NDJSON_MEDIA_TYPE, **kwargs)
+
+    async def listen_for_disconnect(self, receive):
+        # Returns only when cancelled, once the body iterator is exhausted
+        await anyio.sleep_forever()
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps_lines(records: List[Dict[str, Any]]) -> bytes:
+    """Serialize records as NDJSON."""
+    return ''.join(
+        json.dumps(record, ensure_ascii=False, default=_json_default) + '\n' for record in records
+    ).encode('utf-8')
+
+
+def _validation_message(error: ValidationError) -> str:
+    return '; '.join(f"{'.'.join(str(part) for part in detail['loc'])}: {detail['msg']}"
+                     for detail in error.errors())
+
+
+async def iter_record_chunks(request: Request, chunk_rows: int = STREAM_CHUNK_ROWS,
+                             errors: List[Dict[str, Any]] = None,
+                             model_class: Optional[type] = None) -> AsyncIterator[List[Dict[str, Any]]]:
+    """
+    Yield lists of up to chunk_rows JSON objects parsed from an NDJSON request body.
+    With model_class (a pydantic model) each object is validated and replaced by the
+    model's dict. Blank lines are skipped; unparseable or invalid lines are appended to
+    errors (if given) and skipped. A chunk ends before each bad line, and its error is
+    appended only after the chunk is yielded, so draining errors before handling each
+    chunk keeps input order.
+    """
+    buffer = b''
+    records = []
+    line_number = 0
+
+    def parse(line: bytes) -> Optional[Dict[str, Any]]:
+        """Add the line's record to records; returns the error for an invalid line."""
+        nonlocal line_number
+        line_number += 1
+        line = line.strip()
+        if not line:
+            return None
+        try:
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError("expected a JSON object")
+            if model_class is not None:
+                record = model_class.model_validate(record).model_dump()
+            records.append(record)
+        except ValidationError as e:
+            return {'line': line_number, 'error': f"Invalid record: {_validation_message(e)}"}
+        except ValueError as e:
+            return {'line': line_number, 'error': f"Invalid record: {e}"}
+        return None
+
+    async for data in request.stream():
+        buffer += data
+        lines = buffer.split(b'\n')
+        buffer = lines.pop()
+        if len(buffer) > MAX_LINE_BYTES:
+            raise ValueError(f"NDJSON line {line_number + 1} is longer than {MAX_LINE_BYTES} bytes")
+        for line in lines:
+            error = parse(line)
+            if error is not None:
+                # The records before the bad line go out before its error
+                if records:
+                    yield records
+                    records = []
+                if errors is not None:
+                    errors.append(error)
+            elif len(records) >= chunk_rows:
+                yield records
+                records = []
+
+    error = parse(buffer)
+    if records:
+        yield records
+    if error is not None and errors is not None:
+        errors.append(error)
+
+
+async def stream_scored_chunks(request: Request,
+                               score_chunk: Callable[[List[Dict[str, Any]]], Awaitable[List[Dict[str, Any]]]],
+                               model_class: Optional[type] = None,
+                               chunk_rows: int = STREAM_CHUNK_ROWS) -> AsyncIterator[bytes]:
+    """
+    Read the request in chunks, validate each record against model_class, score each
+    chunk of valid records and yield its results as NDJSON. The output has one line per
+    input record, in input order: a scored result, or an {"error": ...} line (with the
+    input "line" number for unparseable or invalid records).
+    """
+    errors = []
+    try:
+        async for records in iter_record_chunks(request, chunk_rows, errors, model_class):
+            if errors:
+                yield dumps_lines(errors)
+                errors.clear()
+            try:
+                scored = await score_chunk(records)
+                with metrics.stage('serialization'):
+                    lines = dumps_lines(scored)
+                yield lines
+            except Exception as e:
+                yield dumps_lines([{'error': f"Scoring failed: {e}"}] * len(records))
+    except ValueError as e:
+        errors.append({'error': str(e)})
+    if errors:
+        yield dumps_lines(errors)
@@ -0,0 +1,264 @@
+"""
+Pre-fork multi-worker server for the AI services.
+
+The master process imports each service, loads its model once and binds its
+listening socket, then forks N uvicorn workers per service. Workers inherit the
+loaded model (pages are shared copy-on-write; the prioritization bundle's arrays
+are also memory-mapped) and accept connections on the shared socket. Worker
+output goes straight to the master's stdout/stderr, so logs stream as they are
+written.
+
+Signals to the master:
+    SIGHUP            graceful restart: reload the models, fork a new generation of
+                      workers, then let the old ones finish in-flight requests and exit
+    SIGTERM / SIGINT  graceful shutdown (workers get AI_GRACEFUL_TIMEOUT seconds)
+
+Workers that die are replaced. A successful training run in any worker asks the
+master for a graceful restart (request_reload), so every worker serves the new model.
+
+Where os.fork is unavailable (Windows), each service runs under uvicorn's own
+multi-process mode instead: workers load the model themselves and there is no
+SIGHUP restart.
+
+Metrics, micro-batching and process pools are per worker. Unless AI_PROCESS_WORKERS
+is set, each worker's process pool gets an equal share of the default size.
+"""
+
+import copy
+import importlib
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import time
+import traceback
+from typing import Dict, List, NamedTuple
+
+import numpy as np
+import uvicorn
+from uvicorn.config import LOGGING_CONFIG
+
+GRACEFUL_TIMEOUT = float(os.environ.get('AI_GRACEFUL_TIMEOUT', '30'))
+MASTER_PID_ENV = 'AI_PREFORK_MASTER_PID'
+RESPAWN_DELAY = 1.0
+
+
+class ServiceSpec(NamedTuple):
+    name: str
+    module: str  # Module with a FastAPI `app` and a `preload_model()` function
+    port: int
+
+
+SERVICES = {
+    'prioritization': ServiceSpec('prioritization', 'fastapi_app', 8001),
+    'fraud': ServiceSpec('fraud', 'fraud_detection_api', 8002),
+}
+
+
+def request_reload():
+    """Ask the pre-fork master (if this process runs under one) to restart its workers gracefully."""
+    master_pid = os.environ.get(MASTER_PID_ENV)
+    if master_pid and hasattr(signal, 'SIGHUP'):
+        try:
+            os.kill(int(master_pid), signal.SIGHUP)
+        except (OSError, ValueError) as e:
+            print(f"Could not signal the pre-fork master {master_pid}: {e}")
+
+
+def _log_config(service: str) -> Dict:
+    """uvicorn's logging config, with the service name and worker pid on every line."""
+    config = copy.deepcopy(LOGGING_CONFIG)
+    for formatter in config['formatters'].values():
+        formatter['fmt'] = formatter['fmt'].replace('%(levelprefix)s', f'%(levelprefix)s [{service} %(process)d]', 1)
+    return config
+
+
+def _bind(host: str, port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+class PreforkMaster:
+    """Forks and supervises the worker processes of one or more services."""
+
+    def __init__(self, services: List[ServiceSpec], workers: int, host: str = '0.0.0.0'):
+        self.services = services
+        self.workers = workers
+        self.host = host
+        self.modules = {}
+        self.sockets = {}
+        self.children = {}  # pid -> (service, started_at)
+        self.retiring = set()
+        self.stopping = False
+        self.reload_requested = False
+
+    def _preload(self):
+        for spec in self.services:
+            print(f"Loading {spec.name} model in the master process...", flush=True)
+            self.modules[spec.name].preload_model()
+
+    def _spawn(self, spec: ServiceSpec):
+        pid = os.fork()
+        if pid:
+            self.children[pid] = (spec, time.monotonic())
+            return
+        exit_code = 0
+        try:
+            self._run_worker(spec)
+        except BaseException:
+            traceback.print_exc()
+            exit_code = 1
+        finally:
+            os._exit(exit_code)
+
+    def _run_worker(self, spec: ServiceSpec):
+        for signum in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, signal.SIG_DFL)
+        for name, sock in self.sockets.items():
+            if name != spec.name:
+                sock.close()
+        # Forked workers would otherwise share the master's random state
+        random.seed()
+        np.random.seed()
+        if 'AI_PROCESS_WORKERS' not in os.environ:
+            import executors
+            executors.PROCESS_WORKERS = max(1, executors.PROCESS_WORKERS // self.workers)
+
+        config = uvicorn.Config(self.modules[spec.name].app, log_config=_log_config(spec.name))
+        uvicorn.Server(config).run(sockets=[self.sockets[spec.name]])
+
+    def _spawn_generation(self):
+        for spec in self.services:
+            for _ in range(self.workers):
+                self._spawn(spec)
+
+    def _signal_children(self, pids, signum: int):
+        for pid in pids:
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+
+    def _restart(self):
+        print("SIGHUP received: reloading models and restarting workers...", flush=True)
+        try:
+            self._preload()
+        except Exception as e:
+            # Keep serving with the current workers rather than forking on a broken model
+            print(f"Reload failed, keeping the current workers: {e}", flush=True)
+            return
+        old = [pid for pid in self.children if pid not in self.retiring]
+        self._spawn_generation()
+        # New workers are already accepting on the shared sockets; the old ones drain and exit
+        self.retiring.update(old)
+        self._signal_children(old, signal.SIGTERM)
+
+    def _reap(self):
+        while self.children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            if pid not in self.children:
+                continue
+            spec, started_at = self.children.pop(pid)
+            if pid in self.retiring:
+                self.retiring.discard(pid)
+            elif not self.stopping:
+                print(f"{spec.name} worker {pid} exited with status {status}; starting a replacement.", flush=True)
+                if time.monotonic() - started_at < RESPAWN_DELAY:
+                    time.sleep(RESPAWN_DELAY)
+                self._spawn(spec)
+
+    def _shutdown(self):
+        print("Shutting down workers...", flush=True)
+        self._signal_children(list(self.children), signal.SIGTERM)
+        deadline = time.monotonic() + GRACEFUL_TIMEOUT
+        while self.children and time.monotonic() < deadline:
+            self._reap()
+            time.sleep(0.1)
+        if self.children:
+            print(f"Killing {len(self.children)} workers that did not exit in {GRACEFUL_TIMEOUT}s.", flush=True)
+            self._signal_children(list(self.children), signal.SIGKILL)
+            while self.children:
+                pid, _ = os.waitpid(-1, 0)
+                self.children.pop(pid, None)
+        for sock in self.sockets.values():
+            sock.close()
+
+    def run(self):
+        os.environ[MASTER_PID_ENV] = str(os.getpid())
+        for spec in self.services:
+            self.modules[spec.name] = importlib.import_module(spec.module)
+        self._preload()
+        for spec in self.services:
+            self.sockets[spec.name] = _bind(self.host, spec.port)
+            print(f"{spec.name}: {self.workers} workers on http://{self.host}:{spec.port}", flush=True)
+
+        def on_stop(signum, frame):
+            self.stopping = True
+
+        def on_hup(signum, frame):
+            self.reload_requested = True
+
+        signal.signal(signal.SIGTERM, on_stop)
+        signal.signal(signal.SIGINT, on_stop)
+        signal.signal(signal.SIGHUP, on_hup)
+
+        self._spawn_generation()
+        while not self.stopping:
+            if self.reload_requested:
+                self.reload_requested = False
+                self._restart()
+            self._reap()
+            time.sleep(0.2)
+        self._shutdown()
+
+
+def serve_without_fork(services: List[ServiceSpec], workers: int, host: str = '0.0.0.0'):
+    """Run each service under uvicorn's multi-process mode; workers load their own model."""
+    env = dict(os.environ, PYTHONUNBUFFERED='1')
+    processes = [
+        subprocess.Popen([sys.executable, '-m', 'uvicorn', f'{spec.module}:app', '--host', host,
+                          '--port', str(spec.port), '--workers', str(workers)], env=env)
+        for spec in services
+    ]
+    try:
+        for process in processes:
+            process.wait()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
+
+
+def serve(service_names: List[str], workers: int, host: str = '0.0.0.0'):
+    """Serve the named services with `workers` processes each, pre-forked where the platform allows."""
+    services = [SERVICES[name] for name in service_names]
+    if hasattr(os, 'fork'):
+        PreforkMaster(services, workers, host).run()
+    else:
+        print("os.fork is not available; each worker will load its own model.", flush=True)
+        serve_without_fork(services, workers, host)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve the AI services with pre-forked workers")
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('AI_SERVICE_WORKERS', '2')),
+                        help="Worker processes per service")
+    parser.add_argument('--services', nargs='+', choices=list(SERVICES), default=list(SERVICES))
+    parser.add_argument('--host', default='0.0.0.0')
+    args = parser.parse_args()
+
+    serve(args.services, args.workers, args.host)
@@ -0,0 +1,182 @@
+import sys
+import numpy as np
+from typing import Dict, List, Any, Callable, Mapping, NamedTuple, Tuple
+
+
+class Rule(NamedTuple):
+    code: int
+    message: str
+    condition: Callable[['Columns'], np.ndarray]
+
+
+class Columns:
+    """Column view of a batch; missing columns read as a constant default."""
+
+    def __init__(self, columns: Mapping[str, Any], n_rows: int):
+        self.columns = columns
+        self.n_rows = n_rows
+
+    def get(self, name: str, default: Any = 0, dtype: Any = float) -> np.ndarray:
+        if name not in self.columns:
+            return np.full(self.n_rows, default, dtype=dtype if dtype is not object else object)
+        values = np.asarray(self.columns[name])
+        if dtype is object:
+            return values.astype(object)
+        if values.dtype == object:
+            values = np.where(np.equal(values, None), default, values)
+        return values.astype(dtype)
+
+
+class ReasonCodeEngine:
+    """
+    Evaluates every rule as a boolean mask over a whole batch.
+    Each row's reasons are the codes of the rules that hold for it, in rule order;
+    messages are interned, and rows with the same combination of reasons share one
+    list of codes and one list of messages.
+    """
+
+    def __init__(self, rules: List[Rule]):
+        if len(rules) > 63:
+            raise ValueError("ReasonCodeEngine supports at most 63 rules")
+        self.rules = rules
+        self.codes = np.array([rule.code for rule in rules], dtype=np.int16)
+        self.messages = {rule.code: sys.intern(rule.message) for rule in rules}
+
+    def evaluate(self, columns: Mapping[str, Any], n_rows: int) -> np.ndarray:
+        """Boolean matrix of shape (n_rows, n_rules)."""
+        view = Columns(columns, n_rows)
+        mask = np.empty((n_rows, len(self.rules)), dtype=bool)
+        for j, rule in enumerate(self.rules):
+            mask[:, j] = rule.condition(view)
+        return mask
+
+    def reason_codes(self, mask: np.ndarray) -> List[np.ndarray]:
+        """Integer reason codes for each row of an evaluated mask."""
+        return [self.codes[row] for row in mask]
+
+    def pack(self, mask: np.ndarray) -> np.ndarray:
+        """One int64 per row with bit j set when rule j (code self.codes[j]) holds."""
+        return mask.astype(np.int64) @ (np.int64(1) << np.arange(len(self.rules), dtype=np.int64))
+
+    def code_table(self) -> List[int]:
+        """Reason codes in rule order, i.e. the code for each bit of pack()."""
+        return self.codes.tolist()
+
+    def message_table(self) -> List[str]:
+        """Messages in rule order, i.e. the meaning of each bit of pack()."""
+        return [self.messages[code] for code in self.codes]
+
+    def explain(self, columns: Mapping[str, Any], n_rows: int) -> Tuple[List[List[int]], List[List[str]]]:
+        """Reason codes and reason messages for each row."""
+        mask = self.evaluate(columns, n_rows)
+        if not n_rows:
+            return [], []
+
+        # Pack each row's mask into one integer and build codes/messages once per distinct pattern
+        _, first_row, inverse = np.unique(self.pack(mask), return_index=True, return_inverse=True)
+        pattern_codes = [codes.tolist() for codes in self.reason_codes(mask[first_row])]
+        pattern_messages = [[self.messages[code] for code in codes] for codes in pattern_codes]
+        inverse = inverse.ravel()
+        return [pattern_codes[i] for i in inverse], [pattern_messages[i] for i in inverse]
+
+    def reasons(self, columns: Mapping[str, Any], n_rows: int) -> List[List[str]]:
+        """Reason messages for each row."""
+        return self.explain(columns, n_rows)[1]
+
+
+# Reason codes for farmer prioritization (order matches the reasoning list shown to admins)
+PRIORITY_HIGH = 100
+PRIORITY_GOOD = 101
+PRIORITY_MODERATE = 102
+PRIORITY_LOW = 103
+LOW_INCOME = 110
+HIGH_INCOME = 111
+SMALL_LAND = 120
+LARGE_LAND = 121
+FIRST_TIME_APPLICANT = 130
+MULTIPLE_GRANTS = 131
+MARGINALIZED_CATEGORY = 140
+HAS_DISABILITY = 141
+HIGH_CONFIDENCE = 150
+LOW_CONFIDENCE = 151
+
+MARGINALIZED_CATEGORIES = ['dalit', 'janajati', 'madhesi']
+
+PRIORITY_RULES = [
+    Rule(PRIORITY_HIGH, "High priority score indicates strong need and eligibility",
+         lambda c: c.get('priority_score') >= 8.0),
+    Rule(PRIORITY_GOOD, "Good priority score shows eligibility for support",
+         lambda c: (c.get('priority_score') >= 6.0) & (c.get('priority_score') < 8.0)),
+    Rule(PRIORITY_MODERATE, "Moderate priority score - review additional factors",
+         lambda c: (c.get('priority_score') >= 4.0) & (c.get('priority_score') < 6.0)),
+    Rule(PRIORITY_LOW, "Low priority score - consider other applicants first",
+         lambda c: c.get('priority_score') < 4.0),
+    Rule(LOW_INCOME, "Low income level - high need for support",
+         lambda c: c.get('monthly_income') < 15000),
+    Rule(HIGH_INCOME, "Higher income level - lower priority",
+         lambda c: c.get('monthly_income') > 35000),
+    Rule(SMALL_LAND, "Small landholding - high priority for support",
+         lambda c: c.get('land_size_bigha') < 2),
+    Rule(LARGE_LAND, "Large landholding - lower priority",
+         lambda c: c.get('land_size_bigha') > 4),
+    Rule(FIRST_TIME_APPLICANT, "No previous grants - first-time applicant priority",
+         lambda c: c.get('previous_grants') == 0),
+    Rule(MULTIPLE_GRANTS, "Multiple previous grants - lower priority",
+         lambda c: c.get('previous_grants') > 1),
+    Rule(MARGINALIZED_CATEGORY, "Marginalized social category - inclusive development priority",
+         lambda c: np.isin(c.get('social_category', 'general', object), MARGINALIZED_CATEGORIES)),
+    Rule(HAS_DISABILITY, "Disability status - special consideration",
+         lambda c: c.get('has_disability', False, bool)),
+    Rule(HIGH_CONFIDENCE, "High confidence prediction",
+         lambda c: c.get('confidence') > 0.8),
+    Rule(LOW_CONFIDENCE, "Low confidence - manual review recommended",
+         lambda c: c.get('confidence') < 0.5)
+]
+
+# Reason codes for fraud risk factors
+FRAUD_HIGH_INCOME = 200
+FRAUD_VERY_LOW_INCOME = 201
+FRAUD_LARGE_LAND = 210
+FRAUD_VERY_SMALL_LAND = 211
+FRAUD_MULTIPLE_GRANTS = 220
+FRAUD_FIRST_TIME = 221
+FRAUD_HIGH_ANOMALY = 230
+FRAUD_MEDIUM_ANOMALY = 231
+
+FRAUD_RULES = [
+    Rule(FRAUD_HIGH_INCOME, "High income - may not need grant",
+         lambda c: c.get('monthly_income') > 30000),
+    Rule(FRAUD_VERY_LOW_INCOME, "Very low income - needs verification",
+         lambda c: c.get('monthly_income') < 8000),
+    Rule(FRAUD_LARGE_LAND, "Large land holding - may not need support",
+         lambda c: c.get('land_size_bigha') > 10),
+    Rule(FRAUD_VERY_SMALL_LAND, "Very small land - needs assessment",
+         lambda c: c.get('land_size_bigha') < 1),
+    Rule(FRAUD_MULTIPLE_GRANTS, "Multiple previous grants - potential abuse",
+         lambda c: c.get('previous_grants') > 3),
+    Rule(FRAUD_FIRST_TIME, "No previous grants - first-time applicant",
+         lambda c: c.get('previous_grants') == 0),
+    Rule(FRAUD_HIGH_ANOMALY, "High anomaly score - suspicious pattern",
+         lambda c: c.get('anomaly_score') < -0.3),
+    Rule(FRAUD_MEDIUM_ANOMALY, "Medium anomaly score - needs review",
+         lambda c: (c.get('anomaly_score') >= -0.3) & (c.get('anomaly_score') < -0.1))
+]
+
+priority_reasons = ReasonCodeEngine(PRIORITY_RULES)
+fraud_risk_factors = ReasonCodeEngine(FRAUD_RULES)
+
+
+def rank_contributions(contributions: np.ndarray, feature_columns: List[str],
+                       top_n: int = 3) -> List[List[Dict[str, Any]]]:
+    """
+    Top-N features by absolute logistic contribution (coefficient x scaled value) per row.
+    Ranking is one vectorized argsort over the whole batch.
+    """
+    top_n = min(top_n, contributions.shape[1])
+    order = np.argsort(-np.abs(contributions), axis=1, kind='stable')[:, :top_n]
+    values = np.round(np.take_along_axis(contributions, order, axis=1), 4).tolist()
+    names = [sys.intern(name) for name in feature_columns]
+    return [
+        [{'feature': names[j], 'contribution': v} for j, v in zip(row_order, row_values)]
+        for row_order, row_values in zip(order.tolist(), values)
+    ]
@@ -5,22 +5,30 @@ This script will:
 1. Generate the dataset if it doesn't exist
 2. Train the model if it doesn't exist
 3. Start the FastAPI service
+
+With --production, both services (prioritization on 8001, fraud detection on 8002)
+run with --workers pre-forked worker processes each; see prefork_server.py.
 """
 
+import argparse
 import os
 import sys
 import subprocess
 import time
 from pathlib import Path
 
-def run_command(command, description):
-    """Run a command and handle errors."""
+def run_command(command, description, stream=False):
+    """Run a command and handle errors. With stream=True its output is passed through as it is written."""
     print(f"\n{'='*50}")
     print(f"Running: {description}")
     print(f"Command: {command}")
-    print('='*50)
+    print('='*50, flush=True)
     
     try:
+        if stream:
+            subprocess.run(command, shell=True, check=True, env=dict(os.environ, PYTHONUNBUFFERED='1'))
+            print("✅ Success!")
+            return True
         result = subprocess.run(command, shell=True, check=True, capture_output=True, text=True)
         print("✅ Success!")
         if result.stdout:
@@ -28,7 +36,8 @@ def run_command(command, description):
         return True
     except subprocess.CalledProcessError as e:
         print("❌ Error!")
-        print("Error:", e.stderr)
+        if e.stderr:
+            print("Error:", e.stderr)
         return False
 
 def check_file_exists(filename):
@@ -36,6 +45,17 @@ def check_file_exists(filename):
     return Path(filename).exists()
 
 def main():
+    parser = argparse.ArgumentParser(description="Set up and start the AgriFairConnect AI service")
+    parser.add_argument('--retrain', action='store_true',
+                        help="Retrain at startup (reuses the training cache if nothing changed)")
+    parser.add_argument('--force', action='store_true', help="With --retrain, bypass the training cache")
+    parser.add_argument('--production', action='store_true',
+                        help="Serve both services with pre-forked workers sharing the preloaded models")
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('AI_SERVICE_WORKERS', '2')),
+                        help="Worker processes per service in --production mode")
+    parser.add_argument('--skip-install', action='store_true', help="Skip installing dependencies")
+    args = parser.parse_args()
+    
     print("🚀 Starting AgriFairConnect AI Service Setup")
     print("="*60)
     
@@ -46,7 +66,9 @@ def main():
     
     # Step 1: Install dependencies
     print("\n📦 Step 1: Installing dependencies...")
-    if not run_command("pip install -r requirements.txt", "Installing Python dependencies"):
+    if args.skip_install:
+        print("Skipped.")
+    elif not run_command("pip install -r requirements.txt", "Installing Python dependencies"):
         print("❌ Failed to install dependencies. Please check your Python environment.")
         sys.exit(1)
     
@@ -62,28 +84,33 @@ def main():
     
     # Step 3: Train model if it doesn't exist
     print("\n🤖 Step 3: Checking model...")
-    model_files = [
-        "farmer_prioritization_model.joblib",
-        "farmer_prioritization_scaler.joblib", 
-        "farmer_prioritization_encoders.joblib"
-    ]
-    
-    if not all(check_file_exists(f) for f in model_files):
-        print("Model files not found. Training new model...")
-        if not run_command("python ml_model.py", "Training ML model"):
+    if args.retrain or not check_file_exists("farmer_prioritization_bundle.joblib"):
+        print("Training model (cached result is reused if dataset and settings are unchanged)...")
+        train_command = "python ml_model.py --force" if args.force else "python ml_model.py"
+        if not run_command(train_command, "Training ML model"):
             print("❌ Failed to train model.")
             sys.exit(1)
     else:
         print("✅ Model already exists.")
     
-    # Step 4: Start FastAPI service
+    # Step 4: Start the services
+    if args.production:
+        print(f"\n🌐 Step 4: Starting services with {args.workers} workers each...")
+        print("Prioritization: http://localhost:8001  Fraud detection: http://localhost:8002")
+        print("Send SIGHUP to this process to reload the models and restart workers gracefully.")
+        print("\nPress Ctrl+C to stop the services.", flush=True)
+        
+        from prefork_server import serve
+        serve(['prioritization', 'fraud'], args.workers)
+        return
+    
     print("\n🌐 Step 4: Starting FastAPI service...")
     print("The AI service will be available at: http://localhost:8001")
     print("API documentation will be available at: http://localhost:8001/docs")
     print("\nPress Ctrl+C to stop the service.")
     
     try:
-        run_command("python fastapi_app.py", "Starting FastAPI service")
+        run_command("python fastapi_app.py", "Starting FastAPI service", stream=True)
     except KeyboardInterrupt:
         print("\n\n🛑 Service stopped by user.")
     except Exception as e:
@@ -0,0 +1,57 @@
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from bulk_score import bulk_score, iter_input_chunks
+from data_generator import generate_farmer_dataset
+from dataset_store import save_columns
+from ml_model import FarmerPrioritizationModel
+
+
+@pytest.fixture(scope='module')
+def farmers():
+    return generate_farmer_dataset(500)
+
+
+@pytest.fixture
+def workdir(farmers, tmp_path, monkeypatch):
+    """A saved model bundle plus the farmers as CSV and columnar input, in a scratch directory."""
+    monkeypatch.chdir(tmp_path)
+    model = FarmerPrioritizationModel()
+    model.train_model(farmers)
+    model.save_model()
+    farmers.to_csv('farmers.csv', index=False)
+    save_columns(farmers, 'farmers.npz')
+    return model
+
+
+def test_npz_chunks_are_streamed_like_csv_chunks(workdir):
+    usecols = ['farmer_id', 'monthly_income', 'crop_yield', 'not_a_column']
+    from_csv = list(iter_input_chunks('farmers.csv', 120, usecols, skip_chunks=2))
+    from_npz = list(iter_input_chunks('farmers.npz', 120, usecols, skip_chunks=2))
+
+    assert [index for index, _ in from_npz] == [index for index, _ in from_csv] == [2, 3, 4]
+    for (_, csv_chunk), (_, npz_chunk) in zip(from_csv, from_npz):
+        assert npz_chunk['farmer_id'].tolist() == csv_chunk['farmer_id'].tolist()
+        assert npz_chunk['crop_yield'].astype(str).tolist() == csv_chunk['crop_yield'].tolist()
+
+
+def test_npz_and_csv_inputs_score_the_same(workdir):
+    bulk_score('farmers.csv', 'from_csv.csv', chunksize=150, workers=1)
+    bulk_score('farmers.npz', 'from_npz.csv', chunksize=150, workers=1)
+    pd.testing.assert_frame_equal(pd.read_csv('from_npz.csv'), pd.read_csv('from_csv.csv'))
+    assert len(pd.read_csv('from_npz.csv')) == 500
+
+
+def test_resume_refuses_a_different_model(workdir):
+    checkpoint = {'input_path': os.path.abspath('farmers.csv'), 'chunksize': 150,
+                  'model_hash': 'some other model', 'chunks_done': 1, 'rows_done': 150, 'output_bytes': 0}
+    with open('scores.csv.progress.json', 'w') as f:
+        json.dump(checkpoint, f)
+
+    with pytest.raises(ValueError, match='model_hash'):
+        bulk_score('farmers.csv', 'scores.csv', chunksize=150, workers=1)
+    bulk_score('farmers.csv', 'scores.csv', chunksize=150, workers=1, restart=True)
+    assert len(pd.read_csv('scores.csv')) == 500
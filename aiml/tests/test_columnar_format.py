@@ -0,0 +1,43 @@
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+import fastapi_app
+from columnar_format import NPZ_MEDIA_TYPE, encode_columns, validate_meta
+from data_generator import generate_farmer_dataset
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # Option validation happens before any scoring, so a placeholder model will do
+    monkeypatch.setattr(fastapi_app, 'model', SimpleNamespace(model=object()))
+    return TestClient(fastapi_app.app)
+
+
+def _payload(meta):
+    farmers = generate_farmer_dataset(3)
+    columns = {name: farmers[name].to_numpy() for name in fastapi_app.FarmerData.model_fields}
+    return encode_columns(columns, meta)
+
+
+@pytest.mark.parametrize('meta', [{'top_k': 'many'}, {'min_score': [1]}, {'explain': 'maybe'}])
+def test_mistyped_meta_options_are_rejected(client, meta):
+    response = client.post('/predict/batch', content=_payload(meta), headers={'content-type': NPZ_MEDIA_TYPE})
+    assert response.status_code == 422
+    option = next(iter(meta))
+    assert response.json()['detail'][0]['loc'] == ['body', '__meta__', option]
+
+
+def test_top_k_below_one_is_a_bad_request(client):
+    response = client.post('/predict/batch', content=_payload({'top_k': 0}),
+                           headers={'content-type': NPZ_MEDIA_TYPE})
+    assert response.status_code == 400
+
+
+def test_meta_options_are_coerced_like_the_json_body():
+    options = validate_meta({'top_k': '5', 'min_score': 40, 'explain': 'true'},
+                            fastapi_app.BatchPredictionRequest, 'farmers')
+    assert (options.top_k, options.min_score, options.explain) == (5, 40.0, True)
+    defaults = validate_meta({}, fastapi_app.BatchPredictionRequest, 'farmers')
+    assert (defaults.top_k, defaults.min_score, defaults.explain) == (None, None, False)
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_generator import generate_farmer_dataset, generate_farmer_dataset_fast, write_large_dataset
+from dataset_store import load_columns
+
+
+def test_same_seed_same_rows():
+    first = generate_farmer_dataset_fast(700, seed=5, chunk_rows=250)
+    pd.testing.assert_frame_equal(first, generate_farmer_dataset_fast(700, seed=5, chunk_rows=250))
+    assert not first.equals(generate_farmer_dataset_fast(700, seed=6, chunk_rows=250))
+
+
+def test_chunks_continue_each_other():
+    df = generate_farmer_dataset_fast(700, seed=5, chunk_rows=250)
+    assert len(df) == 700
+    assert df['farmer_id'].is_unique
+    assert df['farmer_id'].iloc[[0, 250, 699]].tolist() == ['FARMER_001', 'FARMER_251', 'FARMER_700']
+    # A prefix with the same chunk plan reproduces the same leading chunks
+    pd.testing.assert_frame_equal(generate_farmer_dataset_fast(500, seed=5, chunk_rows=250), df.head(500))
+
+
+def test_schema_matches_the_original_generator():
+    fast = generate_farmer_dataset_fast(300, seed=1)
+    slow = generate_farmer_dataset(50)
+    assert list(fast.columns) == list(slow.columns)
+    assert fast['priority_score'].between(0, 10).all()
+    assert set(fast['application_status']) <= {'pending', 'approved', 'rejected'}
+    assert generate_farmer_dataset_fast(0).columns.tolist() == list(slow.columns)
+
+
+@pytest.mark.parametrize('n_jobs', [1, 2])
+def test_large_dataset_is_independent_of_workers(tmp_path, n_jobs):
+    csv_path = str(tmp_path / 'farmers.csv')
+    path = str(tmp_path / 'farmers.npz')
+    assert write_large_dataset(1100, csv_path, path, seed=9, chunk_rows=300, n_jobs=n_jobs) == 1100
+
+    expected = generate_farmer_dataset_fast(1100, seed=9, chunk_rows=300)
+    written = pd.read_csv(csv_path, dtype={'phone': str})
+    assert len(written) == 1100
+    assert written['farmer_id'].tolist() == expected['farmer_id'].tolist()
+    np.testing.assert_allclose(written['monthly_income'], expected['monthly_income'])
+    assert load_columns(path)['farmer_id'].tolist() == expected['farmer_id'].tolist()
+
+
+def test_large_dataset_without_columnar_file(tmp_path):
+    csv_path = str(tmp_path / 'farmers.csv')
+    write_large_dataset(10, csv_path, None, seed=9)
+    assert len(pd.read_csv(csv_path)) == 10
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['farmers.csv']
@@ -0,0 +1,94 @@
+import math
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+import dataset_stats
+import fastapi_app
+from data_generator import generate_farmer_dataset
+from dataset_stats import DatasetStats, DatasetStatsCache, STATS_COLUMNS
+from dataset_store import write_dataset, load_dataset, sync_dataset, StaleDatasetError
+
+
+@pytest.fixture(scope='module')
+def farmers():
+    return generate_farmer_dataset(300)
+
+
+@pytest.fixture
+def dataset(farmers, tmp_path, monkeypatch):
+    """The first 250 farmers written as the dataset, in a scratch working directory."""
+    monkeypatch.chdir(tmp_path)
+    write_dataset(farmers.head(250))
+    return farmers
+
+
+def test_merge_matches_a_full_scan(farmers):
+    columns = list(farmers.columns)
+    merged = DatasetStats.from_frame(farmers.head(100), columns).merge(
+        DatasetStats.from_frame(farmers.iloc[100:], columns))
+    expected = DatasetStats.from_frame(farmers, columns)
+
+    assert merged.count == expected.count
+    assert merged.mean == pytest.approx(expected.mean)
+    assert merged.m2 == pytest.approx(expected.m2)
+    assert merged.summary() == expected.summary()
+    assert merged.summary()['priority_score_stats']['median'] == round(farmers['priority_score'].median(), 2)
+    assert DatasetStats.from_dict(merged.to_dict()).summary() == merged.summary()
+
+
+def test_empty_stats():
+    summary = DatasetStats(['priority_score']).summary()
+    assert summary['total_farmers'] == 0
+    assert summary['priority_score_stats']['mean'] is None
+    assert math.isnan(DatasetStats(['priority_score']).median())
+
+
+def test_sidecar_is_shared_between_processes(dataset, monkeypatch):
+    summary, etag, last_modified = DatasetStatsCache().get()
+    assert summary['total_farmers'] == 250
+
+    # Another process reads the sidecar instead of rescanning the dataset
+    def no_rescan(*args, **kwargs):
+        raise AssertionError("dataset was rescanned")
+    monkeypatch.setattr(dataset_stats, 'load_dataset', no_rescan)
+    assert DatasetStatsCache().get() == (summary, etag, last_modified)
+
+
+def test_append_merges_without_a_rescan(dataset, monkeypatch):
+    cache = DatasetStatsCache()
+    _, etag, _ = cache.get()
+
+    monkeypatch.setattr(dataset_stats, 'load_dataset', lambda *args, **kwargs: pytest.fail("rescanned"))
+    summary, appended_etag, _ = cache.append_farmers(dataset.iloc[250:])
+    assert appended_etag != etag
+    assert cache.get()[:2] == (summary, appended_etag)
+
+    # The appended rows are in the CSV; the columnar file is only brought up to date by a sync
+    with pytest.raises(StaleDatasetError):
+        load_dataset(columns=STATS_COLUMNS)
+    assert sync_dataset()
+    full = DatasetStats.from_frame(load_dataset(columns=STATS_COLUMNS), summary['columns']).summary()
+    assert summary == full
+    assert summary['total_farmers'] == 300
+
+
+def test_stats_endpoint_revalidation(dataset, monkeypatch):
+    monkeypatch.setattr(fastapi_app, 'data_stats', DatasetStatsCache())
+    client = TestClient(fastapi_app.app)
+
+    response = client.get('/data/stats')
+    assert response.status_code == 200
+    assert response.json()['total_farmers'] == 250
+    assert response.headers['cache-control'] == 'no-cache'
+    etag, last_modified = response.headers['etag'], response.headers['last-modified']
+
+    assert client.get('/data/stats', headers={'If-None-Match': etag}).status_code == 304
+    assert client.get('/data/stats', headers={'If-Modified-Since': last_modified}).status_code == 304
+    assert client.get('/data/stats', headers={'If-None-Match': '"stale"'}).status_code == 200
+
+    fastapi_app.data_stats.append_farmers(dataset.iloc[250:])
+    response = client.get('/data/stats', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.json()['total_farmers'] == 300
@@ -0,0 +1,92 @@
+import os
+
+import pandas as pd
+import pytest
+
+import dataset_store
+from data_generator import generate_farmer_dataset
+from dataset_store import (ColumnarWriter, StaleDatasetError, append_dataset, dataset_is_current, load_columns,
+                           load_dataset, save_columns, sync_dataset, write_dataset)
+
+
+@pytest.fixture
+def farmers(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return generate_farmer_dataset(60)
+
+
+def _files(path):
+    with open(path, 'rb') as f:
+        return os.stat(path).st_mtime_ns, f.read()
+
+
+def test_load_never_writes_a_stale_dataset(farmers):
+    write_dataset(farmers.head(40))
+    before = _files('farmer_dataset.npz')
+    farmers.to_csv('farmer_dataset.csv', index=False)
+
+    with pytest.raises(StaleDatasetError):
+        load_dataset()
+    assert _files('farmer_dataset.npz') == before
+
+    assert sync_dataset()
+    assert not sync_dataset()
+    assert len(load_dataset()) == 60
+
+
+def test_missing_columnar_file_needs_an_import(farmers):
+    farmers.to_csv('farmer_dataset.csv', index=False)
+    with pytest.raises(StaleDatasetError):
+        load_dataset()
+    assert not os.path.exists('farmer_dataset.npz')
+
+    sync_dataset()
+    assert load_dataset(['farmer_id'])['farmer_id'].tolist() == farmers['farmer_id'].tolist()
+
+
+def test_touched_csv_is_still_current(farmers):
+    write_dataset(farmers)
+    os.utime('farmer_dataset.csv', ns=(1, 1))
+    assert dataset_is_current()
+    assert not sync_dataset()
+
+
+def test_columnar_file_without_csv_is_current(farmers):
+    save_columns(farmers, 'only.npz')
+    assert dataset_is_current('only.npz', 'missing.csv')
+    assert len(load_dataset(path='only.npz', csv_path='missing.csv')) == 60
+
+
+def test_writers_use_their_own_temporary_files(farmers):
+    first, second = ColumnarWriter('farmer_dataset.npz'), ColumnarWriter('farmer_dataset.npz')
+    assert first.tmp_path != second.tmp_path
+    first.append(farmers.head(30))
+    second.append(farmers)
+    # A writer discarding its work leaves the other's archive alone
+    first.discard()
+    second.close()
+    save_columns(farmers, 'reference.npz')
+    pd.testing.assert_frame_equal(load_columns('farmer_dataset.npz'), load_columns('reference.npz'))
+    assert [name for name in os.listdir('.') if '.tmp' in name] == []
+
+
+def test_append_after_a_load_does_not_re_export(farmers, monkeypatch):
+    write_dataset(farmers.head(40))
+    assert len(load_dataset()) == 40
+    # A columnar file written after the CSV is not taken as the newer copy
+    os.utime('farmer_dataset.npz', ns=(2 * 10 ** 18, 2 * 10 ** 18))
+    monkeypatch.setattr(dataset_store, 'export_csv', lambda *args: pytest.fail("CSV was re-exported"))
+
+    append_dataset(farmers.iloc[40:50])
+    append_dataset(farmers.iloc[50:])
+    assert not dataset_is_current()
+    assert sync_dataset()
+    assert load_dataset(['farmer_id'])['farmer_id'].tolist() == farmers['farmer_id'].tolist()
+
+
+def test_append_to_a_columnar_only_dataset_exports_once(farmers):
+    save_columns(farmers.head(40), 'farmer_dataset.npz')
+    append_dataset(farmers.iloc[40:])
+    assert len(pd.read_csv('farmer_dataset.csv')) == 60
+    sync_dataset()
+    assert len(load_dataset()) == 60
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from fraud_detection_api import detect_applications
+from fraud_detection_model import FraudDetectionModel, generate_fraud_dataset, risk_level_codes, RISK_LEVELS
+from reason_codes import fraud_risk_factors
+
+FIELDS = ['farmer_id', 'farmer_name', 'monthly_income', 'land_size_bigha', 'previous_grants']
+
+
+@pytest.fixture(scope='module')
+def detector():
+    detector = FraudDetectionModel()
+    detector.train_model(generate_fraud_dataset(800, seed=1))
+    return detector
+
+
+@pytest.fixture(scope='module')
+def applications():
+    applications = generate_fraud_dataset(250, seed=5)
+    applications['farmer_name'] = [f'Farmer {i}' for i in range(len(applications))]
+    return applications
+
+
+def reference_level(score):
+    """The per-row thresholds the vectorized risk levels replace."""
+    if score < -0.3:
+        return 'High Risk'
+    if score < -0.1:
+        return 'Medium Risk'
+    return 'Low Risk'
+
+
+def test_risk_levels_at_the_thresholds():
+    scores = np.array([-0.5, -0.3, -0.30001, -0.2, -0.1, -0.10001, 0.0, 0.2])
+    assert [RISK_LEVELS[code] for code in risk_level_codes(scores)] == [reference_level(s) for s in scores]
+
+
+def test_results_match_row_by_row_assembly(detector, applications):
+    detection = detect_applications(detector, applications)
+    predictions = detector.predict_fraud(applications)
+    scores = predictions['scores']
+    risk_factors = fraud_risk_factors.reasons(
+        {'monthly_income': applications['monthly_income'].to_numpy(),
+         'land_size_bigha': applications['land_size_bigha'].to_numpy(),
+         'previous_grants': applications['previous_grants'].to_numpy(),
+         'anomaly_score': scores}, len(applications))
+
+    assert len(detection['results']) == len(applications)
+    for i, (row, result) in enumerate(zip(applications.to_dict('records'), detection['results'])):
+        assert {field: result[field] for field in FIELDS} == {field: row[field] for field in FIELDS}
+        assert result['is_fraudulent'] is bool(scores[i] < 0)
+        assert result['anomaly_score'] == float(scores[i])
+        assert result['risk_level'] == reference_level(scores[i])
+        assert result['risk_factors'] == risk_factors[i]
+
+    levels = [reference_level(score) for score in scores]
+    assert detection['risk_distribution'] == {level: levels.count(level) for level in RISK_LEVELS}
+    assert detection['fraud_detected'] == int(np.sum(scores < 0))
+    assert detection['average_anomaly_score'] == pytest.approx(float(np.mean(scores)))
+
+
+def test_columnar_results_match_json(detector, applications):
+    detection = detect_applications(detector, applications)
+    columnar = detect_applications(detector, applications, columnar=True)
+    columns, meta = columnar['columns'], columnar['meta']
+
+    assert columns['risk_level'].tolist() == [result['risk_level'] for result in detection['results']]
+    assert columns['is_fraudulent'].tolist() == [result['is_fraudulent'] for result in detection['results']]
+    for key in ('total_applications', 'fraud_detected', 'risk_distribution', 'average_anomaly_score'):
+        assert meta[key] == detection[key]
+    messages = meta['risk_messages']
+    for mask, result in zip(columns['risk_mask'].tolist(), detection['results']):
+        assert [message for j, message in enumerate(messages) if mask >> j & 1] == result['risk_factors']
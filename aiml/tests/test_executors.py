@@ -0,0 +1,58 @@
+import asyncio
+import os
+
+import pytest
+
+import executors
+from executors import ModelPool, run_batch
+
+
+class Model:
+    """Counts how many times it is unpickled, i.e. sent to a worker."""
+
+    def __init__(self, name):
+        self.name = name
+        self.copies = 0
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.copies += 1
+
+
+def score(model, rows):
+    return model.name, model.copies, os.getpid(), [row * 2 for row in rows]
+
+
+@pytest.fixture
+def model_pool(monkeypatch):
+    monkeypatch.setattr(executors, 'PROCESS_WORKERS', 1)
+    monkeypatch.setattr(executors, 'LARGE_BATCH_ROWS', 3)
+    model_pool = ModelPool(Model('first'))
+    yield model_pool
+    model_pool.shutdown()
+
+
+def test_small_batches_use_the_served_model_in_process(model_pool):
+    name, copies, pid, scored = asyncio.run(run_batch(model_pool, score, 2, [1, 2]))
+    assert (name, copies, pid, scored) == ('first', 0, os.getpid(), [2, 4])
+
+
+def test_workers_load_the_model_once(model_pool):
+    async def main():
+        return [await run_batch(model_pool, score, 3, [i, i, i]) for i in range(3)]
+
+    results = asyncio.run(main())
+    assert [scored for *_, scored in results] == [[0, 0, 0], [2, 2, 2], [4, 4, 4]]
+    # One worker, sent the model once by the initializer rather than with every batch
+    assert {(name, copies, pid) for name, copies, pid, _ in results} == {('first', 1, results[0][2])}
+    assert results[0][2] != os.getpid()
+
+
+def test_set_model_restarts_the_workers(model_pool):
+    first = asyncio.run(run_batch(model_pool, score, 3, [1, 2, 3]))
+    model_pool.set_model(Model('second'))
+    second = asyncio.run(run_batch(model_pool, score, 3, [1, 2, 3]))
+
+    assert first[0] == 'first' and second[0] == 'second'
+    assert second[1] == 1
+    assert second[2] != first[2]
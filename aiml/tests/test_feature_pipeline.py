@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import LabelEncoder
+
+from feature_pipeline import FrozenFeatureTransformer
+
+FEATURES = ['monthly_income', 'crop_yield', 'has_irrigation']
+FILL_VALUES = {'monthly_income': 20000, 'crop_yield': 'medium', 'has_irrigation': False}
+
+
+@pytest.fixture
+def transformer():
+    encoders = {'crop_yield': LabelEncoder().fit(['high', 'low', 'medium'])}
+    return FrozenFeatureTransformer.from_training_state(FEATURES, encoders, FILL_VALUES)
+
+
+def test_categories_use_training_codes(transformer):
+    x = transformer.transform_one({'monthly_income': 12000, 'crop_yield': 'low', 'has_irrigation': True})
+    np.testing.assert_array_equal(x, [12000.0, 1.0, 1.0])
+
+
+def test_missing_and_unseen_values_use_training_mode(transformer):
+    mode_code = transformer.category_maps['crop_yield']['medium']
+    x = transformer.transform_one({'crop_yield': 'excellent', 'has_irrigation': None})
+    np.testing.assert_array_equal(x, [20000.0, mode_code, 0.0])
+
+    x = transformer.transform_one({'monthly_income': np.nan, 'crop_yield': None, 'has_irrigation': True})
+    np.testing.assert_array_equal(x, [20000.0, mode_code, 1.0])
+
+
+def test_batch_matches_single_rows(transformer):
+    farmers = pd.DataFrame({
+        'monthly_income': [12000.0, np.nan, 41000.0, 8000.0],
+        'crop_yield': ['low', None, 'excellent', 'high'],
+        'has_irrigation': [True, False, None, True]
+    })
+    expected = np.array([transformer.transform_one(farmer) for farmer in farmers.to_dict('records')])
+    np.testing.assert_array_equal(transformer.transform_batch(farmers), expected)
+    # A dict of lists and a batch missing a whole column are handled the same way
+    np.testing.assert_array_equal(transformer.transform_batch(farmers.to_dict('list')), expected)
+    np.testing.assert_array_equal(
+        transformer.transform_batch(farmers.drop(columns=['monthly_income']))[:, 0], [20000.0] * 4
+    )
+
+
+def test_missing_fill_value_is_an_error():
+    transformer = FrozenFeatureTransformer.from_training_state(['age'], {}, {})
+    with pytest.raises(ValueError):
+        transformer.transform_one({})
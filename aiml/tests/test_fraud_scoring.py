@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from fraud_detection_model import FraudDetectionModel, generate_fraud_dataset
+
+
+@pytest.fixture(scope='module')
+def detector():
+    detector = FraudDetectionModel()
+    detector.train_model(generate_fraud_dataset(800, seed=1))
+    return detector
+
+
+@pytest.fixture(scope='module')
+def applications():
+    return generate_fraud_dataset(300, seed=2)
+
+
+def test_scaling_uses_the_training_scaler(detector, applications):
+    mean = detector.scaler.mean_.copy()
+    X_scaled, X = detector.prepare_features(applications)
+    np.testing.assert_allclose(X_scaled, detector.scaler.transform(X))
+    # Scoring does not refit anything
+    detector.predict_fraud(applications.head(5))
+    np.testing.assert_array_equal(detector.scaler.mean_, mean)
+
+
+def test_score_does_not_depend_on_the_batch(detector, applications):
+    batch = detector.predict_fraud(applications)['scores']
+    single = [detector.predict_fraud(row)['scores'][0]
+              for row in applications.head(20).to_dict('records')]
+    np.testing.assert_allclose(single, batch[:20])
+
+
+def test_input_shapes_agree(detector, applications):
+    head = applications.head(10)
+    expected = detector.predict_fraud(head)['scores']
+    np.testing.assert_array_equal(detector.predict_fraud(head.to_dict('records'))['scores'], expected)
+
+
+def test_missing_values_use_training_medians(detector, applications):
+    row = applications.iloc[0].to_dict()
+    filled = dict(row, land_size_bigha=detector.fill_values[detector.feature_names.index('land_size_bigha')])
+    missing = dict(row, land_size_bigha=None)
+    np.testing.assert_array_equal(detector.predict_fraud(missing)['scores'], detector.predict_fraud(filled)['scores'])
+
+
+def test_predictions_match_isolation_forest(detector, applications):
+    result = detector.predict_fraud(applications)
+    X_scaled, _ = detector.prepare_features(applications)
+    np.testing.assert_array_equal(result['predictions'], detector.model.predict(X_scaled) == -1)
+    assert set(result['risk_level']) <= {'High Risk', 'Medium Risk', 'Low Risk'}
+
+
+def test_save_load_round_trip(detector, applications, tmp_path, monkeypatch):
+    # save_model also exports the flattened scorer into the working directory
+    monkeypatch.chdir(tmp_path)
+    path = str(tmp_path / 'fraud.pkl')
+    detector.save_model(path)
+    loaded = FraudDetectionModel()
+    loaded.load_model(path)
+    np.testing.assert_array_equal(loaded.fill_values, detector.fill_values)
+    np.testing.assert_allclose(loaded.predict_fraud(applications)['scores'],
+                               detector.predict_fraud(applications)['scores'])
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_generator import generate_farmer_dataset
+from dataset_store import iter_columns, iter_dataset_chunks, load_dataset, save_columns, write_dataset
+from ml_model import FarmerPrioritizationModel
+
+
+@pytest.fixture
+def farmers(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return generate_farmer_dataset(600)
+
+
+def test_chunks_match_the_full_load(farmers):
+    save_columns(farmers, 'farmers.npz', compress=True)
+    full = load_dataset(path='farmers.npz', csv_path='missing.csv')
+    columns = ['farmer_id', 'crop_yield', 'monthly_income', 'has_irrigation', 'registration_date']
+
+    chunks = list(iter_dataset_chunks(columns, 250, 'farmers.npz', 'missing.csv'))
+    assert [len(chunk) for chunk in chunks] == [250, 250, 100]
+    pd.testing.assert_frame_equal(pd.concat(chunks), full[columns])
+
+    skipped = pd.concat(iter_columns('farmers.npz', columns, 200, skip_rows=300))
+    pd.testing.assert_frame_equal(skipped, full[columns].iloc[300:])
+
+
+def test_fill_values_are_the_training_modes(farmers):
+    write_dataset(farmers)
+    model = FarmerPrioritizationModel()
+    model.train_incremental(chunksize=128, epochs=1, holdout_fraction=0.0)
+
+    expected = FarmerPrioritizationModel().compute_fill_values(load_dataset())
+    assert model.fill_values == {col: expected[col] for col in model.feature_columns}
+
+
+def test_feature_missing_everywhere_is_skipped(farmers):
+    farmers['crop_yield'] = np.nan
+    write_dataset(farmers)
+    model = FarmerPrioritizationModel()
+    results = model.train_incremental(chunksize=200, epochs=1)
+
+    assert 'crop_yield' not in model.feature_columns
+    assert 'crop_yield' not in model.label_encoders
+    assert results['n_train'] + results['n_holdout'] == 600
+    assert len(model.predict_priority_batch(farmers.head(5))) == 5
@@ -0,0 +1,86 @@
+import copy
+
+import numpy as np
+import pytest
+from sklearn.ensemble import IsolationForest
+
+from fraud_detection_model import FraudDetectionModel, generate_fraud_dataset
+from isolation_forest_scorer import FlatIsolationForestScorer
+
+
+def _check_points(rng, n_features, n_rows=500):
+    # Mostly typical points plus some far out, so both leaf-depth extremes are exercised
+    X = rng.normal(0.0, 1.0, (n_rows, n_features))
+    X[::10] *= 6.0
+    return X
+
+
+@pytest.fixture(scope='module')
+def detector():
+    detector = FraudDetectionModel()
+    detector.train_model(generate_fraud_dataset(1500, seed=3))
+    return detector
+
+
+@pytest.mark.parametrize('max_features', [1.0, 0.5, 2])
+def test_flat_scorer_matches_decision_function(max_features):
+    rng = np.random.default_rng(0)
+    X = _check_points(rng, 6, 800)
+    forest = IsolationForest(n_estimators=50, max_samples=128, max_features=max_features,
+                             contamination=0.1, random_state=0).fit(X)
+
+    scorer = FlatIsolationForestScorer.from_fitted(forest)
+    X_check = _check_points(rng, 6)
+    np.testing.assert_allclose(scorer.decision_function(X_check), forest.decision_function(X_check),
+                               rtol=0, atol=1e-12)
+    np.testing.assert_array_equal(scorer.predict(X_check), forest.predict(X_check))
+
+
+def test_trained_detector_scorer_matches_sklearn(detector):
+    X = _check_points(np.random.default_rng(1), detector.scorer.n_features)
+    np.testing.assert_allclose(detector.scorer.decision_function(X), detector.model.decision_function(X),
+                               rtol=0, atol=1e-12)
+
+
+def test_warm_started_forest_with_retired_trees():
+    rng = np.random.default_rng(4)
+    forest = IsolationForest(n_estimators=40, max_samples=128, max_features=0.5, random_state=0)
+    forest.fit(_check_points(rng, 6, 800))
+    # Add trees fit on newer data, then retire the oldest ones (as incremental updates do)
+    forest.set_params(warm_start=True, n_estimators=60, random_state=1)
+    forest.fit(_check_points(rng, 6, 800) + 0.5)
+    for attribute in ['estimators_', 'estimators_features_', '_seeds',
+                      '_average_path_length_per_tree', '_decision_path_lengths']:
+        if hasattr(forest, attribute):
+            setattr(forest, attribute, getattr(forest, attribute)[20:])
+    forest.set_params(warm_start=False, n_estimators=len(forest.estimators_))
+
+    scorer = FlatIsolationForestScorer.from_fitted(forest)
+    assert len(scorer.roots) == 40
+    X = _check_points(rng, 6)
+    np.testing.assert_allclose(scorer.decision_function(X), forest.decision_function(X), rtol=0, atol=1e-12)
+
+
+def test_update_model_retires_the_oldest_trees(detector):
+    # update_model swaps in a new forest, so work on a copy of the shared detector
+    updated = copy.deepcopy(detector)
+    updated.update_model(generate_fraud_dataset(800, seed=5), n_new_trees=30, max_trees=100)
+    result = updated.update_model(generate_fraud_dataset(800, seed=6), n_new_trees=30, max_trees=100)
+
+    assert result['trees_retired'] == 30 and result['total_trees'] == 100
+    assert result['oldest_generation'] == 0
+    model = updated.model
+    assert len(model._seeds) == len(model.estimators_) == len(updated.tree_generations) == 100
+    assert len(model.estimators_features_) == 100
+    X = _check_points(np.random.default_rng(2), updated.scorer.n_features)
+    np.testing.assert_allclose(updated.scorer.decision_function(X), model.decision_function(X),
+                               rtol=0, atol=1e-12)
+    assert len(detector.model.estimators_) == 100 and detector.generation == 0
+
+
+def test_scorer_save_load_round_trip(detector, tmp_path):
+    path = str(tmp_path / 'scorer.npz')
+    detector.scorer.save(path)
+    loaded = FlatIsolationForestScorer.load(path)
+    X = _check_points(np.random.default_rng(3), loaded.n_features)
+    np.testing.assert_array_equal(loaded.decision_function(X), detector.scorer.decision_function(X))
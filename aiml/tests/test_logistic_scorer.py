@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import StandardScaler
+
+from data_generator import generate_farmer_dataset
+from logistic_scorer import FoldedLogisticScorer
+from ml_model import FarmerPrioritizationModel
+
+REQUEST_COLUMNS = ['priority_score', 'application_status', 'registration_date', 'last_updated']
+
+
+@pytest.fixture(scope='module')
+def farmers():
+    return generate_farmer_dataset(1200)
+
+
+@pytest.fixture(scope='module')
+def trained_model(farmers):
+    model = FarmerPrioritizationModel()
+    model.train_model(farmers)
+    return model
+
+
+def test_folded_scorer_matches_predict_proba():
+    rng = np.random.default_rng(0)
+    # Features on very different scales, as in the farmer data (income vs. grants)
+    X = rng.normal(0.0, 1.0, (500, 4)) * [20000.0, 2.0, 1.0, 150.0] + [25000.0, 3.0, 1.0, 600.0]
+    y = (X[:, 0] < 25000.0) ^ (rng.random(500) < 0.2)
+    scaler = StandardScaler().fit(X)
+    classifier = LogisticRegression().fit(scaler.transform(X), y)
+
+    scorer = FoldedLogisticScorer.from_fitted(classifier, scaler, ['a', 'b', 'c', 'd'])
+    X_check = rng.normal(0.0, 2.0, (200, 4)) * scaler.scale_ + scaler.mean_
+    expected = classifier.predict_proba(scaler.transform(X_check))[:, 1]
+    np.testing.assert_allclose(scorer.predict_proba(X_check), expected, rtol=0, atol=1e-12)
+    np.testing.assert_allclose([scorer.predict_proba_one(x) for x in X_check], expected, rtol=0, atol=1e-12)
+
+
+def test_trained_model_scorer_matches_sklearn(trained_model, farmers):
+    X = trained_model.transformer.transform_batch(farmers)
+    expected = trained_model.model.predict_proba(trained_model.scaler.transform(X))[:, 1]
+    np.testing.assert_allclose(trained_model.scorer.predict_proba(X), expected, rtol=0, atol=1e-12)
+
+
+def test_scorer_save_load_round_trip(trained_model, farmers, tmp_path):
+    path = str(tmp_path / 'scorer.npz')
+    trained_model.scorer.save(path)
+    loaded = FoldedLogisticScorer.load(path)
+    X = trained_model.transformer.transform_batch(farmers.head(50))
+    np.testing.assert_array_equal(loaded.predict_proba(X), trained_model.scorer.predict_proba(X))
+
+
+def test_predict_priority_matches_batch(trained_model, farmers):
+    requests = farmers.drop(columns=REQUEST_COLUMNS).head(200)
+    batch = trained_model.predict_priority_batch(requests)
+    single = pd.DataFrame([trained_model.predict_priority(farmer) for farmer in requests.to_dict('records')])
+    pd.testing.assert_frame_equal(single[batch.columns], batch, check_dtype=False)
+
+
+def test_priority_score_fills_missing_values(trained_model, farmers):
+    requests = farmers.drop(columns=REQUEST_COLUMNS).head(20).astype({'monthly_income': object})
+    requests.loc[::2, 'monthly_income'] = None
+    requests = requests.drop(columns=['land_size_bigha'])
+    batch = trained_model.predict_priority_batch(requests)
+    single = pd.DataFrame([trained_model.predict_priority(farmer) for farmer in requests.to_dict('records')])
+    pd.testing.assert_frame_equal(single[batch.columns], batch, check_dtype=False)
+
+    fill_values = trained_model.fill_values
+    filled = requests.assign(monthly_income=requests['monthly_income'].fillna(fill_values['monthly_income']),
+                             land_size_bigha=fill_values['land_size_bigha'])
+    np.testing.assert_array_equal(batch['priority_score'],
+                                  trained_model.predict_priority_batch(filled)['priority_score'])
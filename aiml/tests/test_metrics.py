@@ -0,0 +1,39 @@
+from fastapi.testclient import TestClient
+
+import fastapi_app
+import fraud_detection_api
+import metrics
+
+
+def test_each_app_serves_its_own_registry():
+    prioritization = TestClient(fastapi_app.app)
+    fraud = TestClient(fraud_detection_api.app)
+    assert prioritization.get('/').status_code == 200
+
+    served = prioritization.get('/metrics')
+    assert served.headers['content-type'] == metrics.METRICS_MEDIA_TYPE
+    assert 'ai_request_duration_seconds_count{service="prioritization",endpoint="/"' in served.text
+    assert 'service="prioritization"' not in fraud.get('/metrics').text
+    assert fastapi_app.app_metrics is not fraud_detection_api.app_metrics
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = metrics.MetricsRegistry()
+    for rows in [1, 3, 3, 100000]:
+        registry.batch_size.observe(rows, 'svc', '/x')
+    lines = registry.render().splitlines()
+    assert 'ai_batch_size_rows_bucket{service="svc",endpoint="/x",le="1"} 1' in lines
+    assert 'ai_batch_size_rows_bucket{service="svc",endpoint="/x",le="4"} 3' in lines
+    assert 'ai_batch_size_rows_bucket{service="svc",endpoint="/x",le="65536"} 3' in lines
+    assert 'ai_batch_size_rows_bucket{service="svc",endpoint="/x",le="+Inf"} 4' in lines
+    assert 'ai_batch_size_rows_count{service="svc",endpoint="/x"} 4' in lines
+
+
+def test_model_loads_are_recorded_per_registry():
+    registry = metrics.MetricsRegistry()
+    registry.observe_model_load('prioritization', 0.25)
+    registry.observe_model_load('prioritization', None)
+    text = registry.render()
+    assert 'ai_model_load_seconds{model="prioritization"} 0.25' in text
+    assert 'ai_model_loads_total{model="prioritization"} 1' in text
+    assert 'ai_model_loads_total{' not in metrics.MetricsRegistry().render()
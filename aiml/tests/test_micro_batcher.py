@@ -0,0 +1,114 @@
+import asyncio
+import time
+
+import pytest
+
+from micro_batcher import MicroBatcher
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_concurrent_requests_are_scored_together():
+    calls = []
+
+    def score_batch(items):
+        calls.append(list(items))
+        return [item * 10 for item in items]
+
+    async def main():
+        batcher = MicroBatcher(score_batch, max_batch_size=4, max_wait_ms=50)
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(10)))
+        await batcher.close()
+        return results, batcher.get_stats()
+
+    results, stats = run(main())
+    assert results == [i * 10 for i in range(10)]
+    # A full batch flushes without waiting for the window
+    assert [len(items) for items in calls] == [4, 4, 2]
+    assert [item for items in calls for item in items] == list(range(10))
+    assert stats['requests'] == 10 and stats['batches'] == 3
+    assert stats['batch_size_counts'] == {'2': 1, '4': 2}
+
+
+def test_lone_request_flushes_when_the_window_closes():
+    async def main():
+        batcher = MicroBatcher(lambda items: items, max_batch_size=64, max_wait_ms=30)
+        started = time.perf_counter()
+        result = await batcher.submit('a')
+        elapsed = time.perf_counter() - started
+        await batcher.close()
+        return result, elapsed
+
+    result, elapsed = run(main())
+    assert result == 'a'
+    assert 0.025 <= elapsed < 1.0
+
+
+def test_async_score_batch():
+    async def score_batch(items):
+        await asyncio.sleep(0)
+        return [item.upper() for item in items]
+
+    async def main():
+        batcher = MicroBatcher(score_batch, max_wait_ms=5)
+        results = await asyncio.gather(batcher.submit('a'), batcher.submit('b'))
+        await batcher.close()
+        return results
+
+    assert run(main()) == ['A', 'B']
+
+
+def test_failure_reaches_every_caller_in_the_batch_only():
+    def score_batch(items):
+        if 'bad' in items:
+            raise ValueError('bad batch')
+        return items
+
+    async def main():
+        batcher = MicroBatcher(score_batch, max_wait_ms=20)
+        failed = await asyncio.gather(batcher.submit('bad'), batcher.submit('ok'), return_exceptions=True)
+        # The worker keeps serving after a failed batch
+        recovered = await batcher.submit('ok')
+        await batcher.close()
+        return failed, recovered, batcher.get_stats()
+
+    failed, recovered, stats = run(main())
+    assert all(isinstance(result, ValueError) for result in failed)
+    assert recovered == 'ok'
+    assert stats['failed_batches'] == 1
+
+
+def test_wrong_result_count_is_an_error():
+    async def main():
+        batcher = MicroBatcher(lambda items: items[:1], max_wait_ms=20)
+        results = await asyncio.gather(batcher.submit(1), batcher.submit(2), return_exceptions=True)
+        await batcher.close()
+        return results
+
+    assert all(isinstance(result, RuntimeError) for result in run(main()))
+
+
+def test_close_cancels_queued_requests():
+    async def main():
+        release = asyncio.Event()
+
+        async def score_batch(items):
+            await release.wait()
+            return items
+
+        batcher = MicroBatcher(score_batch, max_batch_size=1, max_wait_ms=0)
+        asyncio.ensure_future(batcher.submit(1))
+        queued = asyncio.ensure_future(batcher.submit(2))
+        await asyncio.sleep(0.01)
+        await batcher.close()
+        await asyncio.sleep(0)
+        return queued.cancelled()
+
+    assert run(main())
+
+
+def test_invalid_batch_size():
+    with pytest.raises(ValueError):
+        MicroBatcher(lambda items: items, max_batch_size=0)
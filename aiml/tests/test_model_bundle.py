@@ -0,0 +1,64 @@
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_generator import generate_farmer_dataset
+from ml_model import FarmerPrioritizationModel, BUNDLE_FORMAT_VERSION
+
+REQUEST_COLUMNS = ['priority_score', 'application_status', 'registration_date', 'last_updated']
+
+
+@pytest.fixture(scope='module')
+def farmers():
+    return generate_farmer_dataset(600)
+
+
+@pytest.fixture(scope='module')
+def trained_model(farmers):
+    model = FarmerPrioritizationModel()
+    model.train_model(farmers)
+    return model
+
+
+@pytest.fixture
+def bundle_path(trained_model, tmp_path, monkeypatch):
+    # save_model also exports the scorer next to the bundle, relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    trained_model.save_model()
+    return str(tmp_path / trained_model.bundle_path)
+
+
+def test_bundle_round_trip(trained_model, farmers, bundle_path):
+    loaded = FarmerPrioritizationModel()
+    assert loaded.load_model(bundle_path)
+    assert loaded.feature_columns == trained_model.feature_columns
+    assert loaded.fill_values == trained_model.fill_values
+    assert loaded.training_metadata['content_hash']
+
+    requests = farmers.drop(columns=REQUEST_COLUMNS).head(100)
+    pd.testing.assert_frame_equal(loaded.predict_priority_batch(requests),
+                                  trained_model.predict_priority_batch(requests))
+
+
+def test_bundle_arrays_are_memory_mapped(bundle_path):
+    loaded = FarmerPrioritizationModel()
+    loaded.load_model(bundle_path)
+    assert isinstance(loaded.scaler.mean_, np.memmap)
+    assert not loaded.scaler.mean_.flags.writeable
+
+
+def test_tampered_bundle_is_rejected(bundle_path):
+    bundle = joblib.load(bundle_path)
+    bundle['fill_values'] = dict(bundle['fill_values'], monthly_income=-1)
+    joblib.dump(bundle, bundle_path)
+    with pytest.raises(ValueError, match='hash'):
+        FarmerPrioritizationModel().load_model(bundle_path)
+
+
+def test_unknown_format_version_is_rejected(bundle_path):
+    bundle = joblib.load(bundle_path)
+    bundle['format_version'] = BUNDLE_FORMAT_VERSION + 1
+    joblib.dump(bundle, bundle_path)
+    with pytest.raises(ValueError, match='version'):
+        FarmerPrioritizationModel().load_model(bundle_path)
@@ -0,0 +1,66 @@
+import json
+from typing import Any, Dict, List
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+from starlette.background import BackgroundTask
+
+from ndjson_stream import NDJSONStreamingResponse, stream_scored_chunks
+
+
+class Item(BaseModel):
+    item_id: str
+    value: float
+
+
+@pytest.fixture
+def stream_app():
+    app = FastAPI()
+    app.state.chunks = []
+    app.state.finished = False
+
+    async def score_chunk(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        app.state.chunks.append([record['item_id'] for record in records])
+        return [{'item_id': record['item_id'], 'double': record['value'] * 2} for record in records]
+
+    def finish():
+        app.state.finished = True
+
+    @app.post('/stream')
+    async def stream(request: Request):
+        return NDJSONStreamingResponse(stream_scored_chunks(request, score_chunk, Item, chunk_rows=2),
+                                       background=BackgroundTask(finish))
+
+    return app
+
+
+def _post_lines(app, lines):
+    response = TestClient(app).post('/stream', content='\n'.join(lines) + '\n')
+    assert response.status_code == 200
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_invalid_records_get_their_own_error_lines(stream_app):
+    lines = [json.dumps({'item_id': 'a', 'value': 1}),
+             json.dumps({'item_id': 'b', 'value': 'not a number'}),
+             json.dumps({'item_id': 'c', 'value': '2.5'}),
+             '{broken',
+             json.dumps({'value': 3}),
+             json.dumps({'item_id': 'd', 'value': 4})]
+    results = _post_lines(stream_app, lines)
+
+    assert [result.get('item_id', result.get('line')) for result in results] == ['a', 2, 'c', 4, 5, 'd']
+    assert results[0]['double'] == 2 and results[2]['double'] == 5.0
+    assert results[1]['error'].startswith('Invalid record: value')
+    assert 'item_id' in results[4]['error']
+    # Only the valid records reach the scorer
+    assert stream_app.state.chunks == [['a'], ['c'], ['d']]
+
+
+def test_chunks_and_background_task(stream_app):
+    results = _post_lines(stream_app, [json.dumps({'item_id': str(i), 'value': i}) for i in range(5)])
+    assert [result['double'] for result in results] == [0, 2, 4, 6, 8]
+    assert stream_app.state.chunks == [['0', '1'], ['2', '3'], ['4']]
+    assert stream_app.state.finished
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import cross_val_score
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+
+from data_generator import generate_farmer_dataset
+from ml_model import FarmerPrioritizationModel, _score_cv_fold
+
+PARAM_GRID = {'C': [0.1, 1.0], 'solver': ['lbfgs', 'liblinear'], 'k': [4, 8]}
+STAGES = ['preprocess', 'feature_scoring', 'grid_search', 'final_fit', 'evaluation', 'total']
+
+
+@pytest.fixture(scope='module')
+def farmers():
+    return generate_farmer_dataset(500)
+
+
+@pytest.fixture(scope='module')
+def sequential(farmers):
+    model = FarmerPrioritizationModel()
+    return model, model.train_model_parallel(farmers, param_grid=PARAM_GRID, cv=3, n_jobs=1)
+
+
+def test_grid_search_picks_the_best_cv_score(sequential):
+    model, results = sequential
+    grid = results['grid_results']
+    assert len(grid) == 8
+    assert results['cv_mean'] == max(result['cv_mean'] for result in grid)
+    assert results['best_params'] == {key: grid[0][key] for key in ('C', 'solver', 'k')}
+    assert len(model.feature_columns) == results['best_params']['k']
+    assert model.model.C == results['best_params']['C']
+    assert set(results['timings']) == set(STAGES)
+
+
+def test_worker_processes_give_the_same_result(farmers, sequential):
+    _, expected = sequential
+    results = FarmerPrioritizationModel().train_model_parallel(farmers, param_grid=PARAM_GRID, cv=3, n_jobs=2)
+    assert results['grid_results'] == expected['grid_results']
+    assert results['accuracy'] == expected['accuracy']
+
+
+def test_fold_score_matches_cross_val_score():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(300, 5))
+    y = (X[:, 0] + 0.5 * rng.normal(size=300) > 0).astype(int)
+    train_idx, test_idx = np.arange(200), np.arange(200, 300)
+    feature_idx = np.array([0, 2, 3])
+
+    score = _score_cv_fold(X, y, train_idx, test_idx, feature_idx, 1.0, 'lbfgs')
+    pipeline = make_pipeline(StandardScaler(), LogisticRegression(random_state=42, max_iter=1000))
+    expected = cross_val_score(pipeline, X[:, feature_idx], y, cv=[(train_idx, test_idx)])[0]
+    assert score == pytest.approx(expected)
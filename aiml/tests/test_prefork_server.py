@@ -0,0 +1,116 @@
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import textwrap
+import time
+import urllib.request
+
+import pytest
+
+from prefork_server import MASTER_PID_ENV, request_reload, _log_config
+
+AIML_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TOY_SERVICE = '''
+import os
+from fastapi import FastAPI
+
+app = FastAPI()
+generation = 0
+
+def preload_model():
+    global generation
+    if os.path.exists('fail_reload'):
+        raise RuntimeError('broken model')
+    generation += 1
+
+@app.get('/')
+def index():
+    return {'pid': os.getpid(), 'generation': generation}
+'''
+
+MASTER = '''
+from prefork_server import PreforkMaster, ServiceSpec
+PreforkMaster([ServiceSpec('toy', 'toy_service', {port})], 2, '127.0.0.1').run()
+'''
+
+
+def test_request_reload_signals_the_master(monkeypatch):
+    received = []
+    previous = signal.signal(signal.SIGHUP, lambda signum, frame: received.append(signum))
+    try:
+        monkeypatch.delenv(MASTER_PID_ENV, raising=False)
+        request_reload()
+        assert received == []
+
+        monkeypatch.setenv(MASTER_PID_ENV, str(os.getpid()))
+        request_reload()
+        assert received == [signal.SIGHUP]
+    finally:
+        signal.signal(signal.SIGHUP, previous)
+
+
+def test_log_lines_name_the_service():
+    config = _log_config('fraud')
+    assert all('[fraud %(process)d]' in formatter['fmt'] for formatter in config['formatters'].values())
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _get(port):
+    with urllib.request.urlopen(f'http://127.0.0.1:{port}/', timeout=5) as response:
+        return json.loads(response.read())
+
+
+def _wait_for(condition, port, timeout=20.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            result = _get(port)
+            if condition(result):
+                return result
+        except OSError:
+            pass
+        time.sleep(0.1)
+    pytest.fail("condition not reached")
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason="pre-fork mode needs os.fork")
+def test_master_preloads_reloads_and_replaces_workers(tmp_path):
+    (tmp_path / 'toy_service.py').write_text(TOY_SERVICE)
+    port = _free_port()
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([str(tmp_path), AIML_DIR]))
+    master = subprocess.Popen([sys.executable, '-c', textwrap.dedent(MASTER.format(port=port))],
+                              cwd=tmp_path, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        # Workers serve the model the master loaded before forking
+        first = _wait_for(lambda result: True, port)
+        assert first['generation'] == 1 and first['pid'] != master.pid
+
+        # SIGHUP: a new generation of workers serves the reloaded model
+        master.send_signal(signal.SIGHUP)
+        reloaded = _wait_for(lambda result: result['generation'] == 2, port)
+
+        # A failed reload keeps the current workers
+        (tmp_path / 'fail_reload').touch()
+        master.send_signal(signal.SIGHUP)
+        time.sleep(1.0)
+        assert _get(port)['generation'] == 2
+
+        # A dead worker is replaced
+        os.kill(reloaded['pid'], signal.SIGKILL)
+        _wait_for(lambda result: result['pid'] != reloaded['pid'], port)
+
+        master.send_signal(signal.SIGTERM)
+        assert master.wait(timeout=30) == 0
+    finally:
+        if master.poll() is None:
+            master.kill()
+            master.wait()
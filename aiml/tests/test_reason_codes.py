@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import StandardScaler
+
+from logistic_scorer import FoldedLogisticScorer
+from reason_codes import (ReasonCodeEngine, Rule, priority_reasons, fraud_risk_factors, rank_contributions,
+                          PRIORITY_GOOD, PRIORITY_LOW, LOW_INCOME, LARGE_LAND, FIRST_TIME_APPLICANT,
+                          MULTIPLE_GRANTS, MARGINALIZED_CATEGORY, HAS_DISABILITY, HIGH_CONFIDENCE,
+                          LOW_CONFIDENCE, FRAUD_HIGH_INCOME, FRAUD_MULTIPLE_GRANTS, FRAUD_HIGH_ANOMALY)
+
+FARMERS = {
+    'priority_score': [7.2, 3.1, 5.0],
+    'monthly_income': [12000, 40000, 20000],
+    'land_size_bigha': [3.0, 6.5, 1.0],
+    'previous_grants': [0, 3, None],
+    'social_category': ['dalit', 'general', None],
+    'has_disability': [False, True, None],
+    'confidence': [0.9, 0.3, 0.6]
+}
+
+
+def test_priority_reason_codes():
+    mask = priority_reasons.evaluate(FARMERS, 3)
+    codes = [row.tolist() for row in priority_reasons.reason_codes(mask)]
+    assert codes[0] == [PRIORITY_GOOD, LOW_INCOME, FIRST_TIME_APPLICANT, MARGINALIZED_CATEGORY, HIGH_CONFIDENCE]
+    assert codes[1] == [PRIORITY_LOW, 111, LARGE_LAND, MULTIPLE_GRANTS, HAS_DISABILITY, LOW_CONFIDENCE]
+    # Missing values read as the column default (0 grants, general category, no disability)
+    assert FIRST_TIME_APPLICANT in codes[2] and MARGINALIZED_CATEGORY not in codes[2]
+
+
+def test_reasons_are_the_messages_of_the_codes():
+    reasons = priority_reasons.reasons(FARMERS, 3)
+    mask = priority_reasons.evaluate(FARMERS, 3)
+    for row_reasons, row_codes in zip(reasons, priority_reasons.reason_codes(mask)):
+        assert row_reasons == [priority_reasons.messages[code] for code in row_codes]
+
+
+def test_batch_matches_row_by_row():
+    rng = np.random.default_rng(0)
+    n = 400
+    columns = {
+        'priority_score': np.round(rng.uniform(0, 10, n), 2),
+        'monthly_income': rng.choice([5000, 14999, 15000, 35000, 35001, 60000], n),
+        'land_size_bigha': rng.choice([0.5, 2.0, 4.0, 4.5], n),
+        'previous_grants': rng.integers(0, 4, n),
+        'social_category': rng.choice(['dalit', 'janajati', 'general', 'brahmin'], n),
+        'has_disability': rng.random(n) < 0.1,
+        'confidence': rng.random(n)
+    }
+    reasons = priority_reasons.reasons(columns, n)
+    for i in range(0, n, 37):
+        row = {name: values[i:i + 1] for name, values in columns.items()}
+        assert reasons[i] == priority_reasons.reasons(row, 1)[0]
+    # Rows with the same pattern share one interned list
+    assert len({id(row) for row in reasons}) < n
+
+
+def test_fraud_risk_factor_codes():
+    columns = {'monthly_income': [45000, 9000], 'land_size_bigha': [2, 2], 'previous_grants': [5, 1],
+               'anomaly_score': [-0.4, 0.2]}
+    codes = [row.tolist() for row in fraud_risk_factors.reason_codes(fraud_risk_factors.evaluate(columns, 2))]
+    assert codes == [[FRAUD_HIGH_INCOME, FRAUD_MULTIPLE_GRANTS, FRAUD_HIGH_ANOMALY], []]
+    assert fraud_risk_factors.reasons({name: [] for name in columns}, 0) == []
+
+
+def test_engine_rule_limit():
+    rules = [Rule(i, str(i), lambda c: c.get('x') > 0) for i in range(64)]
+    with pytest.raises(ValueError):
+        ReasonCodeEngine(rules)
+
+
+def test_contributions_rank_and_sum_to_the_decision_function():
+    rng = np.random.default_rng(1)
+    X = rng.normal(size=(200, 4)) * [1000.0, 1.0, 5.0, 0.1] + [20000.0, 2.0, 30.0, 0.5]
+    y = (X[:, 0] < 20000) ^ (rng.random(200) < 0.2)
+    scaler = StandardScaler().fit(X)
+    classifier = LogisticRegression().fit(scaler.transform(X), y)
+    scorer = FoldedLogisticScorer.from_fitted(classifier, scaler, ['a', 'b', 'c', 'd'])
+
+    contributions = scorer.contributions(X[:5])
+    np.testing.assert_allclose(contributions, scaler.transform(X[:5]) * classifier.coef_[0], atol=1e-9)
+    np.testing.assert_allclose(contributions.sum(axis=1) + classifier.intercept_[0],
+                               classifier.decision_function(scaler.transform(X[:5])), atol=1e-9)
+
+    ranked = rank_contributions(contributions, scorer.feature_columns, top_n=2)
+    for row, row_contributions in zip(ranked, contributions):
+        assert len(row) == 2
+        assert row[0]['feature'] == 'abcd'[int(np.argmax(np.abs(row_contributions)))]
+        assert abs(row[0]['contribution']) >= abs(row[1]['contribution'])
@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+from fastapi_app import select_top_priority
+
+
+def reference(priority_scores, top_k=None, min_score=None):
+    """The full stable sort select_top_priority replaces."""
+    order = sorted(range(len(priority_scores)), key=lambda i: -priority_scores[i])
+    if min_score is not None:
+        order = [i for i in order if priority_scores[i] >= min_score]
+    return order if top_k is None else order[:top_k]
+
+
+def test_ties_at_the_cutoff_keep_input_order():
+    scores = np.array([5.0, 7.0, 5.0, 9.0, 5.0, 7.0])
+    assert select_top_priority(scores, top_k=4).tolist() == [3, 1, 5, 0]
+    assert select_top_priority(scores, top_k=5).tolist() == [3, 1, 5, 0, 2]
+
+
+def test_min_score_and_top_k():
+    scores = np.array([2.0, 8.5, 6.0, 8.5, 4.0])
+    assert select_top_priority(scores, min_score=6.0).tolist() == [1, 3, 2]
+    assert select_top_priority(scores, top_k=1, min_score=6.0).tolist() == [1]
+    assert select_top_priority(scores, min_score=9.0).tolist() == []
+    assert select_top_priority(scores, top_k=10).tolist() == [1, 3, 2, 4, 0]
+
+
+@pytest.mark.parametrize('top_k', [None, 1, 7, 50, 200])
+@pytest.mark.parametrize('min_score', [None, 5.0])
+def test_matches_full_sort(top_k, min_score):
+    # Rounded scores, as served, so ties are common
+    scores = np.round(np.random.default_rng(top_k or 0).uniform(0, 10, 150), 1)
+    assert select_top_priority(scores, top_k, min_score).tolist() == reference(scores, top_k, min_score)
@@ -0,0 +1,44 @@
+import pytest
+
+from data_generator import generate_farmer_dataset
+from dataset_store import StaleDatasetError, import_csv, write_dataset
+from ml_model import FarmerPrioritizationModel, _training_cache_key
+from training_cache import TrainingCache
+
+
+@pytest.fixture
+def key(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_dataset(generate_farmer_dataset(120))
+    cache = TrainingCache(str(tmp_path / 'cache'))
+    return lambda incremental=False, parallel=False, chunksize=50000: _training_cache_key(
+        cache, FarmerPrioritizationModel(), incremental, parallel, chunksize)
+
+
+def test_key_follows_the_stored_data(key):
+    before = key()
+    # Re-importing the same CSV rewrites the archive but not the data
+    import_csv()
+    assert key() == before
+
+    write_dataset(generate_farmer_dataset(121))
+    assert key() != before
+
+
+def test_key_covers_the_training_mode_and_parameters(key):
+    keys = {key(), key(parallel=True), key(incremental=True), key(incremental=True, chunksize=1000)}
+    assert len(keys) == 4
+    # Incremental training ignores the parallel flag
+    assert key(incremental=True, parallel=True) == key(incremental=True)
+
+
+def test_stale_dataset_is_not_hashed(key):
+    with open('farmer_dataset.csv', 'a') as f:
+        f.write('\n')
+    with pytest.raises(StaleDatasetError):
+        key()
+
+
+def test_no_dataset_no_key(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    assert _training_cache_key(TrainingCache(), FarmerPrioritizationModel(), False, False, 50000) is None
@@ -0,0 +1,93 @@
+import asyncio
+import os
+
+import pytest
+
+import training_jobs
+from data_generator import generate_farmer_dataset
+from ml_model import FarmerPrioritizationModel
+from training_jobs import TrainingJobManager, validate_candidate
+
+
+@pytest.fixture(scope='module')
+def farmers():
+    return generate_farmer_dataset(400)
+
+
+@pytest.fixture(scope='module')
+def trained_model(farmers):
+    model = FarmerPrioritizationModel()
+    model.train_model(farmers)
+    return model
+
+
+@pytest.fixture
+def fake_training(trained_model, farmers, tmp_path, monkeypatch):
+    """Jobs 'train' by saving the fixture model; the metrics they report are set per test."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(training_jobs, 'load_dataset', lambda *args, **kwargs: farmers)
+    reported = {'accuracy': 0.9}
+
+    def run_training_job(job_dir, **options):
+        bundle_path = os.path.join(job_dir, 'bundle.joblib')
+        trained_model.save_model(bundle_path, with_scorer=False)
+        return {'bundle_path': bundle_path, 'cache_key': None, 'metrics': dict(reported),
+                'timings': {'train': 0.0}, 'model_timings': {}}
+
+    async def run_in_process(func, *args, **kwargs):
+        assert func is training_jobs.run_training_job
+        return run_training_job(*args, **kwargs)
+
+    monkeypatch.setattr(training_jobs, 'run_in_process', run_in_process)
+    return reported
+
+
+def run_job(manager):
+    async def main():
+        record = manager.start()
+        with pytest.raises(RuntimeError):
+            manager.start()
+        while manager.get(record['job_id'])['status'] not in ('succeeded', 'failed'):
+            await asyncio.sleep(0.01)
+        return manager.get(record['job_id'])
+
+    return asyncio.run(main())
+
+
+def test_validated_candidate_is_installed(fake_training, tmp_path):
+    installed = []
+    manager = TrainingJobManager(installed.append, jobs_dir=str(tmp_path / 'jobs'))
+    record = run_job(manager)
+
+    assert record['status'] == 'succeeded', record['error']
+    assert len(installed) == 1 and installed[0].model is not None
+    assert record['metrics'] == {'accuracy': 0.9}
+    assert {'validate', 'install'} <= set(record['timings'])
+    # The candidate bundle became the active bundle; the job keeps only its record
+    assert os.path.exists(installed[0].bundle_path)
+    assert os.listdir(tmp_path / 'jobs' / record['job_id']) == ['job.json']
+    assert manager.list()[0]['job_id'] == record['job_id']
+
+
+def test_rejected_candidate_leaves_the_served_model(fake_training, tmp_path):
+    fake_training['accuracy'] = 0.1
+    installed = []
+    manager = TrainingJobManager(installed.append, jobs_dir=str(tmp_path / 'jobs'))
+    record = run_job(manager)
+
+    assert record['status'] == 'failed'
+    assert 'below the minimum' in record['error']
+    assert installed == []
+    assert not os.path.exists(FarmerPrioritizationModel().bundle_path)
+
+
+def test_validation_checks_the_scores(trained_model, farmers, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(training_jobs, 'load_dataset', lambda *args, **kwargs: farmers)
+    validate_candidate(trained_model, {'accuracy': 0.9})
+
+    broken = FarmerPrioritizationModel()
+    broken.__dict__.update(trained_model.__dict__)
+    monkeypatch.setattr(broken, 'calculate_priority_scores', lambda df, p: p * 20.0)
+    with pytest.raises(ValueError, match='Priority scores'):
+        validate_candidate(broken, {'accuracy': 0.9})
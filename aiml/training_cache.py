@@ -0,0 +1,95 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+import numpy as np
+from typing import Dict, List, Any, Optional
+
+CACHE_DIR = os.environ.get('AI_TRAINING_CACHE_DIR', 'model_cache')
+CACHE_MAX_ENTRIES = int(os.environ.get('AI_TRAINING_CACHE_SIZE', '5'))
+
+
+def _to_json_safe(value: Any) -> Any:
+    """Convert NumPy scalars/arrays inside training results to plain JSON types."""
+    if isinstance(value, dict):
+        return {str(k): _to_json_safe(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_json_safe(v) for v in value]
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+class TrainingCache:
+    """
+    Cache of trained model bundles keyed by a hash of the dataset contents,
+    the feature list and the hyperparameters. Least recently used entries are
+    evicted once the cache holds more than max_entries.
+    """
+
+    # Per-sample test outputs are not worth keeping in the cache
+    SKIPPED_RESULTS = ('test_predictions', 'test_probabilities', 'test_actual')
+
+    def __init__(self, cache_dir: str = CACHE_DIR, max_entries: int = CACHE_MAX_ENTRIES):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+
+    def make_key(self, dataset_sha256: str, feature_columns: List[str], hyperparameters: Dict[str, Any]) -> str:
+        """Cache key for one (dataset content hash, features, hyperparameters) combination."""
+        spec = json.dumps({
+            'dataset_sha256': dataset_sha256,
+            'features': list(feature_columns),
+            'hyperparameters': _to_json_safe(hyperparameters)
+        }, sort_keys=True)
+        return hashlib.sha256(spec.encode('utf-8')).hexdigest()
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return {'bundle_path', 'metrics'} for a cached key, or None."""
+        entry_dir = self._entry_dir(key)
+        bundle_path = os.path.join(entry_dir, 'bundle.joblib')
+        metrics_path = os.path.join(entry_dir, 'metrics.json')
+        if not (os.path.exists(bundle_path) and os.path.exists(metrics_path)):
+            return None
+
+        with open(metrics_path, encoding='utf-8') as f:
+            metrics = json.load(f)
+
+        # Mark as recently used for eviction
+        now = time.time()
+        os.utime(entry_dir, (now, now))
+        return {'key': key, 'bundle_path': bundle_path, 'metrics': metrics}
+
+    def put(self, key: str, bundle_path: str, results: Dict[str, Any]) -> Dict[str, Any]:
+        """Store a saved model bundle and its training metrics under key."""
+        entry_dir = self._entry_dir(key)
+        tmp_dir = f'{entry_dir}.tmp{os.getpid()}'
+        os.makedirs(tmp_dir, exist_ok=True)
+
+        metrics = _to_json_safe({k: v for k, v in results.items() if k not in self.SKIPPED_RESULTS})
+        shutil.copyfile(bundle_path, os.path.join(tmp_dir, 'bundle.joblib'))
+        with open(os.path.join(tmp_dir, 'metrics.json'), 'w', encoding='utf-8') as f:
+            json.dump(metrics, f, indent=2)
+
+        # Publish the entry in one rename so readers never see it half-written
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        os.replace(tmp_dir, entry_dir)
+        self.evict()
+        return {'key': key, 'bundle_path': os.path.join(entry_dir, 'bundle.joblib'), 'metrics': metrics}
+
+    def evict(self):
+        """Drop least recently used entries beyond max_entries."""
+        if not os.path.isdir(self.cache_dir):
+            return
+        entries = [
+            os.path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir)
+            if os.path.isdir(os.path.join(self.cache_dir, name)) and '.tmp' not in name
+        ]
+        entries.sort(key=os.path.getmtime, reverse=True)
+        for entry_dir in entries[self.max_entries:]:
+            shutil.rmtree(entry_dir, ignore_errors=True)
@@ -0,0 +1,270 @@
+"""
+Background training jobs for the prioritization service.
+
+Each job trains in a worker process and writes a candidate bundle into its own
+job directory. The server then loads the candidate, validates it and only then
+installs it and swaps the served model reference. Predictions already in flight
+keep the model object they started with. Job records (status, progress, per-stage
+timings, metrics, errors) are JSON files in the job directory, so any server
+process can report on them.
+"""
+
+import asyncio
+import json
+import os
+import shutil
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, List, Any, Callable, Optional
+
+import numpy as np
+
+from ml_model import FarmerPrioritizationModel, _training_cache_key
+from dataset_store import load_dataset, sync_dataset
+from training_cache import TrainingCache, _to_json_safe
+from executors import run_in_thread, run_in_process
+
+JOBS_DIR = os.environ.get('AI_TRAINING_JOBS_DIR', 'training_jobs')
+JOBS_KEPT = int(os.environ.get('AI_TRAINING_JOBS_KEPT', '20'))
+MIN_ACCURACY = float(os.environ.get('AI_MIN_MODEL_ACCURACY', '0.5'))
+VALIDATION_ROWS = 1000
+
+
+def _write_json(path: str, data: Dict[str, Any]):
+    tmp_path = f'{path}.tmp{os.getpid()}'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class ProgressReporter:
+    """Stage and progress updates from the training process, written to progress.json."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.timings = {}
+        self.current = None
+        self.started = None
+
+    def stage(self, name: str, progress: float):
+        self._close_stage()
+        self.current = name
+        self.started = time.perf_counter()
+        _write_json(self.path, {'stage': name, 'progress': progress, 'timings': self.timings})
+
+    def _close_stage(self):
+        if self.current is not None:
+            self.timings[self.current] = round(time.perf_counter() - self.started, 4)
+            self.current = None
+
+    def finish(self) -> Dict[str, float]:
+        self._close_stage()
+        return self.timings
+
+
+def run_training_job(job_dir: str, incremental: bool = False, parallel: bool = False,
+                     chunksize: int = 50000, n_jobs: int = -1) -> Dict[str, Any]:
+    """Train a candidate model into job_dir (runs in a worker process)."""
+    reporter = ProgressReporter(os.path.join(job_dir, 'progress.json'))
+    model = FarmerPrioritizationModel()
+    cache = TrainingCache()
+
+    reporter.stage('load_data', 0.05)
+    sync_dataset()
+    cache_key = _training_cache_key(cache, model, incremental, parallel, chunksize)
+    if incremental:
+        reporter.stage('train', 0.1)
+        results = model.train_incremental(chunksize=chunksize)
+    else:
+        df = load_dataset()
+        reporter.stage('train', 0.2)
+        if parallel:
+            results = model.train_model_parallel(df, n_jobs=n_jobs)
+        else:
+            results = model.train_model(df)
+
+    reporter.stage('save', 0.8)
+    bundle_path = os.path.join(job_dir, 'bundle.joblib')
+    # The serving scorer is only exported once the candidate passes validation
+    model.save_model(bundle_path, with_scorer=False)
+
+    metrics = {k: v for k, v in results.items()
+               if k not in TrainingCache.SKIPPED_RESULTS and k != 'timings'}
+    return {
+        'bundle_path': bundle_path,
+        'cache_key': cache_key,
+        'metrics': _to_json_safe(metrics),
+        'timings': reporter.finish(),
+        'model_timings': _to_json_safe(results.get('timings', {}))
+    }
+
+
+def validate_candidate(candidate: FarmerPrioritizationModel, metrics: Dict[str, Any],
+                       min_accuracy: float = MIN_ACCURACY, sample_rows: int = VALIDATION_ROWS):
+    """Raise ValueError unless the candidate scores a sample of the dataset sensibly."""
+    accuracy = metrics.get('accuracy')
+    if accuracy is not None and accuracy < min_accuracy:
+        raise ValueError(f"Accuracy {accuracy:.4f} is below the minimum of {min_accuracy:.4f}")
+
+    sync_dataset()
+    sample = load_dataset().head(sample_rows)
+    scored = candidate.predict_priority_batch(sample)
+    probabilities = scored['approval_probability'].to_numpy()
+    priority_scores = scored['priority_score'].to_numpy()
+    if len(scored) != len(sample):
+        raise ValueError(f"Scored {len(scored)} of {len(sample)} validation rows")
+    if not (np.all(np.isfinite(probabilities)) and np.all((probabilities >= 0) & (probabilities <= 1))):
+        raise ValueError("Approval probabilities outside [0, 1] on the validation sample")
+    if not (np.all(np.isfinite(priority_scores)) and np.all((priority_scores >= 0) & (priority_scores <= 10))):
+        raise ValueError("Priority scores outside [0, 10] on the validation sample")
+
+
+def load_and_validate(output: Dict[str, Any]) -> FarmerPrioritizationModel:
+    """
+    Load a candidate bundle (its content hash is checked) and validate it.
+    Only validated candidates are added to the training cache.
+    """
+    candidate = FarmerPrioritizationModel()
+    candidate.load_model(output['bundle_path'])
+    validate_candidate(candidate, output['metrics'])
+    if output['cache_key']:
+        TrainingCache().put(output['cache_key'], output['bundle_path'], output['metrics'])
+    return candidate
+
+
+class TrainingJobManager:
+    """
+    Starts training jobs and tracks their records. One job runs at a time.
+    install is called with the validated candidate on the event loop thread,
+    so the served model reference is swapped in a single assignment.
+    on_finished (optional) is called with the final record once it is saved.
+    """
+
+    def __init__(self, install: Callable[[FarmerPrioritizationModel], None], jobs_dir: str = JOBS_DIR,
+                 jobs_kept: int = JOBS_KEPT, on_finished: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self.install = install
+        self.on_finished = on_finished
+        self.jobs_dir = jobs_dir
+        self.jobs_kept = jobs_kept
+        self.jobs = {}
+        self.active_job_id = None
+        self._tasks = {}
+
+    def _job_dir(self, job_id: str) -> str:
+        return os.path.join(self.jobs_dir, job_id)
+
+    def _save(self, record: Dict[str, Any]):
+        _write_json(os.path.join(self._job_dir(record['job_id']), 'job.json'), record)
+
+    def start(self, incremental: bool = False, parallel: bool = False, chunksize: int = 50000,
+              n_jobs: int = -1) -> Dict[str, Any]:
+        """Create a job and start it in the background. Raises RuntimeError if one is running."""
+        if self.active_job_id is not None:
+            raise RuntimeError(f"Training job {self.active_job_id} is already running")
+
+        job_id = uuid.uuid4().hex[:12]
+        os.makedirs(self._job_dir(job_id), exist_ok=True)
+        record = {
+            'job_id': job_id,
+            'status': 'queued',
+            'stage': None,
+            'progress': 0.0,
+            'options': {'incremental': incremental, 'parallel': parallel,
+                        'chunksize': chunksize, 'n_jobs': n_jobs},
+            'created_at': datetime.now().isoformat(),
+            'started_at': None,
+            'finished_at': None,
+            'duration_seconds': None,
+            'timings': {},
+            'model_timings': {},
+            'metrics': None,
+            'error': None
+        }
+        self.jobs[job_id] = record
+        self.active_job_id = job_id
+        self._save(record)
+        self._tasks[job_id] = asyncio.get_running_loop().create_task(self._run(job_id))
+        return dict(record)
+
+    async def _run(self, job_id: str):
+        record = self.jobs[job_id]
+        started = time.perf_counter()
+        record.update(status='running', started_at=datetime.now().isoformat())
+        self._save(record)
+
+        try:
+            output = await run_in_process(run_training_job, self._job_dir(job_id), **record['options'])
+            record.update(timings=dict(output['timings']), model_timings=output['model_timings'],
+                          metrics=output['metrics'])
+
+            record.update(status='validating', stage='validate', progress=0.9)
+            self._save(record)
+            stage_started = time.perf_counter()
+            candidate = await run_in_thread(load_and_validate, output)
+            record['timings']['validate'] = round(time.perf_counter() - stage_started, 4)
+
+            record.update(stage='install', progress=0.95)
+            stage_started = time.perf_counter()
+            await run_in_thread(candidate.install_bundle, output['bundle_path'])
+            self.install(candidate)
+            record['timings']['install'] = round(time.perf_counter() - stage_started, 4)
+
+            record.update(status='succeeded', stage=None, progress=1.0)
+            print(f"Training job {job_id} succeeded; new model is now serving.")
+        except Exception as e:
+            # The served model is left untouched
+            record.update(status='failed', error=str(e))
+            print(f"Training job {job_id} failed: {e}")
+        finally:
+            record.update(finished_at=datetime.now().isoformat(),
+                          duration_seconds=round(time.perf_counter() - started, 4))
+            self.active_job_id = None
+            self._tasks.pop(job_id, None)
+            # Candidate bundles are installed or discarded; the record is what is kept
+            bundle_path = os.path.join(self._job_dir(job_id), 'bundle.joblib')
+            if os.path.exists(bundle_path):
+                os.remove(bundle_path)
+            self._save(record)
+            self._prune()
+            if self.on_finished is not None:
+                self.on_finished(dict(record))
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Current record for a job, with live progress from the training process while it runs."""
+        record = self.jobs.get(job_id)
+        if record is None:
+            # Jobs started by another server process, or before a restart
+            return _read_json(os.path.join(self._job_dir(job_id), 'job.json'))
+
+        record = dict(record)
+        if record['status'] == 'running':
+            progress = _read_json(os.path.join(self._job_dir(job_id), 'progress.json'))
+            if progress is not None:
+                record.update(stage=progress['stage'], progress=progress['progress'],
+                              timings=progress['timings'])
+        return record
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Records of the kept jobs, newest first."""
+        if not os.path.isdir(self.jobs_dir):
+            return []
+        records = [self.get(job_id) for job_id in os.listdir(self.jobs_dir)]
+        records = [record for record in records if record is not None]
+        return sorted(records, key=lambda record: record['created_at'], reverse=True)
+
+    def _prune(self):
+        """Delete the oldest finished job directories beyond jobs_kept."""
+        finished = [record for record in self.list()
+                    if record['status'] in ('succeeded', 'failed')]
+        for record in finished[self.jobs_kept:]:
+            shutil.rmtree(self._job_dir(record['job_id']), ignore_errors=True)
+            self.jobs.pop(record['job_id'], None)